@@ -1,7 +1,17 @@
+import asyncio
+import contextvars
+import hashlib
+import json
 import os
+import queue
+import threading
+import time
+from groq import DefaultAsyncHttpxClient
 from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage, convert_to_messages
+from langchain_core.runnables import RunnableLambda
 from dotenv import load_dotenv
 
 try:
@@ -14,67 +24,760 @@ except ImportError:
 # Note: In Streamlit, imports might need adjustment depending on how it's run.
 # We will assume running from root or finance_agent directory.
 try:
-    from tools.currency import get_exchange_rates
-    from tools.stocks import get_stock_data
-    from tools.maps import get_maps_link
+    from tools.currency import get_exchange_rates, aget_exchange_rates
+    from tools.stocks import get_stock_data, aget_stock_data
+    from tools.maps import get_maps_link, aget_maps_link
+    from tools.http import run_async, submit_async
+    from tools.tracing import current_trace, span
+    from tools.compact import compact_result
+    from tools.countries import normalize, resolve
+    from tools.router import FAST_MODEL, ORCHESTRATION, SYNTHESIS, get_router
+    from pipeline import assemble_result
+    from schemas import FinancialReport
 except ImportError:
     # Fallback for running from parent directory
-    from finance_agent.tools.currency import get_exchange_rates
-    from finance_agent.tools.stocks import get_stock_data
-    from finance_agent.tools.maps import get_maps_link
+    from finance_agent.tools.currency import get_exchange_rates, aget_exchange_rates
+    from finance_agent.tools.stocks import get_stock_data, aget_stock_data
+    from finance_agent.tools.maps import get_maps_link, aget_maps_link
+    from finance_agent.tools.http import run_async, submit_async
+    from finance_agent.tools.tracing import current_trace, span
+    from finance_agent.tools.compact import compact_result
+    from finance_agent.tools.countries import normalize, resolve
+    from finance_agent.tools.router import FAST_MODEL, ORCHESTRATION, SYNTHESIS, get_router
+    from finance_agent.pipeline import assemble_result
+    from finance_agent.schemas import FinancialReport
 
 load_dotenv()
 
-@tool
-def currency_tool(country: str):
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+
+# Single source of the agent prompts. Bump PROMPT_VERSION whenever they change:
+# cached answers are keyed on it.
+PROMPT_VERSION = 3
+
+SYSTEM_PROMPT = (
+    "You are an expert Financial Intelligence Agent. "
+    "Use currency_tool, stock_tool and maps_tool for the requested country and report their results exactly. "
+    "Do not make up data."
+)
+
+AGENT_PROMPT = (
+    "Give me full financial intelligence for {country}. "
+    "1. Official Currency Name & Code. "
+    "2. Exchange rates for 1 unit of this currency to USD, INR, GBP, EUR. "
+    "3. Major Stock Indices with current values. "
+    "4. Google Maps link for the Stock Exchange HQ. "
+    "Return the final answer as a JSON object in a ```json code block with keys: "
+    "'currency', 'exchange_rates', 'exchange', 'stock_indices', 'maps_link', 'source', "
+    "plus 'api_error' if currency_tool reported one."
+)
+
+# Per-run token budget the report is measured against (0 = no budget)
+AGENT_TOKEN_BUDGET = int(os.getenv("AGENT_TOKEN_BUDGET", "6000"))
+
+# Model routing (tools/router.py): tool-orchestration turns for the standard
+# lookup go to FAST_MODEL, answer synthesis and free-form questions to
+# DEFAULT_MODEL, with failover between the two. 0 sends everything to DEFAULT_MODEL.
+AGENT_ROUTING = os.getenv("AGENT_ROUTING", "1") == "1"
+# Client-side retries per routed call; failover to the other model replaces most of them
+ROUTER_MAX_RETRIES = int(os.getenv("ROUTER_MAX_RETRIES", "0"))
+
+# Turns whose user message starts like this are simple lookups
+_LOOKUP_PREFIX = AGENT_PROMPT.split("{country}")[0]
+
+# Per-run budget for the agent loop (0 = unlimited): model turns per run and
+# wall-clock seconds per run. A run that hits either answers from the tool
+# results gathered so far instead of failing.
+AGENT_MAX_TURNS = int(os.getenv("AGENT_MAX_TURNS", "4"))
+AGENT_DEADLINE = float(os.getenv("AGENT_DEADLINE", "60"))
+# No new model turn is started with less than this many seconds left (capped
+# at half the deadline, so a short deadline still allows a first turn)
+AGENT_TURN_RESERVE = float(os.getenv("AGENT_TURN_RESERVE", "5"))
+
+# Process-wide registry of chat clients and compiled graphs, shared by all
+# Streamlit reruns and sessions. Keyed by (model, temperature, key fingerprint).
+# ChatGroq wraps a thread-safe httpx client, and the compiled graph holds no
+# per-run state (no checkpointer), so both can be shared across threads.
+_llm_registry = {}
+_agent_registry = {}
+_registry_lock = threading.RLock()
+
+class RunBudget:
+    """
+    Turn and deadline budget for one agent run, plus the run's tool-result memo.
+
+    Tool calls are memoized by (tool, resolved country), so a repeated call
+    (even with a different spelling of the country) reuses the first result,
+    and concurrent duplicates share one in-flight call. check() runs before
+    every model turn; once it returns a reason, the run ends with
+    best_effort(), built from the tool results gathered so far.
+    """
+
+    def __init__(self, max_turns: int = None, deadline: float = None, reserve: float = None):
+        # Unset limits come from the module settings at creation time
+        max_turns = AGENT_MAX_TURNS if max_turns is None else max_turns
+        deadline = AGENT_DEADLINE if deadline is None else deadline
+        reserve = AGENT_TURN_RESERVE if reserve is None else reserve
+        self.max_turns = max_turns
+        self.deadline = time.monotonic() + deadline if deadline else None
+        self.reserve = min(reserve, deadline / 2) if deadline else reserve
+        self.turns = 0
+        self.tool_calls = 0
+        self.memo_hits = 0
+        self.stopped = None
+        self.outputs = {}  # tool name -> latest raw payload
+        self._memo = {}  # (tool, country key) -> payload (sync) or task (async)
+
+    def remaining(self):
+        """
+        Seconds left before the deadline, or None without one.
+        """
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self, turns: int):
+        """
+        None if another model turn fits the budget, else why the run must stop.
+        """
+        if self.max_turns and turns >= self.max_turns:
+            return f"turn limit ({self.max_turns}) reached"
+        remaining = self.remaining()
+        if remaining is not None and remaining < self.reserve:
+            return f"deadline near ({remaining:.1f}s left)"
+        return None
+
+    @staticmethod
+    def _key(tool: str, country: str):
+        record = resolve(country)
+        return tool, record.key if record is not None else normalize(country or "")
+
+    def call(self, tool: str, country: str, fetch):
+        key = self._key(tool, country)
+        self.tool_calls += 1
+        if key in self._memo:
+            self.memo_hits += 1
+            return self._memo[key]
+        payload = self._memo[key] = fetch(country)
+        self.outputs[tool] = payload
+        return payload
+
+    async def acall(self, tool: str, country: str, fetch):
+        key = self._key(tool, country)
+        self.tool_calls += 1
+        task = self._memo.get(key)
+        if task is None:
+            task = self._memo[key] = asyncio.ensure_future(fetch(country))
+        else:
+            self.memo_hits += 1
+        try:
+            # Shielded: one cancelled caller must not cancel the call for the others
+            payload = await asyncio.shield(task)
+        except Exception:
+            self._memo.pop(key, None)  # failures are not memoized
+            raise
+        self.outputs[tool] = payload
+        return payload
+
+    def best_effort_data(self, reason: str):
+        """
+        Dashboard dict assembled from the tool results gathered so far, or an
+        {"error": ...} result if no tool returned anything.
+        """
+        self.stopped = reason
+        if not self.outputs:
+            return {"error": f"Agent stopped before any tool returned data ({reason})."}
+        return _fallback_report(self.outputs)
+
+    def best_effort(self, reason: str):
+        """
+        best_effort_data() as a final answer in the agent's ```json format.
+        """
+        data = self.best_effort_data(reason)
+        note = "no tool results to answer from" if "error" in data else "best-effort answer from the tool results gathered so far"
+        content = f"Stopped early ({reason}); {note}.\n```json\n{json.dumps(data)}\n```"
+        return AIMessage(content=content, response_metadata={"run_budget": self.status()})
+
+    def status(self):
+        remaining = self.remaining()
+        return {
+            "turns": self.turns,
+            "max_turns": self.max_turns,
+            "tool_calls": self.tool_calls,
+            "memo_hits": self.memo_hits,
+            "seconds_left": None if remaining is None else round(remaining, 1),
+            "stopped": self.stopped
+        }
+
+# The active run's budget. Set inside the run's task on the background loop,
+# so concurrent runs (Streamlit sessions, server workers) never share one.
+_run_budget = contextvars.ContextVar("run_budget", default=None)
+
+def _memoized(tool: str, country: str, fetch):
+    budget = _run_budget.get()
+    return fetch(country) if budget is None else budget.call(tool, country, fetch)
+
+async def _amemoized(tool: str, country: str, fetch):
+    budget = _run_budget.get()
+    return await fetch(country) if budget is None else await budget.acall(tool, country, fetch)
+
+# Each tool has a sync and an async implementation. Under ainvoke, LangGraph's
+# ToolNode gathers all tool calls from one model turn concurrently, so the tool
+# phase is bounded by the slowest tool rather than the sum of all three.
+# Tools return (compact content for the model, full payload as the artifact).
+def _currency(country: str):
     """
     Get official currency and exchange rates (USD, INR, GBP, EUR) for a specific country.
     """
-    return get_exchange_rates(country)
+    return compact_result("currency_tool", _memoized("currency_tool", country, get_exchange_rates))
+
+async def _acurrency(country: str):
+    return compact_result("currency_tool", await _amemoized("currency_tool", country, aget_exchange_rates))
 
-@tool
-def stock_tool(country: str):
+def _stock(country: str):
     """
     Get major stock indices and current market data for a specific country.
     """
-    return get_stock_data(country)
+    return compact_result("stock_tool", _memoized("stock_tool", country, get_stock_data))
 
-@tool
-def maps_tool(country: str):
+async def _astock(country: str):
+    return compact_result("stock_tool", await _amemoized("stock_tool", country, aget_stock_data))
+
+def _maps(country: str):
     """
     Get the Google Maps link for the main Stock Exchange HQ of a specific country.
     """
-    return get_maps_link(country)
+    return compact_result("maps_tool", _memoized("maps_tool", country, get_maps_link))
 
-def initialize_agent():
-    """
-    Initializes the LangGraph agent with Groq (Llama 3) and financial tools.
-    """
-    api_key = os.getenv("GROQ_API_KEY")
+async def _amaps(country: str):
+    return compact_result("maps_tool", await _amemoized("maps_tool", country, aget_maps_link))
+
+def _data_tool(func, coroutine, name):
+    return StructuredTool.from_function(
+        func=func, coroutine=coroutine, name=name, response_format="content_and_artifact"
+    )
+
+currency_tool = _data_tool(_currency, _acurrency, "currency_tool")
+stock_tool = _data_tool(_stock, _astock, "stock_tool")
+maps_tool = _data_tool(_maps, _amaps, "maps_tool")
+
+DATA_TOOLS = [currency_tool, stock_tool, maps_tool]
+
+def _key_fingerprint(api_key: str):
+    # Registry keys never hold the raw secret
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+def _resolve_api_key(api_key: str = None):
+    api_key = api_key or os.getenv("GROQ_API_KEY")
     if not api_key:
         raise ValueError("GROQ_API_KEY not found in environment variables.")
+    return api_key
 
-    llm = ChatGroq(
-        model="llama-3.3-70b-versatile",
-        temperature=0,
-        groq_api_key=api_key
-    )
+def _close_llm(llm):
+    # Dropped clients are closed on the shared loop their connections live on.
+    # Left to the garbage collector, their sockets are closed while still
+    # registered with the running loop, which can stall a later connection
+    # that reuses the same file descriptor.
+    submit_async(llm.http_async_client.aclose())
 
-    tools = [currency_tool, stock_tool, maps_tool]
-    
-    # State prompt is handled internally by create_react_agent or we can pass messages_modifier
-    # We will pass a system message as state_modifier
-    system_message = (
-        "You are an expert Financial Intelligence Agent. "
-        "Your goal is to provide accurate financial data for a given country. "
-        "You MUST use the provided tools to get exchange rates, stock indices, and location links. "
-        "Do not make up data. If a tool returns specific data, use it exactly. "
-        "Output the final answer as a structured summary, but you can also include the raw JSON in a code block if requested."
+def _evict_rotated_keys(fingerprint: str):
+    # A changed GROQ_API_KEY invalidates everything built with the old one
+    for registry in (_llm_registry, _agent_registry):
+        for key in [k for k in registry if k[2] != fingerprint]:
+            dropped = registry.pop(key)
+            if registry is _llm_registry:
+                _close_llm(dropped)
+
+def build_llm(model: str = DEFAULT_MODEL, temperature: float = 0, api_key: str = None, max_retries: int = None):
+    """
+    Builds a new Groq (Llama 3) chat model. Prefer get_llm() to reuse clients.
+    """
+    options = {} if max_retries is None else {"max_retries": max_retries}
+    return ChatGroq(
+        model=model,
+        temperature=temperature,
+        groq_api_key=_resolve_api_key(api_key),
+        # Owned here so the registry can close it when the client is dropped
+        http_async_client=DefaultAsyncHttpxClient(),
+        **options
     )
 
-    # create_react_agent returns a CompiledGraph which acts as the 'agent executor'
-    # We remove state_modifier as it is not supported in this version.
-    # We will pass the system prompt in the messages list at runtime.
-    agent_graph = create_react_agent(llm, tools=tools)
+def get_llm(model: str = DEFAULT_MODEL, temperature: float = 0, api_key: str = None, max_retries: int = None):
+    """
+    Returns the shared chat client for (model, temperature, api_key), building it once.
+    """
+    api_key = _resolve_api_key(api_key)
+    fingerprint = _key_fingerprint(api_key)
+    key = (model, temperature, fingerprint, max_retries)
+    with _registry_lock:
+        _evict_rotated_keys(fingerprint)
+        llm = _llm_registry.get(key)
+        if llm is None:
+            llm = build_llm(model, temperature, api_key, max_retries)
+            _llm_registry[key] = llm
+        return llm
+
+def _turn_kind(messages):
+    # Synthesis once tool results are in; before that, orchestration for the
+    # standard lookup and synthesis (large model) for free-form questions
+    for message in reversed(messages):
+        if message.type == "tool":
+            return SYNTHESIS
+        if message.type == "human":
+            return ORCHESTRATION if str(message.content).startswith(_LOOKUP_PREFIX) else SYNTHESIS
+    return SYNTHESIS
+
+class RoutedLLM:
+    """
+    The fast and large chat models behind a ModelRouter. Each turn goes to the
+    router's first candidate and fails over to the next on any error; the
+    decision is attached to the response as response_metadata["routing"].
+    """
+
+    def __init__(self, router, llms: dict):
+        self.router = router
+        self.llms = llms
+
+    async def ainvoke(self, kind: str, messages, config: dict = None, prepare=None):
+        """
+        Runs one turn. prepare(llm) may wrap the client (bind_tools, structured output).
+        """
+        candidates, reason = self.router.route(kind)
+        errors = []
+        with span("llm.route", turn=kind, reason=reason) as route_span:
+            for attempt, model in enumerate(candidates):
+                llm = self.llms[model] if prepare is None else prepare(self.llms[model])
+                start = time.perf_counter()
+                try:
+                    response = await llm.ainvoke(messages, config=config)
+                except Exception as e:
+                    self.router.record(model, time.perf_counter() - start, error=e)
+                    errors.append(f"{model}: {e}")
+                    if attempt == len(candidates) - 1:
+                        route_span.set(errors=errors)
+                        raise
+                    continue
+                latency = time.perf_counter() - start
+                self.router.record(model, latency, failover=attempt > 0)
+                route_span.set(model=model, failover=attempt > 0)
+                # Structured output returns {"raw": message, "parsed": ...}
+                message = response["raw"] if isinstance(response, dict) else response
+                message.response_metadata["routing"] = {
+                    "turn": kind, "model": model, "reason": reason,
+                    "failover": attempt > 0, "errors": errors, "latency_ms": round(latency * 1000, 1)
+                }
+                return response
+
+    def bind_tools(self, tools, **kwargs):
+        return RoutedLLM(self.router, {model: llm.bind_tools(tools, **kwargs) for model, llm in self.llms.items()})
+
+    def graph_model(self, tools):
+        """
+        Model runnable for the agent graph: tools bound, turn kind read from the messages.
+        """
+        routed = self.bind_tools(tools)
+
+        async def acall(messages, config):
+            return await routed.ainvoke(_turn_kind(messages), messages, config)
+
+        def call(messages, config):
+            return run_async(acall(messages, config))
+
+        return RunnableLambda(call, afunc=acall, name="routed_model")
+
+def _turns_used(messages):
+    # Model turns since the latest user message
+    turns = 0
+    for message in reversed(messages):
+        if message.type == "human":
+            break
+        turns += message.type == "ai"
+    return turns
+
+def _budgeted_model(model):
+    """
+    Dynamic model for create_react_agent: the real model while the run's budget
+    allows another turn, otherwise a stand-in that ends the run with the
+    budget's best-effort answer.
+    """
+    def select(state, runtime):
+        budget = _run_budget.get()
+        if budget is None:
+            return model
+        turns = _turns_used(state["messages"])
+        reason = budget.check(turns)
+        if reason is None:
+            budget.turns = turns + 1
+            return model
+        return RunnableLambda(lambda _messages: budget.best_effort(reason), name="best_effort_answer")
+
+    return select
+
+def get_routed_llm(temperature: float = 0, api_key: str = None, strong: str = DEFAULT_MODEL, fast: str = FAST_MODEL):
+    """
+    Shared clients for the process-wide router between fast and strong.
+    """
+    return RoutedLLM(get_router(fast, strong), {
+        model: get_llm(model, temperature, api_key, ROUTER_MAX_RETRIES) for model in (fast, strong)
+    })
+
+def get_agent(model: str = DEFAULT_MODEL, temperature: float = 0, api_key: str = None):
+    """
+    Returns the shared compiled agent graph for (model, temperature, api_key), building it once.
+    """
+    api_key = _resolve_api_key(api_key)
+    fingerprint = _key_fingerprint(api_key)
+    key = (model, temperature, fingerprint)
+    with _registry_lock:
+        _evict_rotated_keys(fingerprint)
+        agent_graph = _agent_registry.get(key)
+        if agent_graph is None:
+            agent_graph = initialize_agent(model, temperature, api_key)
+            _agent_registry[key] = agent_graph
+        return agent_graph
+
+def clear_registry():
+    """
+    Drops all shared clients and graphs (e.g. after changing secrets) and
+    closes the clients' async connections.
+    """
+    with _registry_lock:
+        for llm in _llm_registry.values():
+            _close_llm(llm)
+        _llm_registry.clear()
+        _agent_registry.clear()
+
+def initialize_agent(model: str = DEFAULT_MODEL, temperature: float = 0, api_key: str = None):
+    """
+    Initializes the LangGraph agent with Groq (Llama 3) and financial tools.
+    Builds a fresh graph on every call; app code should use get_agent().
+    """
+    tools = DATA_TOOLS
+
+    if AGENT_ROUTING and model == DEFAULT_MODEL:
+        # Per-turn choice between the fast and the large model
+        llm = get_routed_llm(temperature, api_key).graph_model(tools)
+    else:
+        llm = get_llm(model, temperature, api_key).bind_tools(tools)
+
+    # create_react_agent returns a CompiledGraph which acts as the 'agent executor'.
+    # The graph prepends SYSTEM_PROMPT itself, so callers only send the user turn.
+    agent_graph = create_react_agent(_budgeted_model(llm), tools=tools, prompt=SYSTEM_PROMPT)
     
     return agent_graph
+
+def _token_usage(response):
+    # Non-streamed calls report llm_output["token_usage"]; streamed ones only usage_metadata
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return usage.get("prompt_tokens"), usage.get("completion_tokens")
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if metadata:
+                return metadata.get("input_tokens"), metadata.get("output_tokens")
+    return None, None
+
+class TraceCallbackHandler(BaseCallbackHandler):
+    """
+    Records every LLM turn (model, latency, token counts, tool calls) onto a trace.
+    """
+
+    def __init__(self, trace_obj):
+        self.trace = trace_obj
+        self._started = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name") or (kwargs.get("metadata") or {}).get("ls_model_name")
+        self._started[run_id] = (time.perf_counter(), model, sum(len(batch) for batch in messages))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        started, model, message_count = self._started.pop(run_id, (time.perf_counter(), None, None))
+        prompt_tokens, completion_tokens = _token_usage(response)
+        tool_calls = sum(
+            len(getattr(getattr(g, "message", None), "tool_calls", None) or [])
+            for generations in response.generations for g in generations
+        )
+        self.trace.add_span(
+            "llm.turn", started, time.perf_counter(), model=model, messages=message_count,
+            prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, tool_calls=tool_calls
+        )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        started, model, message_count = self._started.pop(run_id, (time.perf_counter(), None, None))
+        self.trace.add_span("llm.turn", started, time.perf_counter(), model=model, error=str(error))
+
+def _with_trace_callbacks(config: dict = None):
+    # Attach the LLM-turn recorder only when a trace is active (zero cost otherwise)
+    run_trace = current_trace()
+    if run_trace is None:
+        return config
+    config = dict(config or {})
+    config["callbacks"] = list(config.get("callbacks") or []) + [TraceCallbackHandler(run_trace)]
+    return config
+
+def _budget_config(config: dict, budget: RunBudget):
+    # Each turn is a model step plus a tools step; leave room for the best-effort step
+    config = _with_trace_callbacks(config)
+    if budget.max_turns:
+        config = dict(config or {})
+        config.setdefault("recursion_limit", max(25, 2 * budget.max_turns + 2))
+    return config
+
+def _stopped_messages(messages, budget: RunBudget, reason: str):
+    # Final message list for a run cut off by the hard deadline
+    return [*convert_to_messages(messages), budget.best_effort(reason)]
+
+async def _abudgeted(budget: RunBudget, run, on_deadline):
+    # Runs the coroutine with the budget active and the deadline enforced
+    _run_budget.set(budget)
+    try:
+        return await asyncio.wait_for(run, budget.remaining())
+    except asyncio.TimeoutError:
+        return on_deadline("deadline reached")
+
+def run_agent(agent_graph, messages, config: dict = None):
+    """
+    Runs the graph through ainvoke on the shared background event loop, so tool
+    calls from one turn execute concurrently and pooled async clients are reused.
+    The run is bounded by a RunBudget (AGENT_MAX_TURNS, AGENT_DEADLINE).
+    """
+    budget = RunBudget()
+    with span("agent.run") as run_span:
+        result = run_async(_abudgeted(
+            budget,
+            agent_graph.ainvoke({"messages": messages}, config=_budget_config(config, budget)),
+            lambda reason: {"messages": _stopped_messages(messages, budget, reason)}
+        ))
+        run_span.set(**budget.status())
+        return result
+
+def stopped_early(messages):
+    """
+    Why the run was cut short by its budget, or None if the model wrote the answer.
+    """
+    if not messages:
+        return None
+    return (getattr(messages[-1], "response_metadata", None) or {}).get("run_budget", {}).get("stopped")
+
+def _tool_output_text(output):
+    # on_tool_end carries a ToolMessage in recent LangChain versions, a plain string in older ones.
+    # The full payload is the artifact; content is the compact model-facing encoding.
+    artifact = getattr(output, "artifact", None)
+    if artifact is not None:
+        return artifact
+    return getattr(output, "content", output)
+
+def agent_messages(country: str):
+    """
+    Input messages for the free-form agent graph (the system prompt is part of the graph).
+    """
+    return [("user", AGENT_PROMPT.format(country=country))]
+
+# Structured mode: one forced tool-calling turn, then one forced FinancialReport
+# turn. No free-text answer, so nothing to scrape out of a ```json fence.
+def structured_messages(country: str):
+    return [
+        ("system", SYSTEM_PROMPT),
+        ("user", f"Give me full financial intelligence for {country}.")
+    ]
+
+def token_report(messages):
+    """
+    Per-run token budget report from the messages of one run: model, routing
+    decision and input/output tokens per turn (provider usage metadata), totals
+    against AGENT_TOKEN_BUDGET, and model-facing vs full size of the tool results.
+    """
+    turns = []
+    tool_chars = full_tool_chars = 0
+    stopped = None
+    for message in messages:
+        if message.type == "ai" and "run_budget" in message.response_metadata:
+            # The best-effort answer of a cut-off run is not a model turn
+            stopped = message.response_metadata["run_budget"]["stopped"]
+        elif message.type == "ai":
+            usage = message.usage_metadata or {}
+            routing = message.response_metadata.get("routing") or {}
+            turns.append({
+                "model": message.response_metadata.get("model_name"),
+                "route": routing.get("turn"),
+                "failover": routing.get("failover", False),
+                "input_tokens": usage.get("input_tokens", 0),
+                "output_tokens": usage.get("output_tokens", 0),
+                "tool_calls": len(message.tool_calls)
+            })
+        elif message.type == "tool":
+            tool_chars += len(str(message.content))
+            full_tool_chars += len(str(_tool_output_text(message)))
+
+    input_tokens = sum(turn["input_tokens"] for turn in turns)
+    output_tokens = sum(turn["output_tokens"] for turn in turns)
+    report = {
+        "turns": turns,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": input_tokens + output_tokens,
+        "tool_result_chars": tool_chars,
+        "tool_result_chars_full": full_tool_chars
+    }
+    if stopped:
+        report["stopped"] = stopped
+    if AGENT_TOKEN_BUDGET:
+        report["budget"] = AGENT_TOKEN_BUDGET
+        report["over_budget"] = report["total_tokens"] > AGENT_TOKEN_BUDGET
+    return report
+
+def _output_tokens(message):
+    return (getattr(message, "usage_metadata", None) or {}).get("output_tokens") or 0
+
+def _fallback_report(tool_outputs: dict):
+    # Deterministic answer from the raw tool payloads when the report fails to parse
+    def load(name):
+        try:
+            return json.loads(tool_outputs.get(name) or "{}")
+        except json.JSONDecodeError:
+            return {}
+    return assemble_result(load("currency_tool"), load("stock_tool"), tool_outputs.get("maps_tool", "#"))
+
+async def _invoke_turn(llm, kind: str, messages, config: dict, prepare):
+    # llm is a chat model or a RoutedLLM (which picks the model per turn kind)
+    if isinstance(llm, RoutedLLM):
+        return await llm.ainvoke(kind, messages, config, prepare)
+    return await prepare(llm).ainvoke(messages, config=config)
+
+async def arun_structured_agent(llm, country: str, config: dict = None):
+    """
+    Two-turn structured run: the model calls the data tools (executed concurrently),
+    then answers with a forced FinancialReport function call that arrives parsed.
+    Returns {"data": dict, "stats": {turns, output_tokens, tool_calls, parse_failures},
+    "tokens": token_report()}.
+    If the report cannot be parsed, data is assembled from the tool results instead of
+    spending another turn.
+    """
+    tools_by_name = {tool.name: tool for tool in DATA_TOOLS}
+    budget = _run_budget.get() or RunBudget()
+    stats = {"turns": 0, "output_tokens": 0, "tool_calls": 0, "parse_failures": 0}
+    messages = structured_messages(country)
+
+    # 1. Tool turn
+    ai_message = await _invoke_turn(
+        llm, ORCHESTRATION, messages, config, lambda model: model.bind_tools(DATA_TOOLS, tool_choice="required")
+    )
+    stats["turns"] = budget.turns = 1
+    stats["output_tokens"] += _output_tokens(ai_message)
+    calls = [call for call in ai_message.tool_calls if call["name"] in tools_by_name]
+    stats["tool_calls"] = len(calls)
+    tool_messages = await asyncio.gather(
+        *(tools_by_name[call["name"]].ainvoke(call, config=config) for call in calls)
+    )
+    tool_outputs = {message.name: _tool_output_text(message) for message in tool_messages}
+
+    # 2. Report turn
+    result = await _invoke_turn(
+        llm, SYNTHESIS, messages + [ai_message] + list(tool_messages), config,
+        lambda model: model.with_structured_output(FinancialReport, include_raw=True)
+    )
+    stats["turns"] = budget.turns = 2
+    stats["output_tokens"] += _output_tokens(result["raw"])
+    tokens = token_report([ai_message, *tool_messages, result["raw"]])
+
+    fallback = _fallback_report(tool_outputs)
+    if result["parsed"] is None:
+        stats["parse_failures"] += 1
+        return {"data": fallback, "stats": stats, "tokens": tokens}
+
+    data = result["parsed"].model_dump()
+    # Deltas and API errors come straight from the tool payloads so the model need not echo them
+    for field in ("exchange_rate_changes", "exchange", "api_error", "errors"):
+        if field in fallback:
+            data[field] = fallback[field]
+    return {"data": data, "stats": stats, "tokens": tokens}
+
+def run_structured_agent(country: str, model: str = DEFAULT_MODEL, temperature: float = 0,
+                         api_key: str = None, config: dict = None):
+    """
+    Sync wrapper for arun_structured_agent() on the shared event loop.
+    """
+    if AGENT_ROUTING and model == DEFAULT_MODEL:
+        llm = get_routed_llm(temperature, api_key)
+    else:
+        llm = get_llm(model, temperature, api_key)
+    budget = RunBudget()
+
+    def on_deadline(reason):
+        # The report turn never came back: answer from the tool results instead
+        data = budget.best_effort_data(reason)
+        stats = {"turns": budget.turns, "output_tokens": 0, "tool_calls": budget.tool_calls,
+                 "parse_failures": 0, "stopped": reason}
+        return {"data": data, "stats": stats, "tokens": token_report([])}
+
+    with span("agent.structured", model=model) as run_span:
+        result = run_async(_abudgeted(
+            budget, arun_structured_agent(llm, country, _with_trace_callbacks(config)), on_deadline
+        ))
+        run_span.set(**result["stats"], memo_hits=budget.memo_hits)
+    return result
+
+
+def stream_agent(agent_graph, messages, config: dict = None):
+    """
+    Runs the graph with astream_events on the shared event loop and yields
+    simplified events as they happen, for progressive rendering:
+    - {"type": "turn_start"}                      a model turn begins
+    - {"type": "token", "text": str}              streamed answer token
+    - {"type": "tool_start", "name", "input"}     a tool call begins
+    - {"type": "tool_end", "name", "output"}      a tool call finished (output is the full payload string)
+    - {"type": "final", "text": str, "messages"}  the run finished
+    Exceptions raised inside the run are re-raised to the caller. The run is
+    bounded by a RunBudget; a run cut off by its deadline still ends with a
+    "final" event carrying the best-effort answer.
+    """
+    events = queue.Queue()
+    done = object()
+    budget = RunBudget()
+    config = _budget_config(config, budget)
+
+    async def forward():
+        async for event in agent_graph.astream_events(
+            {"messages": messages}, config=config, version="v2"
+        ):
+            events.put(event)
+
+    async def pump():
+        try:
+            # The stopped message list is queued as a tuple, apart from graph events
+            await _abudgeted(budget, forward(), lambda reason: events.put((_stopped_messages(messages, budget, reason),)))
+        except Exception as e:
+            events.put(e)
+        finally:
+            events.put(done)
+
+    submit_async(pump())
+
+    while True:
+        event = events.get()
+        if event is done:
+            return
+        if isinstance(event, Exception):
+            raise event
+        if isinstance(event, tuple):
+            final_messages = event[0]
+            yield {"type": "final", "text": final_messages[-1].content, "messages": final_messages}
+            continue
+
+        kind = event["event"]
+        data = event.get("data", {})
+        if kind == "on_chat_model_start":
+            yield {"type": "turn_start"}
+        elif kind == "on_chat_model_stream":
+            text = data["chunk"].content
+            if text:
+                yield {"type": "token", "text": text}
+        elif kind == "on_tool_start":
+            yield {"type": "tool_start", "name": event["name"], "input": data.get("input")}
+        elif kind == "on_tool_end":
+            yield {"type": "tool_end", "name": event["name"], "output": _tool_output_text(data.get("output"))}
+        elif kind == "on_chain_end" and not event.get("parent_ids"):
+            final_messages = data["output"]["messages"]
+            yield {"type": "final", "text": final_messages[-1].content, "messages": final_messages}
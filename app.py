@@ -1,13 +1,21 @@
 import streamlit as st
+import io
 import json
 import os
+import time
 from dotenv import load_dotenv
 
-# Import Agent
+# Only light modules are imported up front so the page shell renders immediately.
+# The agent stack (langchain/langgraph), the data tools (pandas, numpy, httpx)
+# and charting are imported on first use via lazy_import().
 try:
-    from agent import initialize_agent
+    from startup import lazy_import, start_warmup
+    from tools.tracing import FINANCE_TRACE, current_trace, span, trace
+    from tools.answer_cache import answer_key, get_answer_cache
 except ImportError:
-    from finance_agent.agent import initialize_agent
+    from finance_agent.startup import lazy_import, start_warmup
+    from finance_agent.tools.tracing import FINANCE_TRACE, current_trace, span, trace
+    from finance_agent.tools.answer_cache import answer_key, get_answer_cache
 
 # Load environment variables (Local)
 load_dotenv(override=True)
@@ -95,6 +103,36 @@ with st.sidebar:
 
     st.markdown("### Target Country")
     target_country = st.text_input("Enter Country Name", value="India", placeholder="e.g., Japan, USA, UK")
+
+    st.markdown("### Mode")
+    run_mode = st.radio(
+        "Pipeline",
+        ["⚡ Direct (fast)", "🤖 Agent (LLM)", "🧾 Agent (structured)", "📊 Batch comparison", "🔁 Bulk conversion"],
+        help="Direct calls the tools concurrently without the LLM. Agent runs the full ReAct loop. "
+             "Structured runs the agent in two turns with a typed answer schema. "
+             "Batch compares several countries side by side. "
+             "Bulk conversion converts a CSV ledger of amounts between currencies."
+    )
+    direct_mode = run_mode.startswith("⚡")
+    structured_mode = run_mode.startswith("🧾")
+    batch_mode = run_mode.startswith("📊")
+    convert_mode = run_mode.startswith("🔁")
+    want_summary = st.checkbox("Add AI narrative summary", value=False, disabled=not direct_mode)
+    bypass_cache = st.checkbox(
+        "Bypass answer cache", value=False, disabled=direct_mode or batch_mode or convert_mode,
+        help="Always regenerate the agent answer instead of reusing a recent one for the same country."
+    )
+    if batch_mode:
+        batch_text = st.text_area(
+            "Countries to compare",
+            value="USA, UK, Japan, India, Germany, France",
+            help="Comma or newline separated."
+        )
+    if convert_mode:
+        ledger_file = st.file_uploader(
+            "Ledger CSV", type=["csv"],
+            help="Columns: amount, from_ccy, to_ccy (ISO codes). Adds rate and converted columns."
+        )
     
     st.markdown("---")
     st.markdown("**Capabilities:**")
@@ -106,6 +144,7 @@ with st.sidebar:
     
     st.markdown("---")
     st.markdown("### 🛠️ Debugging")
+    trace_enabled = st.toggle("Enable tracing", value=FINANCE_TRACE, help="Record per-stage timings for the next run.")
     if st.button("Test Currency Tool"):
         from tools.currency import get_exchange_rates
         try:
@@ -114,6 +153,18 @@ with st.sidebar:
         except Exception as e:
             st.error(f"Tool Error: {e}")
             
+    if st.button("Data Freshness"):
+        # Prefetcher health, FX quota usage, breaker state and market-data providers (only loaded when asked for)
+        health = lazy_import("tools.prefetch").prefetch_health()
+        if health is None:
+            st.caption("Background prefetcher is off (set FX_PREFETCH=1).")
+        else:
+            st.json(health)
+        currency = lazy_import("tools.currency")
+        st.json(currency.fx_quota.status())
+        st.json(currency.fx_breaker.status())
+        st.json([provider.status() for provider in lazy_import("tools.stocks").get_providers()])
+
     if st.button("Check Secrets"):
         st.write("Checking environment variables...")
         groq_status = "✅ Found" if os.environ.get("GROQ_API_KEY") else "❌ Missing"
@@ -134,127 +185,621 @@ with st.sidebar:
         except Exception:
             st.write("Secrets file not found (Running locally)")
 
+# --- Rendering ---
+
+# Maps each agent tool to the dashboard section its result fills
+TOOL_SECTIONS = {"currency_tool": "currency", "stock_tool": "stocks", "maps_tool": "maps"}
+
+def render_currency(data):
+    """
+    Renders the currency header, source badge and exchange rate metrics.
+    """
+    currency_data = data.get('currency', {})
+    if isinstance(currency_data, str):
+        currency_name = currency_data
+        currency_code = "N/A"
+    else:
+        currency_name = currency_data.get('name', 'N/A')
+        currency_code = currency_data.get('code', 'N/A')
+    
+    data_source = data.get('source', 'Mock Data')
+    source_color = "green" if data_source == "Live API" else "orange"
+    
+    st.subheader(f"💱 Currency: {currency_name} ({currency_code})")
+    st.markdown(f":{source_color}[Source: {data_source}]")
+    
+    if data_source == "Stored quote":
+        # A persisted quote served while live fetches are refused is not live data
+        age = data.get('quote_age_seconds')
+        age_text = f" from {age / 3600:.1f} h ago" if isinstance(age, (int, float)) else ""
+        st.warning(f"⚠️ Showing a stored quote{age_text}, not live rates.")
+    if "api_error" in data:
+        st.warning(f"⚠️ Live API failed: {data['api_error']}")
+    
+    cols = st.columns(4)
+    rates = data.get('exchange_rates', {})
+    # Day-over-day deltas computed from the local snapshot history (if any)
+    changes = data.get('exchange_rate_changes') or {}
+    currencies = ["USD", "INR", "GBP", "EUR"]
+    for idx, curr in enumerate(currencies):
+        if curr in rates:
+            cols[idx].metric(f"To {curr}", f"{rates[curr]}", delta=changes.get(curr))
+    
+    st.markdown("---")
+
+def render_indices(data):
+    """
+    Renders the stock index metrics.
+    """
+    st.subheader("📈 Major Stock Indices")
+    indices = data.get('stock_indices', [])
+    
+    # If indices is a dict (mock tool returns dict sometimes), normalize it
+    if isinstance(indices, dict): 
+        # Handle structured dict if Agent reformats it
+        pass 
+    elif isinstance(indices, list) and indices:
+        s_cols = st.columns(len(indices) if len(indices) <= 3 else 3)
+        for i, idx in enumerate(indices):
+            col = s_cols[i % 3]
+            col.metric(
+                label=idx.get('name', 'Index'),
+                value=f"{idx.get('value', 0):,}",
+                delta=idx.get('change', None)
+            )
+    
+    st.markdown("---")
+
+def render_maps(data):
+    """
+    Renders the Stock Exchange HQ link.
+    """
+    st.subheader("📍 Stock Exchange HQ")
+    maps_link = data.get('maps_link', '#')
+    st.link_button("View on Google Maps 🗺️", maps_link)
+
+SECTION_RENDERERS = {"currency": render_currency, "stocks": render_indices, "maps": render_maps}
+
+def section_placeholders():
+    """
+    Reserves one slot per dashboard section so each can be filled as soon as its data arrives.
+    """
+    return {section: st.empty() for section in SECTION_RENDERERS}
+
+def render_section(placeholders, section, data):
+    with placeholders[section].container():
+        SECTION_RENDERERS[section](data)
+
+def render_results(data, placeholders=None):
+    """
+    Renders the currency, stock index and maps sections from the result dict.
+    """
+    if "error" in data:
+        # A run that gathered no data at all (e.g. stopped before any tool returned)
+        st.error(data["error"])
+        return
+    placeholders = placeholders or section_placeholders()
+    for section in SECTION_RENDERERS:
+        render_section(placeholders, section, data)
+
+def partial_result(partial):
+    """
+    Builds a dashboard dict from whatever tool payloads have arrived so far.
+    """
+    return lazy_import("pipeline").assemble_result(partial.get("currency", {}), partial.get("stocks", {}), partial.get("maps", "#"))
+
 # --- Main Logic ---
 
-if run_btn and target_country:
-    if not api_key:
-        st.error("Please configure your Groq API Key first.")
+def trace_snapshot():
+    """
+    The current run's trace id and spans, for redrawing the timeline later (None if tracing is off).
+    """
+    run_trace = current_trace()
+    if run_trace is None:
+        return None
+    return {"id": run_trace.id, "records": run_trace.records()}
+
+def render_trace_timeline(snapshot=None):
+    """
+    Shows the current run's spans (or a saved trace_snapshot()) as a timeline inside the Debug expander.
+    """
+    snapshot = snapshot or trace_snapshot()
+    if snapshot is None:
+        st.caption("Tracing is off. Enable it under 🛠️ Debugging to see a per-stage timeline.")
+        return
+    records = snapshot["records"]
+    if not records:
+        return
+    # Charting is only needed when tracing is on, so it is imported here
+    import altair as alt
+    import pandas as pd
+    frame = pd.DataFrame([
+        {
+            "span": r["name"],
+            "start_ms": r["start_ms"],
+            "end_ms": r["start_ms"] + r["duration_ms"],
+            "duration_ms": r["duration_ms"],
+            "attrs": json.dumps(r["attrs"], default=str)
+        }
+        for r in records
+    ])
+    st.text(f"Timeline (trace {snapshot['id']}):")
+    chart = alt.Chart(frame).mark_bar().encode(
+        x=alt.X("start_ms", title="ms since start"),
+        x2="end_ms",
+        y=alt.Y("span", sort=None, title=None),
+        tooltip=["span", "duration_ms", "attrs"]
+    )
+    st.altair_chart(chart, use_container_width=True)
+    st.dataframe(frame, hide_index=True, use_container_width=True)
+
+def render_token_report(report):
+    """
+    Shows the per-run token budget: usage per model turn and the size of the tool results the model saw.
+    """
+    budget = f" of a {report['budget']} budget" if "budget" in report else ""
+    st.text(
+        f"Tokens: {report['total_tokens']}{budget} "
+        f"({report['input_tokens']} in / {report['output_tokens']} out over {len(report['turns'])} turns)"
+    )
+    if report.get("over_budget"):
+        st.warning("This run exceeded the token budget (AGENT_TOKEN_BUDGET).")
+    if report.get("stopped"):
+        st.caption(f"Run budget: stopped early ({report['stopped']}).")
+    if report["turns"]:
+        st.dataframe(report["turns"], use_container_width=True)
+    st.caption(
+        f"Tool results sent to the model: {report['tool_result_chars']} chars "
+        f"(full payloads: {report['tool_result_chars_full']} chars)"
+    )
+
+# --- Session Results ---
+
+# Finished country lookups are kept in st.session_state, keyed by (mode,
+# resolved country), so any later rerun (a sidebar button, opening Debug)
+# redraws them from memory instead of losing them or re-running the agent.
+RESULTS_KEY = "results"
+ACTIVE_KEY = "active_result"
+REFRESH_KEY = "refresh_result"
+# Most recent lookups kept per session
+RESULT_HISTORY_SIZE = int(os.getenv("RESULT_HISTORY_SIZE", "20"))
+
+MODE_LABELS = {"direct": "⚡ Direct", "agent": "🤖 Agent", "structured": "🧾 Structured"}
+
+def result_key(mode, country):
+    countries = lazy_import("tools.countries")
+    record = countries.resolve(country)
+    return mode, record.key if record is not None else countries.normalize(country)
+
+def remember_result(mode, country, data, **details):
+    """
+    Stores a finished lookup in the session and makes it the one shown on reruns.
+    details: text, notes, warnings, summary, want_summary, tokens, debug (all optional).
+    """
+    key = result_key(mode, country)
+    results = st.session_state.setdefault(RESULTS_KEY, {})
+    results.pop(key, None)  # re-insert so the history stays most-recent-last
+    results[key] = {"mode": mode, "country": country, "data": data, "at": time.time(),
+                    "trace": trace_snapshot(), **details}
+    while len(results) > RESULT_HISTORY_SIZE:
+        del results[next(iter(results))]
+    st.session_state[ACTIVE_KEY] = key
+
+def active_result():
+    return (st.session_state.get(RESULTS_KEY) or {}).get(st.session_state.get(ACTIVE_KEY))
+
+def _show_result(key):
+    st.session_state[ACTIVE_KEY] = key
+
+def render_history():
+    """
+    Previous lookups of this session; clicking one re-displays it from memory.
+    """
+    results = st.session_state.get(RESULTS_KEY) or {}
+    if not results:
+        return
+    st.markdown("#### 🕘 History")
+    active = st.session_state.get(ACTIVE_KEY)
+    keys = list(reversed(results))
+    cols = st.columns(min(len(keys), 4))
+    for i, key in enumerate(keys):
+        record = results[key]
+        cols[i % len(cols)].button(
+            f"{record['country']} · {MODE_LABELS[record['mode']]}",
+            key=f"history-{key[0]}-{key[1]}",
+            on_click=_show_result, args=(key,),
+            disabled=key == active,
+            use_container_width=True
+        )
+
+@st.fragment
+def saved_result_view():
+    """
+    Redraws the active session result from memory. As a fragment, its own
+    widgets (refresh, history) rerun only this part of the page.
+    """
+    record = active_result()
+    if record is None:
+        return
+    age = time.time() - record["at"]
+    info, refresh = st.columns([4, 1])
+    info.caption(f"Showing the {MODE_LABELS[record['mode']]} result for {record['country']} from {age:.0f}s ago (kept in this session).")
+    if refresh.button("🔄 Refresh", use_container_width=True, help="Run this lookup again, bypassing the answer cache."):
+        st.session_state[REFRESH_KEY] = st.session_state[ACTIVE_KEY]
+        st.rerun()
+
+    for note in record.get("notes") or []:
+        st.caption(note)
+    for warning in record.get("warnings") or []:
+        st.warning(warning)
+    if record["data"] is not None:
+        render_results(record["data"])
+    elif record.get("text"):
+        st.markdown(record["text"])
+    if record["mode"] == "direct":
+        render_local_history(record["data"])
+    if record.get("summary"):
+        st.subheader("🧠 AI Summary")
+        st.markdown(record["summary"])
+
+    with st.expander("🛠️ Debug Information"):
+        if record["trace"]:
+            render_trace_timeline(record["trace"])
+        else:
+            st.caption("No trace was recorded for this run.")
+        if record.get("tokens"):
+            render_token_report(record["tokens"])
+        if record.get("debug") is not None:
+            st.json(record["debug"])
+        if record.get("text"):
+            st.text("Raw Agent Response:")
+            st.write(record["text"])
+
+    render_history()
+
+def run_batch_view(batch_text):
+    """
+    Batch mode: side-by-side comparison table for several countries.
+    """
+    batch = lazy_import("batch")
+    batch_countries = batch.parse_countries(batch_text)
+    if not batch_countries:
+        st.warning("Please enter at least one country.")
         st.stop()
 
-    agent_executor = initialize_agent()
-
-    # Define the prompt based on user specs
-    prompt_text = (
-        f"Give me full financial intelligence for {target_country}. "
-        "1. Official Currency Name & Code. "
-        "2. Exchange rates for 1 unit of this currency to USD, INR, GBP, EUR. "
-        "3. Major Stock Indices with current values. "
-        "4. Google Maps link for the Stock Exchange HQ. "
-        "Return the final answer as a structured JSON object with keys: "
-        "'currency', 'exchange_rates', 'stock_indices', 'maps_link'."
+    with st.status(f"📊 Fetching {len(batch_countries)} markets...", expanded=False) as status:
+        batch_result = batch.run_batch(batch_countries)
+        status.update(label="Comparison Ready!", state="complete", expanded=False)
+
+    st.subheader("📊 Market Comparison")
+    st.caption(f"{len(batch_countries)} countries, {batch_result['fx_fetches']} currency fetches")
+    with span("app.render.table"):
+        table = batch.to_dataframe(batch_result)
+    st.dataframe(
+        table,
+        hide_index=True,
+        use_container_width=True,
+        column_config={"Maps": st.column_config.LinkColumn("Maps", display_text="🗺️ HQ")}
+    )
+    st.download_button(
+        "Download JSON",
+        data=json.dumps(batch_result, indent=2),
+        file_name="market_comparison.json",
+        mime="application/json"
     )
 
-    # Define the system prompt
-    system_prompt = (
-        "You are an expert Financial Intelligence Agent. "
-        "Your goal is to provide accurate financial data for a given country. "
-        "You MUST use the provided tools to get exchange rates, stock indices, and location links. "
-        "Do not make up data. If a tool returns specific data, use it exactly. "
-        "Output the final answer as a structured summary, but you can also include the raw JSON in a code block if requested."
+    # Debug Section
+    with st.expander("🛠️ Debug Information"):
+        render_trace_timeline()
+        st.json(batch_result)
+
+def run_convert_view(ledger_file):
+    """
+    Bulk conversion: converts an uploaded ledger CSV in chunks and offers the result for download.
+    """
+    if ledger_file is None:
+        st.warning("Please upload a ledger CSV first.")
+        st.stop()
+
+    convert = lazy_import("tools.convert")
+    output = io.StringIO()
+    with st.status(f"🔁 Converting {ledger_file.name}...", expanded=False) as status:
+        try:
+            stats = convert.convert_csv(ledger_file, output)
+        except ValueError as e:
+            # Missing columns, or malformed/empty CSV (pandas parser errors are ValueErrors)
+            status.update(label="Conversion Failed", state="error", expanded=False)
+            st.error(f"Could not convert the file: {str(e)}")
+            st.stop()
+        status.update(label="Conversion Complete!", state="complete", expanded=False)
+
+    st.subheader("🔁 Bulk Conversion")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Rows", f"{stats['rows']:,}")
+    col2.metric("Unconverted", f"{stats['unconverted']:,}", help="Unknown currency code or non-numeric amount")
+    col3.metric("Rows / sec", f"{stats['rows_per_sec'] or 0:,}")
+    st.caption(f"Rates: {stats['rate_source']} · {stats['chunks']} chunk(s) in {stats['seconds']}s")
+    st.download_button(
+        "Download converted CSV",
+        data=output.getvalue(),
+        file_name=ledger_file.name.rsplit(".", 1)[0] + "_converted.csv",
+        mime="text/csv"
     )
 
-    with st.status("🤖 Analyzing Financial Data...", expanded=True) as status:
-        st.write("🔍 Identifying Jurisdiction...")
-        st.write("💱 Fetching Exchange Rates...")
-        st.write("📈 Aggregating Market Indices...")
-        
+    # Debug Section
+    with st.expander("🛠️ Debug Information"):
+        render_trace_timeline()
+        st.json(stats)
+
+def run_direct_view(country, want_summary):
+    """
+    Direct mode: tools run concurrently, no LLM unless a summary is requested.
+    """
+    pipeline = lazy_import("pipeline")
+    status = st.status("⚡ Fetching market data...", expanded=True)
+    placeholders = section_placeholders()
+    partial = {}
+
+    # Each section renders as soon as its tool returns
+    for section, payload in pipeline.stream_pipeline(country):
+        partial[section] = payload
+        status.write(f"✅ {section.capitalize()} data ready")
+        with span(f"app.render.{section}"):
+            render_section(placeholders, section, partial_result(partial))
+    status.update(label="Data Ready!", state="complete", expanded=False)
+
+    data = partial_result(partial)
+    for error in data.get("errors", []):
+        st.warning(error)
+
+    render_local_history(data)
+
+    summary = None
+    if want_summary:
+        if not api_key:
+            st.error("Please configure your Groq API Key to generate a summary.")
+        else:
+            st.subheader("🧠 AI Summary")
+            try:
+                with st.spinner("Writing summary..."):
+                    summary = pipeline.summarize(country, data)
+                st.markdown(summary)
+            except Exception as e:
+                st.error(f"Summary failed: {str(e)}")
+
+    remember_result("direct", country, data, warnings=data.get("errors", []), summary=summary,
+                    want_summary=want_summary, debug=data)
+
+    # Debug Section
+    with st.expander("🛠️ Debug Information"):
+        render_trace_timeline()
+        st.json(data)
+
+def render_local_history(data):
+    """
+    Locally computed trends from the snapshot history.
+    """
+    code = data["currency"]["code"]
+    if code != "N/A" and code != "USD":
+        with st.expander("📉 Local History (vs USD)"):
+            history = lazy_import("tools.currency").rate_history(code, "USD")
+            if len(history) >= 2:
+                st.line_chart(history[["close", "ma_7"]])
+                st.dataframe(history.tail(10), use_container_width=True)
+            else:
+                st.caption("Not enough local history yet. Snapshots accumulate with each live fetch.")
+
+def run_cached_answer(answer_cache, cache_key, mode, country):
+    """
+    Renders a cached agent answer. Returns False on a miss.
+    """
+    with span("app.answer_cache") as cache_span:
+        cached = answer_cache.get(cache_key)
+        cache_span.set(hit=cached is not None)
+    if cached is None:
+        return False
+
+    output_text, age = cached
+    note = f"⚡ Cached answer from {age:.0f}s ago (no LLM call). Tick 'Bypass answer cache' or use 🔄 Refresh to regenerate."
+    st.caption(note)
+    data = lazy_import("pipeline").extract_json_block(output_text)
+    render_results(data)
+    remember_result(mode, country, data, text=output_text, notes=[note])
+
+    with st.expander("🛠️ Debug Information"):
+        render_trace_timeline()
+        st.text("Raw Agent Response (cached):")
+        st.write(output_text)
+    return True
+
+def run_structured_view(country, bypass_cache=False):
+    """
+    Structured agent mode: two model turns, the answer arrives as a parsed FinancialReport.
+    """
+    agent = lazy_import("agent")
+    answer_cache = get_answer_cache()
+    cache_key = answer_key(agent.DEFAULT_MODEL, country, f"structured-{agent.PROMPT_VERSION}")
+    if answer_cache is not None and not bypass_cache and run_cached_answer(answer_cache, cache_key, "structured", country):
+        return
+
+    if not api_key:
+        st.error("Please configure your Groq API Key first.")
+        st.stop()
+
+    with st.status("🧾 Generating structured report...", expanded=False) as status:
         try:
-            # We ask the agent to return JSON in its final text
-            # LangGraph usage: invoke({"messages": [("system", system_prompt), ("user", prompt_text)]})
-            response = agent_executor.invoke({"messages": [("system", system_prompt), ("user", prompt_text)]})
-            # Response is a state dict, key 'messages' has the conversation history.
-            # The last message is the AI's final answer.
-            output_text = response["messages"][-1].content
-            status.update(label="Analysis Complete!", state="complete", expanded=False)
+            result = agent.run_structured_agent(country)
         except Exception as e:
+            status.update(label="Analysis Failed", state="error", expanded=False)
             st.error(f"Agent execution failed: {str(e)}")
             st.stop()
+        status.update(label="Analysis Complete!", state="complete", expanded=False)
+
+    data, stats = result["data"], result["stats"]
+    warnings = []
+    if stats.get("stopped"):
+        warnings.append(f"⏱️ Agent stopped early ({stats['stopped']}); showing a best-effort report from the tool results.")
+        st.warning(warnings[0])
+    note = (
+        f"{stats['turns']} model turns · {stats['output_tokens']} output tokens · "
+        f"{stats['tool_calls']} tool calls · {stats['parse_failures']} parse failures"
+    )
+    st.caption(note)
+    with span("app.render"):
+        render_results(data)
+    remember_result("structured", country, data, notes=[note], warnings=warnings, tokens=result["tokens"], debug=result)
+
+    # Stored fenced, like a free-form answer, so cache hits render the same way
+    if answer_cache is not None and not stats["parse_failures"] and not stats.get("stopped"):
+        answer_cache.set(cache_key, f"```json\n{json.dumps(data)}\n```", model=agent.DEFAULT_MODEL, country=country)
+
+    # Debug Section
+    with st.expander("🛠️ Debug Information"):
+        render_trace_timeline()
+        render_token_report(result["tokens"])
+        if agent.AGENT_ROUTING:
+            st.json(agent.get_router().status())
+        st.json(result)
+
+def run_agent_view(country, bypass_cache=False):
+    """
+    Agent mode: streams the ReAct agent run and renders its JSON answer.
+    Recent answers for the same model, country and prompt are served from the answer cache.
+    """
+    agent = lazy_import("agent")
+    answer_cache = get_answer_cache()
+    cache_key = answer_key(agent.DEFAULT_MODEL, country, agent.PROMPT_VERSION)
+    if answer_cache is not None and not bypass_cache and run_cached_answer(answer_cache, cache_key, "agent", country):
+        return
+
+    if not api_key:
+        st.error("Please configure your Groq API Key first.")
+        st.stop()
+
+    agent_executor = agent.get_agent()
+
+    status = st.status("🤖 Analyzing Financial Data...", expanded=True)
+    placeholders = section_placeholders()
+    answer_box = st.empty()
+    partial = {}
+    output_text = ""
+    final_messages = []
+
+    try:
+        # Stream the run: tool calls/results go to the status panel, each
+        # section renders as its tool returns, and answer tokens stream below.
+        # The system prompt is part of the compiled graph; only the user turn is sent
+        for event in agent.stream_agent(agent_executor, agent.agent_messages(country)):
+            if event["type"] == "tool_start":
+                args = ", ".join(f"{k}={v}" for k, v in (event["input"] or {}).items())
+                status.write(f"🔧 Calling `{event['name']}({args})`")
+            elif event["type"] == "tool_end":
+                status.write(f"✅ `{event['name']}` returned")
+                section = TOOL_SECTIONS.get(event["name"])
+                if section:
+                    output = event["output"]
+                    if section != "maps":
+                        try:
+                            output = json.loads(output)
+                        except (TypeError, json.JSONDecodeError):
+                            continue
+                    partial[section] = output
+                    with span(f"app.render.{section}"):
+                        render_section(placeholders, section, partial_result(partial))
+            elif event["type"] == "turn_start":
+                output_text = ""
+            elif event["type"] == "token":
+                output_text += event["text"]
+                answer_box.markdown(output_text + "▌")
+            elif event["type"] == "final":
+                output_text = event["text"]
+                final_messages = event["messages"]
+        status.update(label="Analysis Complete!", state="complete", expanded=False)
+    except Exception as e:
+        status.update(label="Analysis Failed", state="error", expanded=False)
+        st.error(f"Agent execution failed: {str(e)}")
+        st.stop()
 
     # --- Display Results ---
     
     # Try to parse JSON from output if the agent followed instructions well
     # The agent might wrap it in ```json ... ```
-    import re
-    json_match = re.search(r"```json\s*(\{.*?\})\s*```", output_text, re.DOTALL)
-    
-    if json_match:
-        data_str = json_match.group(1)
-        try:
-            data = json.loads(data_str)
-            
-            # 1. Currency Section
-            currency_data = data.get('currency', {})
-            if isinstance(currency_data, str):
-                currency_name = currency_data
-                currency_code = "N/A"
-            else:
-                currency_name = currency_data.get('name', 'N/A')
-                currency_code = currency_data.get('code', 'N/A')
-            
-            data_source = data.get('source', 'Mock Data')
-            source_color = "green" if data_source == "Live API" else "orange"
-            
-            st.subheader(f"💱 Currency: {currency_name} ({currency_code})")
-            st.markdown(f":{source_color}[Source: {data_source}]")
-            
-            if "api_error" in data:
-                st.warning(f"⚠️ Live API failed: {data['api_error']}")
-            
-            cols = st.columns(4)
-            rates = data.get('exchange_rates', {})
-            currencies = ["USD", "INR", "GBP", "EUR"]
-            for idx, curr in enumerate(currencies):
-                if curr in rates:
-                    cols[idx].metric(f"To {curr}", f"{rates[curr]}")
-            
-            st.markdown("---")
-            
-            # 2. Stocks Section
-            st.subheader("📈 Major Stock Indices")
-            indices = data.get('stock_indices', [])
-            
-            # If indices is a dict (mock tool returns dict sometimes), normalize it
-            if isinstance(indices, dict): 
-                # Handle structured dict if Agent reformats it
-                pass 
-            elif isinstance(indices, list):
-                s_cols = st.columns(len(indices) if len(indices) <= 3 else 3)
-                for i, idx in enumerate(indices):
-                    col = s_cols[i % 3]
-                    col.metric(
-                        label=idx.get('name', 'Index'),
-                        value=f"{idx.get('value', 0):,}",
-                        delta=idx.get('change', None)
-                    )
-            
-            st.markdown("---")
-
-            # 3. Maps Section
-            st.subheader("📍 Stock Exchange HQ")
-            maps_link = data.get('maps_link', '#')
-            st.link_button("View on Google Maps 🗺️", maps_link)
-
-        except json.JSONDecodeError:
-            st.warning("Could not parse structured JSON. Showing raw agent output below.")
-            st.markdown(output_text)
-    else:
-        # Fallback if no JSON block found
-        st.markdown(output_text)
+    stopped = agent.stopped_early(final_messages)
+    warnings = []
+    if stopped:
+        warnings.append(f"⏱️ Agent stopped early ({stopped}); showing a best-effort answer from the tool results gathered so far.")
+        st.warning(warnings[0])
+    tokens = agent.token_report(final_messages) if final_messages else None
+    try:
+        with span("app.parse", chars=len(output_text)) as parse_span:
+            data = lazy_import("pipeline").extract_json_block(output_text)
+            parse_span.set(found=data is not None)
+        if data is not None:
+            answer_box.empty()
+            with span("app.render"):
+                render_results(data, placeholders)
+            # Only complete, well-formed answers are cached; a bypassed run refreshes the entry
+            if answer_cache is not None and not stopped:
+                answer_cache.set(cache_key, output_text, model=agent.DEFAULT_MODEL, country=country)
+        else:
+            # Fallback if no JSON block found
+            answer_box.markdown(output_text)
+    except json.JSONDecodeError:
+        data = None
+        warnings.append("Could not parse structured JSON. Showing raw agent output below.")
+        st.warning(warnings[-1])
+        answer_box.markdown(output_text)
+    remember_result("agent", country, data, text=output_text, warnings=warnings, tokens=tokens)
 
     # Debug Section
     with st.expander("🛠️ Debug Information"):
+        render_trace_timeline()
+        if tokens:
+            render_token_report(tokens)
+        if agent.AGENT_ROUTING:
+            st.json(agent.get_router().status())
         st.text("Raw Agent Response:")
         st.write(output_text)
 
+def run_country_view(mode, country, want_summary=False, bypass_cache=False):
+    if mode == "direct":
+        run_direct_view(country, want_summary)
+    elif mode == "structured":
+        run_structured_view(country, bypass_cache)
+    else:
+        run_agent_view(country, bypass_cache)
+
+# A 🔄 Refresh click on a saved result re-runs that lookup, bypassing the answer cache
+refresh_key = st.session_state.pop(REFRESH_KEY, None)
+refresh_record = (st.session_state.get(RESULTS_KEY) or {}).get(refresh_key)
+
+if run_btn and (batch_mode or convert_mode or target_country):
+    with trace("dashboard", enabled=trace_enabled, mode=run_mode, country=target_country):
+        if batch_mode:
+            run_batch_view(batch_text)
+        elif convert_mode:
+            run_convert_view(ledger_file)
+        else:
+            mode = "direct" if direct_mode else "structured" if structured_mode else "agent"
+            run_country_view(mode, target_country, want_summary, bypass_cache)
+            render_history()
+
 elif run_btn and not target_country:
     st.warning("Please enter a country name.")
+
+elif refresh_record is not None:
+    with trace("dashboard", enabled=trace_enabled, mode=refresh_record["mode"], country=refresh_record["country"]):
+        run_country_view(
+            refresh_record["mode"], refresh_record["country"],
+            refresh_record.get("want_summary", False), bypass_cache=True
+        )
+        render_history()
+
+elif active_result() is not None:
+    # Any other rerun (sidebar buttons, toggles) redraws the last result from memory
+    saved_result_view()
+
+# The shell is rendered by now: pre-import the agent and data stacks in the
+# background so the first click does not pay for them (FINANCE_WARMUP=0 disables),
+# and start the FX/index prefetcher if FX_PREFETCH=1
+start_warmup()
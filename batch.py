@@ -0,0 +1,104 @@
+import contextvars
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+try:
+    from tools.currency import get_exchange_rates, resolve_currency, TARGET_CURRENCIES
+    from tools.stocks import get_stock_data
+    from tools.maps import get_maps_link
+    from pipeline import assemble_result
+except ImportError:
+    from finance_agent.tools.currency import get_exchange_rates, resolve_currency, TARGET_CURRENCIES
+    from finance_agent.tools.stocks import get_stock_data
+    from finance_agent.tools.maps import get_maps_link
+    from finance_agent.pipeline import assemble_result
+
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "8"))
+
+
+def parse_countries(text: str):
+    """
+    Splits a comma/newline separated list into unique country names, keeping order.
+    """
+    seen = set()
+    countries = []
+    for part in text.replace("\n", ",").split(","):
+        name = part.strip()
+        if name and name.lower() not in seen:
+            seen.add(name.lower())
+            countries.append(name)
+    return countries
+
+
+def run_batch(countries, max_workers: int = BATCH_MAX_WORKERS):
+    """
+    Fetches currency, stock and maps data for several countries concurrently.
+
+    Countries sharing a base currency (e.g. the Eurozone) share one currency
+    fetch. Returns a JSON-serializable dict:
+    {"countries": [...], "results": {country: dashboard dict}, "fx_fetches": n}
+    """
+    countries = list(countries)
+
+    # Group countries by base currency so each currency is fetched once.
+    # Unknown countries get their own fetch so they still report an error.
+    fx_groups = {}
+    for country in countries:
+        _, code = resolve_currency(country)
+        fx_groups.setdefault(code or f"?{country.lower()}", []).append(country)
+
+    workers = max(1, min(max_workers, len(fx_groups) + 2 * len(countries)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as pool:
+        # Each task runs in a copy of the caller's context (keeps tracing spans attached)
+        submit = lambda fn, arg: pool.submit(contextvars.copy_context().run, fn, arg)
+        fx_futures = {
+            group_key: submit(get_exchange_rates, members[0])
+            for group_key, members in fx_groups.items()
+        }
+        stock_futures = {c: submit(get_stock_data, c) for c in countries}
+        maps_futures = {c: submit(get_maps_link, c) for c in countries}
+
+        fx_by_country = {}
+        for group_key, members in fx_groups.items():
+            fx = json.loads(fx_futures[group_key].result())
+            for country in members:
+                fx_by_country[country] = fx
+
+        results = {
+            c: assemble_result(
+                fx_by_country[c],
+                json.loads(stock_futures[c].result()),
+                maps_futures[c].result()
+            )
+            for c in countries
+        }
+
+    return {"countries": countries, "results": results, "fx_fetches": len(fx_groups)}
+
+
+def to_dataframe(batch_result: dict):
+    """
+    Flattens a run_batch() result into a one-row-per-country comparison table.
+    """
+    rows = []
+    for country in batch_result["countries"]:
+        data = batch_result["results"][country]
+        rates = data.get("exchange_rates", {})
+        row = {
+            "Country": country,
+            "Currency": data["currency"]["code"],
+            "Source": data.get("source")
+        }
+        for code in TARGET_CURRENCIES:
+            row[f"To {code}"] = rates.get(code)
+        row["Exchange"] = data.get("exchange", "N/A")
+        row["Indices"] = ", ".join(
+            f"{idx['name']} {idx['value']:,} ({idx.get('change', 'n/a')})"
+            for idx in data.get("stock_indices", [])
+        )
+        row["Maps"] = data.get("maps_link")
+        rows.append(row)
+    return pd.DataFrame(rows)
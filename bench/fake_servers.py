@@ -0,0 +1,317 @@
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-ins for the Groq chat-completions API and ExchangeRate-API (v6),
+# with configurable injected latency, so benchmarks run offline and free.
+# Point the app at them with GROQ_BASE_URL / EXCHANGERATE_API_URL.
+
+# Mock anchor quote served by the fake FX provider (units per 1 USD)
+FAKE_USD_RATES = {
+    "USD": 1.0, "INR": 83.2, "GBP": 0.79, "EUR": 0.92, "JPY": 149.3,
+    "KRW": 1332.5, "CNY": 7.14, "CHF": 0.88, "CAD": 1.36, "AUD": 1.52
+}
+
+_COUNTRY_RE = re.compile(r"for ([A-Za-z .']+?)\.")
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class FakeServer:
+    """
+    Base class: runs a ThreadingHTTPServer on 127.0.0.1 in a daemon thread.
+    `latency` (seconds) is slept before every response; `requests` counts calls.
+    """
+
+    def __init__(self, latency: float = 0.0, port: int = 0):
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = _QuietServer(("127.0.0.1", port), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self):
+        with self._lock:
+            self.requests += 1
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, status, payload, headers=None):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                fake._count()
+                time.sleep(fake.latency)
+                fake.handle_get(self)
+
+            def do_POST(self):
+                fake._count()
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                time.sleep(fake.latency)
+                fake.handle_post(self, body)
+
+        return Handler
+
+    def handle_get(self, handler):
+        handler.send_json(404, {"error": "not found"})
+
+    def handle_post(self, handler, body):
+        handler.send_json(404, {"error": "not found"})
+
+
+class FakeExchangeRateAPI(FakeServer):
+    """
+    Serves GET /v6/{key}/latest/{base} like ExchangeRate-API.
+    Set `fail_status` to make calls fail with that HTTP status: every call, or
+    only the next `fail_times` calls. `retry_after` is sent as the Retry-After
+    header of failed calls.
+    """
+
+    def __init__(self, latency: float = 0.0, rates: dict = None, fail_status: int = None, port: int = 0,
+                 fail_times: int = None, retry_after: str = None):
+        super().__init__(latency, port)
+        self.rates = dict(rates or FAKE_USD_RATES)
+        self.fail_status = fail_status
+        self.fail_times = fail_times
+        self.retry_after = retry_after
+
+    @property
+    def api_url(self):
+        return f"{self.url}/v6"
+
+    def _should_fail(self):
+        with self._lock:
+            if not self.fail_status or self.fail_times == 0:
+                return False
+            if self.fail_times is not None:
+                self.fail_times -= 1
+            return True
+
+    def handle_get(self, handler):
+        if self._should_fail():
+            headers = {"Retry-After": self.retry_after} if self.retry_after is not None else None
+            handler.send_json(self.fail_status, {"result": "error", "error-type": "unavailable"}, headers=headers)
+            return
+        parts = handler.path.strip("/").split("/")
+        if len(parts) != 4 or parts[2] != "latest":
+            handler.send_json(404, {"result": "error", "error-type": "unsupported-code"})
+            return
+        base = parts[3].upper()
+        if base not in self.rates:
+            handler.send_json(404, {"result": "error", "error-type": "unsupported-code"})
+            return
+        per_base = {code: rate / self.rates[base] for code, rate in self.rates.items()}
+        now = int(time.time())
+        handler.send_json(200, {
+            "result": "success",
+            "base_code": base,
+            "time_last_update_unix": now,
+            "time_next_update_unix": now + 86400,
+            "conversion_rates": per_base
+        })
+
+
+class FakeGroq(FakeServer):
+    """
+    Minimal OpenAI-compatible chat-completions endpoint at
+    POST /openai/v1/chat/completions, as used by the groq client.
+
+    Behaviour is scripted from the request: if tools are offered and no tool
+    results are present yet, it calls every offered tool once (in parallel)
+    for the country named in the user prompt; otherwise it answers with a
+    ```json block assembled from the tool results. Requests with a
+    `response_format` or a forced tool choice get that shape instead.
+    Supports `stream=True` (SSE). `token_delay` is slept per streamed chunk.
+    `fail_status` makes every call fail (e.g. 429 to exercise failover);
+    `model_fail_status` / `model_latency` ({model: value}) do the same, or add
+    extra latency, for individual models only.
+    """
+
+    def __init__(self, latency: float = 0.0, token_delay: float = 0.0, fail_status: int = None, port: int = 0,
+                 model_fail_status: dict = None, model_latency: dict = None):
+        super().__init__(latency, port)
+        self.token_delay = token_delay
+        self.fail_status = fail_status
+        self.model_fail_status = dict(model_fail_status or {})
+        self.model_latency = dict(model_latency or {})
+        self.models = []  # model name of every request, in order
+
+    def handle_post(self, handler, body):
+        if not handler.path.endswith("/chat/completions"):
+            handler.send_json(404, {"error": {"message": "not found"}})
+            return
+        model = body.get("model")
+        with self._lock:
+            self.models.append(model)
+        time.sleep(self.model_latency.get(model, 0.0))
+        fail_status = self.model_fail_status.get(model) or self.fail_status
+        if fail_status:
+            handler.send_json(
+                fail_status,
+                {"error": {"message": "injected failure", "type": "fake_error"}},
+                headers={"Retry-After": "0"}
+            )
+            return
+
+        message = self.reply(body)
+        prompt_tokens = sum(len(str(m.get("content") or "")) for m in body.get("messages", [])) // 4
+        completion_tokens = len(json.dumps(message)) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+        finish_reason = "tool_calls" if message.get("tool_calls") else "stop"
+
+        if body.get("stream"):
+            self._stream(handler, body, message, usage, finish_reason)
+            return
+        handler.send_json(200, {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": usage
+        })
+
+    def _stream(self, handler, body, message, usage, finish_reason):
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        base = {"id": "chatcmpl-fake", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": body.get("model")}
+
+        def send(delta, finish=None, extra=None):
+            chunk = dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": finish}])
+            chunk.update(extra or {})
+            handler.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            handler.wfile.flush()
+
+        if message.get("tool_calls"):
+            calls = [dict(call, index=i) for i, call in enumerate(message["tool_calls"])]
+            send({"role": "assistant", "tool_calls": calls})
+        else:
+            for piece in re.findall(r".{1,16}", message["content"], re.DOTALL):
+                send({"content": piece})
+                if self.token_delay:
+                    time.sleep(self.token_delay)
+        send({}, finish_reason, {"x_groq": {"usage": usage}})
+        handler.wfile.write(b"data: [DONE]\n\n")
+        handler.wfile.flush()
+        handler.close_connection = True
+
+    # --- Scripted behaviour ---
+
+    @staticmethod
+    def _country(messages):
+        users = [m for m in messages if m.get("role") == "user"]
+        text = str(users[-1].get("content", "")) if users else ""
+        match = _COUNTRY_RE.search(text)
+        return match.group(1).strip() if match else "India"
+
+    @staticmethod
+    def _tool_results(messages):
+        # tool_call_id -> tool name, from the assistant turn that issued the calls
+        names = {}
+        for m in messages:
+            for call in m.get("tool_calls") or []:
+                names[call["id"]] = call["function"]["name"]
+        results = {}
+        for m in messages:
+            if m.get("role") == "tool":
+                content = m.get("content")
+                try:
+                    content = json.loads(content)
+                except (TypeError, ValueError):
+                    pass
+                results[names.get(m.get("tool_call_id"), m.get("name"))] = content
+        return results
+
+    def _answer(self, messages):
+        results = self._tool_results(messages)
+        fx = results.get("currency_tool") or {}
+        stocks = results.get("stock_tool") or {}
+        maps = results.get("maps_tool") or "https://www.google.com/maps"
+        fx = fx if isinstance(fx, dict) else {}
+        stocks = stocks if isinstance(stocks, dict) else {}
+        code = fx.get("currency") or fx.get("c") or "N/A"
+        return {
+            "currency": {"name": code, "code": code},
+            "exchange_rates": fx.get("rates") or fx.get("r") or {},
+            "stock_indices": stocks.get("indices") or stocks.get("i") or [],
+            "maps_link": maps,
+            "source": fx.get("source") or fx.get("s") or "Mock Data"
+        }
+
+    def reply(self, body):
+        messages = body.get("messages", [])
+        tools = body.get("tools") or []
+        tool_choice = body.get("tool_choice")
+        has_results = any(m.get("role") == "tool" for m in messages)
+
+        # Forced single tool (e.g. with_structured_output via function calling)
+        if isinstance(tool_choice, dict):
+            name = tool_choice["function"]["name"]
+            args = self._answer(messages)
+            return {"role": "assistant", "content": None, "tool_calls": [
+                {"id": "call_struct", "type": "function",
+                 "function": {"name": name, "arguments": json.dumps(args)}}
+            ]}
+
+        if body.get("response_format", {}).get("type") in ("json_object", "json_schema"):
+            return {"role": "assistant", "content": json.dumps(self._answer(messages))}
+
+        if tools and not has_results:
+            country = self._country(messages)
+            return {"role": "assistant", "content": None, "tool_calls": [
+                {"id": f"call_{i}", "type": "function",
+                 "function": {"name": t["function"]["name"], "arguments": json.dumps({"country": country})}}
+                for i, t in enumerate(tools)
+            ]}
+
+        if not tools and not has_results:
+            return {"role": "assistant", "content": "A concise narrative summary of the provided financial data."}
+
+        return {
+            "role": "assistant",
+            "content": "Here is the financial intelligence.\n```json\n" + json.dumps(self._answer(messages)) + "\n```"
+        }
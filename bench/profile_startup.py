@@ -0,0 +1,116 @@
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+# Import-time breakdown of the app's cold start, via `python -X importtime`.
+# "shell" is what a page load pays (app.py run in Streamlit bare mode, button not
+# pressed); "deferred" is the stack imported on the first run or by the warm-up.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    "shell": [os.path.join(ROOT, "app.py")],
+    "deferred": ["-c", "import agent, pipeline, batch"],
+}
+
+_LINE_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parse_importtime(stderr: str):
+    """
+    Returns [(module, self_us, cumulative_us, depth)] from -X importtime output.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def _run(args):
+    env = dict(os.environ, FINANCE_WARMUP="0", PYTHONPATH=ROOT)
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime"] + args,
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"Startup run failed:\n{proc.stderr[-2000:]}")
+    return wall, parse_importtime(proc.stderr)
+
+
+def profile(args, runs: int = 3, top: int = 15):
+    """
+    Runs the target `runs` times; reports median wall time and the import breakdown of the last run.
+    """
+    walls = []
+    for _ in range(runs):
+        wall, rows = _run(args)
+        walls.append(wall)
+
+    # Top-level imports only, so nested modules are not double counted
+    by_package = {}
+    for module, _self_us, cumulative_us, depth in rows:
+        if depth == 0:
+            package = module.split(".")[0]
+            by_package[package] = by_package.get(package, 0) + cumulative_us
+    slowest = sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+
+    return {
+        "wall_ms": round(statistics.median(walls) * 1000, 1),
+        "import_ms": round(sum(by_package.values()) / 1000, 1),
+        "modules": len(rows),
+        "by_package_ms": {
+            package: round(us / 1000, 1)
+            for package, us in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+        },
+        "slowest_self_ms": {module: round(self_us / 1000, 1) for module, self_us, _c, _d in slowest}
+    }
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nComparison vs {baseline_path}:")
+    for target, stats in current.items():
+        old = baseline.get(target)
+        if not old:
+            continue
+        for key in ("wall_ms", "import_ms"):
+            delta = (stats[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+            print(f"  {target:10s} {key:10s} {old[key]:9.1f} -> {stats[key]:9.1f} ms ({delta:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time profile of the app's cold start.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", default=os.path.join(ROOT, "startup_profile.json"))
+    parser.add_argument("--compare", help="Previous profile file to diff against")
+    args = parser.parse_args(argv)
+
+    results = {target: profile(target_args, args.runs, args.top) for target, target_args in TARGETS.items()}
+
+    for target, stats in results.items():
+        print(f"{target}: {stats['wall_ms']} ms wall, {stats['import_ms']} ms in imports ({stats['modules']} modules)")
+        for package, ms in stats["by_package_ms"].items():
+            print(f"  {package:32s} {ms:9.1f} ms")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Profile written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    return results
+
+
+if __name__ == "__main__":
+    main()
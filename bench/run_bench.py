@@ -0,0 +1,288 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Allow `python bench/run_bench.py` as well as `python -m bench.run_bench`
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bench.fake_servers import FakeExchangeRateAPI, FakeGroq
+
+COUNTRIES = ["India", "Japan", "USA", "UK", "Germany", "France", "China", "South Korea"]
+
+
+class StageTimer:
+    """
+    Collects wall-clock samples (seconds) per named stage.
+    """
+
+    def __init__(self):
+        self.samples = {}
+
+    def measure(self, stage, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.samples.setdefault(stage, []).append(time.perf_counter() - start)
+        return result
+
+    def summary(self):
+        report = {}
+        for stage, samples in self.samples.items():
+            ms = np.asarray(samples) * 1000
+            report[stage] = {
+                "count": int(ms.size),
+                "mean_ms": round(float(ms.mean()), 3),
+                "p50_ms": round(float(np.percentile(ms, 50)), 3),
+                "p95_ms": round(float(np.percentile(ms, 95)), 3),
+                "p99_ms": round(float(np.percentile(ms, 99)), 3),
+                "max_ms": round(float(ms.max()), 3)
+            }
+        return report
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _run_stats(report, parse_failures):
+    # Turns and token usage of one agent run, from agent.token_report()
+    return {
+        "turns": len(report["turns"]),
+        "input_tokens": report["input_tokens"],
+        "output_tokens": report["output_tokens"],
+        "parse_failures": parse_failures
+    }
+
+
+def _path_summary(runs):
+    return {
+        "runs": len(runs),
+        "mean_turns": round(float(np.mean([r["turns"] for r in runs])), 3),
+        "mean_input_tokens": round(float(np.mean([r["input_tokens"] for r in runs])), 3),
+        "mean_output_tokens": round(float(np.mean([r["output_tokens"] for r in runs])), 3),
+        "parse_failures": int(sum(r["parse_failures"] for r in runs))
+    }
+
+
+def _configure_env(groq, fx, store_dir):
+    # Must run before the app modules are imported: they read these at import time
+    os.environ["GROQ_API_KEY"] = "bench-key"
+    os.environ["GROQ_BASE_URL"] = groq.url
+    os.environ["EXCHANGERATE_API_KEY"] = "bench-key"
+    os.environ["EXCHANGERATE_API_URL"] = fx.api_url
+    os.environ["FINANCE_STORE_PATH"] = os.path.join(store_dir, "snapshots.sqlite3")
+    # Cold FX stages fetch on purpose; the quota guard would turn them into fallbacks
+    os.environ["FX_MONTHLY_QUOTA"] = "0"
+
+
+def bench_stages(timer, iterations):
+    import agent
+    import pipeline
+    from tools import currency
+    from tools.stocks import get_stock_data
+    from tools.maps import get_maps_link
+
+    freeform_runs, structured_runs = [], []
+    for i in range(iterations):
+        country = COUNTRIES[i % len(COUNTRIES)]
+
+        # Graph construction (fresh graph each time, shared client)
+        graph = timer.measure("initialize_agent", agent.initialize_agent)
+
+        # Tools: cold (cache cleared, hits the fake FX server) and warm
+        currency._rates_cache.clear()
+        timer.measure("currency_tool_cold", currency.get_exchange_rates, country)
+        timer.measure("currency_tool_warm", currency.get_exchange_rates, country)
+        timer.measure("stock_tool", get_stock_data, country)
+        timer.measure("maps_tool", get_maps_link, country)
+
+        # Direct pipeline (warm FX cache)
+        timer.measure("direct_pipeline", pipeline.run_pipeline, country)
+
+        # Full agent run against the fake Groq endpoint
+        response = timer.measure("agent_run", agent.run_agent, graph, agent.agent_messages(country))
+        output_text = response["messages"][-1].content
+
+        # App-side JSON extraction and result assembly
+        try:
+            data = timer.measure("parse_json", pipeline.extract_json_block, output_text)
+        except ValueError:
+            data = None
+        freeform_runs.append(_run_stats(agent.token_report(response["messages"]), int(data is None)))
+
+        # Structured two-turn agent (answer arrives parsed)
+        structured = timer.measure("structured_agent_run", agent.run_structured_agent, country)
+        structured_runs.append(_run_stats(structured["tokens"], structured["stats"]["parse_failures"]))
+
+    return {"freeform": _path_summary(freeform_runs), "structured": _path_summary(structured_runs)}
+
+
+def bench_render(timer, iterations):
+    from streamlit.testing.v1 import AppTest
+
+    for i in range(iterations):
+        at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+        timer.measure("app_shell_render", at.run)
+        at.sidebar.text_input[0].set_value(COUNTRIES[i % len(COUNTRIES)])
+        [b for b in at.sidebar.button if b.label == "Generate Intelligence"][0].click()
+        timer.measure("app_direct_render", at.run)
+        if at.exception:
+            raise RuntimeError(f"App raised: {at.exception[0].message}")
+
+
+def bench_throughput(timer, sessions, runs_per_session):
+    import agent
+
+    graph = agent.get_agent()
+
+    def session(worker):
+        for i in range(runs_per_session):
+            country = COUNTRIES[(worker + i) % len(COUNTRIES)]
+            timer.measure("concurrent_agent_run", agent.run_agent, graph, agent.agent_messages(country))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        list(pool.map(session, range(sessions)))
+    wall = time.perf_counter() - start
+    runs = sessions * runs_per_session
+    return {
+        "sessions": sessions,
+        "runs": runs,
+        "wall_s": round(wall, 3),
+        "requests_per_sec": round(runs / wall, 3)
+    }
+
+
+def bench_convert(timer, rows):
+    from tools.convert import conversion_matrix, convert_arrays, convert_csv
+
+    matrix, _source = conversion_matrix()
+    rng = np.random.default_rng(0)
+    codes = np.array(matrix.currencies)
+    amounts = rng.random(rows) * 1000
+    from_ccy = codes[rng.integers(0, len(codes), rows)]
+    to_ccy = codes[rng.integers(0, len(codes), rows)]
+
+    timer.measure("convert_arrays", convert_arrays, amounts, from_ccy, to_ccy, matrix)
+    arrays_s = timer.samples["convert_arrays"][-1]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source, destination = os.path.join(tmp, "ledger.csv"), os.path.join(tmp, "converted.csv")
+        with open(source, "w") as f:
+            f.write("amount,from_ccy,to_ccy\n")
+            f.writelines(f"{a:.2f},{fc},{tc}\n" for a, fc, tc in zip(amounts, from_ccy, to_ccy))
+        stats = timer.measure("convert_csv", convert_csv, source, destination, matrix=matrix)
+
+    return {
+        "rows": rows,
+        "arrays_rows_per_sec": round(rows / arrays_s),
+        "csv_rows_per_sec": stats["rows_per_sec"],
+        "csv_chunks": stats["chunks"]
+    }
+
+
+def compare(current, baseline_path):
+    """
+    Prints p50/p95 deltas against a previous results file.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nComparison vs {baseline_path} ({baseline['meta'].get('commit')}):")
+    for stage, stats in current["stages"].items():
+        old = baseline["stages"].get(stage)
+        if not old:
+            continue
+        for key in ("p50_ms", "p95_ms"):
+            delta = (stats[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+            print(f"  {stage:24s} {key}: {old[key]:9.2f} -> {stats[key]:9.2f} ms ({delta:+.1f}%)")
+    if "throughput" in baseline and "throughput" in current:
+        old, new = baseline["throughput"]["requests_per_sec"], current["throughput"]["requests_per_sec"]
+        print(f"  {'throughput':24s} rps: {old:9.2f} -> {new:9.2f}")
+    if baseline.get("conversion") and current.get("conversion"):
+        for key in ("arrays_rows_per_sec", "csv_rows_per_sec"):
+            old, new = baseline["conversion"][key], current["conversion"][key]
+            print(f"  {'conversion ' + key.split('_')[0]:24s} rows/s: {old:11,} -> {new:11,}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark for the dashboard pipeline.")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--sessions", type=int, default=4, help="Concurrent sessions for the throughput stage")
+    parser.add_argument("--runs-per-session", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Injected fake Groq latency per call (s)")
+    parser.add_argument("--fx-latency", type=float, default=0.02, help="Injected fake FX API latency per call (s)")
+    parser.add_argument("--convert-rows", type=int, default=1_000_000, help="Ledger rows for the bulk conversion stage (0 skips)")
+    parser.add_argument("--render", action="store_true", help="Also time app.py rendering via Streamlit AppTest")
+    parser.add_argument("--output", default=os.path.join(ROOT, "bench_output.json"))
+    parser.add_argument("--compare", help="Previous results file to diff against")
+    args = parser.parse_args(argv)
+
+    timer = StageTimer()
+    with FakeGroq(latency=args.llm_latency) as groq, FakeExchangeRateAPI(latency=args.fx_latency) as fx, \
+            tempfile.TemporaryDirectory() as store_dir:
+        _configure_env(groq, fx, store_dir)
+
+        agent_paths = bench_stages(timer, args.iterations)
+        if args.render:
+            bench_render(timer, max(1, args.iterations // 4))
+        throughput = bench_throughput(timer, args.sessions, args.runs_per_session)
+        conversion = bench_convert(timer, args.convert_rows) if args.convert_rows else None
+        upstream = {
+            "groq_requests": groq.requests,
+            "fx_requests": fx.requests,
+            "groq_requests_by_model": dict(Counter(groq.models))
+        }
+
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "config": vars(args)
+        },
+        "stages": timer.summary(),
+        "throughput": throughput,
+        "agent_paths": agent_paths,
+        "conversion": conversion,
+        "upstream": upstream
+    }
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{'stage':24s} {'n':>4s} {'p50':>9s} {'p95':>9s} {'p99':>9s}  (ms)")
+    for stage, stats in results["stages"].items():
+        print(f"{stage:24s} {stats['count']:4d} {stats['p50_ms']:9.2f} {stats['p95_ms']:9.2f} {stats['p99_ms']:9.2f}")
+    for path, stats in agent_paths.items():
+        print(f"{path + ' agent':24s} turns {stats['mean_turns']:.1f}, input tokens {stats['mean_input_tokens']:.0f}, output tokens {stats['mean_output_tokens']:.0f}, "
+              f"parse failures {stats['parse_failures']}/{stats['runs']}")
+    print(f"throughput: {throughput['requests_per_sec']} runs/s "
+          f"({throughput['runs']} runs, {throughput['sessions']} sessions)")
+    print("model calls: " + ", ".join(f"{model} {count}" for model, count in upstream["groq_requests_by_model"].items()))
+    if conversion:
+        print(f"bulk conversion: {conversion['arrays_rows_per_sec']:,} rows/s in memory, "
+              f"{conversion['csv_rows_per_sec']:,} rows/s CSV to CSV ({conversion['rows']:,} rows)")
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    return results
+
+
+if __name__ == "__main__":
+    main()
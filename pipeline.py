@@ -0,0 +1,133 @@
+import asyncio
+import contextvars
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Import our local tools (same layout handling as agent.py)
+try:
+    from tools.currency import get_exchange_rates, aget_exchange_rates, CURRENCY_NAMES
+    from tools.stocks import get_stock_data, aget_stock_data
+    from tools.maps import get_maps_link, aget_maps_link
+except ImportError:
+    from finance_agent.tools.currency import get_exchange_rates, aget_exchange_rates, CURRENCY_NAMES
+    from finance_agent.tools.stocks import get_stock_data, aget_stock_data
+    from finance_agent.tools.maps import get_maps_link, aget_maps_link
+
+# Shared pool for the direct pipeline. The tools are I/O bound (or pure
+# lookups), so a handful of threads covers several concurrent sessions.
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="pipeline")
+
+
+def _submit(fn, *args):
+    # Run in a copy of the caller's context so tracing spans attach to the active trace
+    return _executor.submit(contextvars.copy_context().run, fn, *args)
+
+# The agent is asked to wrap its final JSON in a ```json ... ``` fence
+JSON_BLOCK_RE = re.compile(r"```json\s*(\{.*?\})\s*```", re.DOTALL)
+
+SUMMARY_PROMPT = (
+    "You are an expert Financial Intelligence Agent. "
+    "Write a short narrative summary (3-5 sentences) of the financial data provided. "
+    "Use the numbers exactly as given and do not invent any data."
+)
+
+
+def assemble_result(fx: dict, stocks: dict, maps_link: str):
+    """
+    Builds the dashboard dict (currency, exchange_rates, stock_indices, maps_link)
+    from the raw tool payloads, matching the JSON shape the agent is asked for.
+    """
+    code = fx.get("currency")
+    data = {
+        "currency": {"name": CURRENCY_NAMES.get(code, code or "N/A"), "code": code or "N/A"},
+        "exchange_rates": fx.get("rates", {}),
+        "exchange_rate_changes": fx.get("changes", {}),
+        "stock_indices": stocks.get("indices", []),
+        "maps_link": maps_link,
+        "source": fx.get("source", "Mock Data")
+    }
+    if "exchange" in stocks:
+        data["exchange"] = stocks["exchange"]
+    if "api_error" in fx:
+        data["api_error"] = fx["api_error"]
+    if fx.get("cache") == "stored":
+        data["quote_age_seconds"] = fx.get("age_seconds")
+
+    errors = [payload["error"] for payload in (fx, stocks) if "error" in payload]
+    if errors:
+        data["errors"] = errors
+    return data
+
+
+def extract_json_block(text: str):
+    """
+    Returns the dict inside the agent's ```json fence, or None if there is no fence.
+    Raises json.JSONDecodeError if the fenced JSON is invalid.
+    """
+    match = JSON_BLOCK_RE.search(text or "")
+    if not match:
+        return None
+    return json.loads(match.group(1))
+
+
+def run_pipeline(country: str):
+    """
+    Direct (non-LLM) path for the standard dashboard query.
+    Runs the currency, stock and maps tools concurrently and assembles the result.
+    """
+    fx_future = _submit(get_exchange_rates, country)
+    stocks_future = _submit(get_stock_data, country)
+    maps_future = _submit(get_maps_link, country)
+
+    return assemble_result(
+        json.loads(fx_future.result()),
+        json.loads(stocks_future.result()),
+        maps_future.result()
+    )
+
+
+def stream_pipeline(country: str):
+    """
+    Runs the three tools concurrently and yields (section, payload) as each one
+    completes: ("currency", fx dict), ("stocks", stocks dict), ("maps", link).
+    """
+    futures = {
+        _submit(get_exchange_rates, country): "currency",
+        _submit(get_stock_data, country): "stocks",
+        _submit(get_maps_link, country): "maps"
+    }
+    for future in as_completed(futures):
+        section = futures[future]
+        result = future.result()
+        yield section, result if section == "maps" else json.loads(result)
+
+
+async def arun_pipeline(country: str):
+    """
+    Async variant of run_pipeline() using the async tool implementations.
+    """
+    fx, stocks, maps_link = await asyncio.gather(
+        aget_exchange_rates(country),
+        aget_stock_data(country),
+        aget_maps_link(country)
+    )
+    return assemble_result(json.loads(fx), json.loads(stocks), maps_link)
+
+
+def summarize(country: str, data: dict, llm=None):
+    """
+    Optional single LLM call that turns the assembled data into a narrative summary.
+    """
+    if llm is None:
+        try:
+            from agent import get_llm
+        except ImportError:
+            from finance_agent.agent import get_llm
+        llm = get_llm()
+
+    response = llm.invoke([
+        ("system", SUMMARY_PROMPT),
+        ("user", f"Country: {country}\nData: {json.dumps(data)}")
+    ])
+    return response.content
@@ -0,0 +1,30 @@
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+# Typed shape of the dashboard answer. Bound to the model as a function schema
+# in structured mode, so the final answer arrives already parsed.
+
+
+class CurrencyInfo(BaseModel):
+    """Official currency of the country."""
+    name: str = Field(description="Currency name, e.g. Japanese Yen")
+    code: str = Field(description="ISO 4217 code, e.g. JPY")
+
+
+class StockIndex(BaseModel):
+    """One stock market index."""
+    name: str = Field(description="Index name exactly as returned by stock_tool")
+    value: float = Field(description="Current index value")
+    change: Optional[str] = Field(default=None, description="Change string as returned by stock_tool, e.g. +0.5%")
+
+
+class FinancialReport(BaseModel):
+    """Final financial intelligence report for one country, built only from tool results."""
+    currency: CurrencyInfo
+    exchange_rates: Dict[str, float] = Field(
+        description="Units of each target currency (USD, INR, GBP, EUR) per 1 unit of the country's currency"
+    )
+    stock_indices: List[StockIndex]
+    maps_link: str = Field(description="Google Maps link returned by maps_tool")
+    source: str = Field(description="Data source reported by currency_tool, e.g. Live API or Mock Data")
@@ -0,0 +1,497 @@
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from dotenv import load_dotenv
+
+try:
+    from startup import lazy_import
+    from tools.answer_cache import answer_key, get_answer_cache
+    from tools.router import get_router
+except ImportError:
+    from finance_agent.startup import lazy_import
+    from finance_agent.tools.answer_cache import answer_key, get_answer_cache
+    from finance_agent.tools.router import get_router
+
+# Headless JSON API over the same tools, pipeline and agent as app.py:
+#   GET  /health
+#   GET  /fx/{country}, /indices/{country}
+#   GET  /intel/{country}?mode=direct|agent|structured&stream=1&fresh=1
+#   GET  /batch/{fx|indices|intel}?countries=A,B (or POST {"countries": [...]})
+# Agent runs go through a bounded worker pool; when its queue is full the
+# server answers 429 with Retry-After instead of piling up requests.
+# stream=1 returns NDJSON (one JSON event per line, chunked).
+load_dotenv()
+
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+SERVER_AGENT_WORKERS = int(os.getenv("SERVER_AGENT_WORKERS", "4"))
+# Agent requests allowed to wait for a worker before new ones get a 429
+SERVER_AGENT_QUEUE = int(os.getenv("SERVER_AGENT_QUEUE", "8"))
+SERVER_AGENT_TIMEOUT = float(os.getenv("SERVER_AGENT_TIMEOUT", "120"))
+SERVER_MAX_BATCH = int(os.getenv("SERVER_MAX_BATCH", "25"))
+RETRY_AFTER = 5
+
+INTEL_MODES = ("direct", "agent", "structured")
+
+
+class Saturated(RuntimeError):
+    """
+    Raised when the worker pool has no free slot for a request.
+    """
+
+
+class ApiError(Exception):
+    """
+    An error answered with an HTTP status and a JSON {"error": message} body.
+    """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class WorkerPool:
+    """
+    Fixed-size thread pool with a bounded backlog.
+
+    At most `workers` jobs run at once and at most `queue_size` more wait;
+    reserve() fails fast (raises Saturated) beyond that, so callers can shed
+    load with a 429 instead of queueing without bound.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.limit = workers + queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="server-agent")
+        self._lock = threading.Lock()
+        self.pending = 0  # running + queued
+        self.completed = 0
+        self.rejected = 0
+
+    def reserve(self, slots: int = 1):
+        """
+        Claims `slots` places in the pool, all or nothing. Each must be used by one submit().
+        """
+        with self._lock:
+            if self.pending + slots > self.limit:
+                self.rejected += 1
+                raise Saturated(f"worker pool saturated ({self.pending}/{self.limit} busy or queued)")
+            self.pending += slots
+
+    def _release(self, _future=None):
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+
+    def submit(self, fn, *args):
+        """
+        Runs fn(*args) on the pool in a previously reserved slot.
+        """
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    def status(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "limit": self.limit,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool(SERVER_AGENT_WORKERS, SERVER_AGENT_QUEUE)
+        return _pool
+
+
+# --- Handlers (plain functions returning JSON-serializable dicts) ---
+
+def fx_payload(country: str):
+    payload = json.loads(lazy_import("tools.currency").get_exchange_rates(country))
+    if "error" in payload:
+        raise ApiError(404, payload["error"])
+    return payload
+
+
+def indices_payload(country: str):
+    payload = json.loads(lazy_import("tools.stocks").get_stock_data(country))
+    if "error" in payload:
+        raise ApiError(404, payload["error"])
+    return payload
+
+
+def _intel_cache_key(mode: str, country: str):
+    agent = lazy_import("agent")
+    version = agent.PROMPT_VERSION if mode == "agent" else f"structured-{agent.PROMPT_VERSION}"
+    return answer_key(agent.DEFAULT_MODEL, country, version)
+
+
+def _cached_intel(mode: str, country: str, fresh: bool):
+    # Agent answers are shared with the dashboard's answer cache
+    answer_cache = get_answer_cache()
+    if answer_cache is None or fresh:
+        return None
+    cached = answer_cache.get(_intel_cache_key(mode, country))
+    if cached is None:
+        return None
+    output_text, age = cached
+    data = lazy_import("pipeline").extract_json_block(output_text)
+    return {"country": country, "mode": mode, "data": data, "cache_age": round(age, 1)}
+
+
+def _store_intel(mode: str, country: str, output_text: str):
+    answer_cache = get_answer_cache()
+    if answer_cache is not None:
+        answer_cache.set(
+            _intel_cache_key(mode, country), output_text,
+            model=lazy_import("agent").DEFAULT_MODEL, country=country
+        )
+
+
+def run_intel(country: str, mode: str, fresh: bool = False):
+    """
+    Full dashboard data for one country. "direct" runs the tools without an LLM;
+    "agent" and "structured" run the agent (callers run these on the worker pool).
+    """
+    if mode == "direct":
+        return {"country": country, "mode": mode, "data": lazy_import("pipeline").run_pipeline(country)}
+
+    cached = _cached_intel(mode, country, fresh)
+    if cached is not None:
+        return cached
+
+    agent = lazy_import("agent")
+    if mode == "structured":
+        result = agent.run_structured_agent(country)
+        if not result["stats"]["parse_failures"] and not result["stats"].get("stopped"):
+            _store_intel(mode, country, f"```json\n{json.dumps(result['data'])}\n```")
+        return {"country": country, "mode": mode, **result}
+
+    messages = agent.run_agent(agent.get_agent(), agent.agent_messages(country))["messages"]
+    return _agent_result(agent, country, mode, messages)
+
+
+def _agent_result(agent, country: str, mode: str, messages):
+    # Final payload of an agent-mode run; best-effort answers of cut-off runs are not cached
+    output_text = messages[-1].content
+    data = lazy_import("pipeline").extract_json_block(output_text)
+    stopped = agent.stopped_early(messages)
+    if data is not None and not stopped:
+        _store_intel(mode, country, output_text)
+    result = {
+        "country": country, "mode": mode, "data": data,
+        "text": None if data is not None else output_text,
+        "tokens": agent.token_report(messages)
+    }
+    if stopped:
+        result["stopped"] = stopped
+    return result
+
+
+def stream_intel(country: str, mode: str, fresh: bool = False):
+    """
+    Yields JSON-serializable events for one country, ending with {"type": "final", ...}.
+    direct: one event per tool as it completes; agent: tool calls and answer
+    tokens as they stream; structured: just the final report.
+    """
+    if mode == "direct":
+        partial = {}
+        for section, payload in lazy_import("pipeline").stream_pipeline(country):
+            partial[section] = payload
+            yield {"type": section, "country": country, "data": payload}
+        data = lazy_import("pipeline").assemble_result(partial["currency"], partial["stocks"], partial["maps"])
+        yield {"type": "final", "country": country, "data": data}
+        return
+
+    cached = _cached_intel(mode, country, fresh)
+    if cached is not None or mode == "structured":
+        yield {"type": "final", **(cached or run_intel(country, mode, fresh=True))}
+        return
+
+    agent = lazy_import("agent")
+    for event in agent.stream_agent(agent.get_agent(), agent.agent_messages(country)):
+        if event["type"] != "final":
+            # Tagged, since batch streams interleave several countries
+            yield {"country": country, **event}
+            continue
+        yield {"type": "final", **_agent_result(agent, country, mode, event["messages"])}
+
+
+def _pump(events, sink: queue.Queue):
+    # Worker side of a streamed response: forward events, then an end marker
+    try:
+        for event in events:
+            sink.put(event)
+    except Exception as e:
+        sink.put({"type": "error", "error": str(e)})
+    finally:
+        sink.put(None)
+
+
+def _check_country_list(countries):
+    if not countries:
+        raise ApiError(400, "no countries given")
+    if len(countries) > SERVER_MAX_BATCH:
+        raise ApiError(413, f"at most {SERVER_MAX_BATCH} countries per batch")
+    return countries
+
+
+# --- HTTP plumbing ---
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FinanceAgentAPI/1.0"
+
+    def log_message(self, format, *args):
+        if os.getenv("SERVER_ACCESS_LOG", "1") == "1":
+            super().log_message(format, *args)
+
+    # Responses
+    def send_json(self, status: int, payload, headers: dict = None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_stream(self, events):
+        # NDJSON over chunked transfer encoding; flushed per event
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            for event in events:
+                self._write_chunk(event)
+        except Exception as e:
+            # Headers are already out; report the failure in-band
+            self._write_chunk({"type": "error", "error": str(e) or type(e).__name__})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, event):
+        line = (json.dumps(event, default=str) + "\n").encode()
+        self.wfile.write(f"{len(line):X}\r\n".encode() + line + b"\r\n")
+        self.wfile.flush()
+
+    # Request parsing
+    def _route(self):
+        parts = urlsplit(self.path)
+        segments = [unquote(s) for s in parts.path.strip("/").split("/") if s]
+        params = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        return segments, params
+
+    def _countries(self, params, body):
+        if body is not None:
+            countries = body.get("countries") or []
+        else:
+            countries = lazy_import("batch").parse_countries(params.get("countries", ""))
+        return _check_country_list([str(c) for c in countries])
+
+    def _read_body(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise ApiError(400, "invalid Content-Length header")
+        if not length:
+            return {}
+        try:
+            body = json.loads(self.rfile.read(length))
+        except json.JSONDecodeError:
+            raise ApiError(400, "request body is not valid JSON")
+        if not isinstance(body, dict):
+            raise ApiError(400, "request body must be a JSON object")
+        return body
+
+    def do_GET(self):
+        self._handle(None)
+
+    def do_POST(self):
+        try:
+            body = self._read_body()
+        except ApiError as e:
+            self.send_json(e.status, {"error": str(e)})
+            return
+        self._handle(body)
+
+    def _handle(self, body):
+        segments, params = self._route()
+        try:
+            self._dispatch(segments, params, body)
+        except ApiError as e:
+            self.send_json(e.status, {"error": str(e)})
+        except Saturated as e:
+            self.send_json(429, {"error": str(e)}, {"Retry-After": str(RETRY_AFTER)})
+        except FutureTimeout:
+            self.send_json(504, {"error": f"agent run exceeded {SERVER_AGENT_TIMEOUT:.0f}s"})
+        except Exception as e:
+            self.send_json(500, {"error": str(e)})
+
+    def _dispatch(self, segments, params, body):
+        stream = params.get("stream") == "1"
+        fresh = params.get("fresh") == "1"
+        mode = params.get("mode", "direct")
+        if mode not in INTEL_MODES:
+            raise ApiError(400, f"mode must be one of {', '.join(INTEL_MODES)}")
+
+        if segments == ["health"]:
+            self.send_json(200, {"status": "ok", "pool": get_pool().status(), "router": get_router().status()})
+        elif len(segments) == 2 and segments[0] == "fx":
+            self.send_json(200, fx_payload(segments[1]))
+        elif len(segments) == 2 and segments[0] == "indices":
+            self.send_json(200, indices_payload(segments[1]))
+        elif len(segments) == 2 and segments[0] == "intel":
+            self._intel([segments[1]], mode, stream, fresh, single=True)
+        elif len(segments) == 2 and segments[0] == "batch":
+            self._batch(segments[1], self._countries(params, body), mode, stream, fresh)
+        else:
+            raise ApiError(404, f"no route for {self.command} {self.path}")
+
+    def _batch(self, kind, countries, mode, stream, fresh):
+        if kind in ("fx", "indices"):
+            # Cache-backed lookups: cheap enough to answer on the request thread
+            loader = fx_payload if kind == "fx" else indices_payload
+
+            def lookup(country):
+                try:
+                    return {"country": country, "data": loader(country)}
+                except ApiError as e:
+                    return {"country": country, "error": str(e)}
+
+            if stream:
+                self.send_stream(lookup(country) for country in countries)
+            else:
+                self.send_json(200, {"results": [lookup(country) for country in countries]})
+        elif kind == "intel":
+            if mode == "direct" and not stream:
+                # Shares one FX fetch per base currency across the batch
+                self.send_json(200, lazy_import("batch").run_batch(countries))
+            else:
+                self._intel(countries, mode, stream, fresh, single=False)
+        else:
+            raise ApiError(404, f"unknown batch kind '{kind}'")
+
+    def _intel(self, countries, mode, stream, fresh, single):
+        if mode == "direct":
+            # No LLM involved: no Groq key needed and no agent slot taken. The
+            # pipeline runs on its own executor; streamed batches go country by
+            # country (unstreamed ones are answered by batch.run_batch instead)
+            if stream:
+                self.send_stream(event for country in countries for event in stream_intel(country, mode))
+            else:
+                self.send_json(200, run_intel(countries[0], mode))
+            return
+
+        if not os.getenv("GROQ_API_KEY"):
+            raise ApiError(503, "GROQ_API_KEY not set")
+        pool = get_pool()
+        if len(countries) > pool.limit:
+            raise ApiError(413, f"agent batches are limited to {pool.limit} countries")
+        pool.reserve(len(countries))
+
+        if stream:
+            sink = queue.Queue()
+            remaining = len(countries)
+            for country in countries:
+                pool.submit(_pump, stream_intel(country, mode, fresh), sink)
+
+            def events():
+                nonlocal remaining
+                while remaining:
+                    event = sink.get(timeout=SERVER_AGENT_TIMEOUT)
+                    if event is None:
+                        remaining -= 1
+                    else:
+                        yield event
+
+            self.send_stream(events())
+            return
+
+        futures = [(country, pool.submit(run_intel, country, mode, fresh)) for country in countries]
+        deadline = time.monotonic() + SERVER_AGENT_TIMEOUT
+        if single:
+            self.send_json(200, futures[0][1].result(timeout=SERVER_AGENT_TIMEOUT))
+            return
+        results = []
+        for country, future in futures:
+            try:
+                results.append(future.result(timeout=max(0.0, deadline - time.monotonic())))
+            except FutureTimeout:
+                results.append({"country": country, "mode": mode, "error": "timed out"})
+            except Exception as e:
+                results.append({"country": country, "mode": mode, "error": str(e)})
+        self.send_json(200, {"results": results})
+
+
+class ApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def _start_stubs(latency: float):
+    # Offline mode: the fake Groq and FX servers from the benchmark suite.
+    # Must run before the agent/tool modules are imported (they read env at import).
+    from bench.fake_servers import FakeExchangeRateAPI, FakeGroq
+    groq = FakeGroq(latency=latency).start()
+    fx = FakeExchangeRateAPI(latency=latency).start()
+    os.environ.update({
+        "GROQ_API_KEY": "stub-key",
+        "GROQ_BASE_URL": groq.url,
+        "EXCHANGERATE_API_KEY": "stub-key",
+        "EXCHANGERATE_API_URL": fx.api_url,
+        "FX_MONTHLY_QUOTA": "0"
+    })
+    return groq, fx
+
+
+def serve(host: str = SERVER_HOST, port: int = SERVER_PORT):
+    """
+    Creates the API server bound to host:port (call serve_forever() on it).
+    """
+    return ApiServer((host, port), ApiHandler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless JSON API for the financial intelligence tools and agent")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--stubs", action="store_true",
+                        help="serve from local fake Groq/FX servers (no API keys or network needed)")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="injected stub latency (seconds)")
+    args = parser.parse_args()
+
+    if args.stubs:
+        _start_stubs(args.stub_latency)
+    server = serve(args.host, args.port)
+    print(f"Serving on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import importlib
+import os
+import threading
+import time
+
+# Cold-start helpers for app.py. The agent stack (langchain, langchain_groq,
+# langgraph) and the data stack (pandas, numpy, httpx) take seconds to import on
+# a fresh container, so app.py renders its shell first and imports these on
+# first use. An optional background thread pre-imports them after the shell is
+# up, so the first click usually finds them ready.
+FINANCE_WARMUP = os.getenv("FINANCE_WARMUP", "1") == "1"
+
+# The optional FX/index prefetcher (tools/prefetch.py) is started from the same
+# background thread, so its imports never block the shell either.
+FX_PREFETCH = os.getenv("FX_PREFETCH", "0") == "1"
+
+# Modules pre-imported by the warm-up thread, cheapest first
+WARMUP_MODULES = ("pipeline", "batch", "agent")
+
+_warmup_thread = None
+_warmup_lock = threading.Lock()
+warmup_status = {"state": "idle", "seconds": None, "error": None}
+
+
+def lazy_import(name: str):
+    """
+    Imports a project module on first use, from the flat layout or the finance_agent package.
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return importlib.import_module(f"finance_agent.{name}")
+
+
+def _warm_up(modules: bool, prefetch: bool):
+    start = time.perf_counter()
+    warmup_status["state"] = "running"
+    try:
+        if prefetch:
+            lazy_import("tools.prefetch").start_prefetcher()
+        if not modules:
+            warmup_status["state"] = "done"
+            return
+        for name in WARMUP_MODULES:
+            lazy_import(name)
+        # Build the shared LLM client and graph too when a key is configured
+        if os.getenv("GROQ_API_KEY"):
+            lazy_import("agent").get_agent()
+        warmup_status["state"] = "done"
+    except Exception as e:
+        warmup_status["state"] = "failed"
+        warmup_status["error"] = str(e)
+    finally:
+        warmup_status["seconds"] = round(time.perf_counter() - start, 3)
+
+
+def start_warmup(enabled: bool = None, prefetch: bool = None):
+    """
+    Starts the background warm-up (and the prefetcher, if enabled) once per
+    process. No-op if both are disabled or it already started.
+    """
+    global _warmup_thread
+    modules = FINANCE_WARMUP if enabled is None else enabled
+    prefetch = FX_PREFETCH if prefetch is None else prefetch
+    if not (modules or prefetch):
+        return None
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(
+                target=_warm_up, args=(modules, prefetch), name="warmup", daemon=True
+            )
+            _warmup_thread.start()
+        return _warmup_thread
@@ -0,0 +1,54 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Tests import the flat layout (agent, server, tools.*) from the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep the snapshot store, answer cache and trace log out of the working tree,
+# and never reach the real providers
+_tmp = tempfile.mkdtemp(prefix="finance-agent-tests-")
+os.environ.setdefault("FINANCE_STORE_PATH", os.path.join(_tmp, "snapshots.sqlite3"))
+os.environ.setdefault("ANSWER_CACHE_PATH", os.path.join(_tmp, "answers.sqlite3"))
+os.environ.setdefault("FINANCE_TRACE_LOG", os.path.join(_tmp, "trace.jsonl"))
+os.environ.setdefault("FX_PREFETCH", "0")
+os.environ.setdefault("FINANCE_WARMUP", "0")
+os.environ.pop("EXCHANGERATE_API_KEY", None)
+os.environ.pop("GROQ_API_KEY", None)
+
+
+@pytest.fixture
+def snapshot_store(tmp_path, monkeypatch):
+    """A fresh, empty SnapshotStore in place of the process-wide one."""
+    from tools import store
+    fresh = store.SnapshotStore(str(tmp_path / "snapshots.sqlite3"))
+    monkeypatch.setattr(store._store, "instance", fresh)
+    return fresh
+
+
+@pytest.fixture(scope="session")
+def groq_server():
+    # One fake Groq for the session: chat clients are built once per API key and
+    # read GROQ_BASE_URL when they are created
+    from bench.fake_servers import FakeGroq
+    with FakeGroq() as server:
+        os.environ.update({"GROQ_API_KEY": "test-key", "GROQ_BASE_URL": server.url})
+        yield server
+        os.environ.pop("GROQ_API_KEY", None)
+        os.environ.pop("GROQ_BASE_URL", None)
+
+
+@pytest.fixture
+def groq(groq_server, monkeypatch):
+    """The session's fake Groq with its failure and latency hooks reset."""
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    groq_server.fail_status = None
+    groq_server.model_fail_status.clear()
+    groq_server.model_latency.clear()
+    groq_server.models.clear()
+    yield groq_server
+    groq_server.model_fail_status.clear()
+    groq_server.model_latency.clear()
@@ -0,0 +1,152 @@
+import asyncio
+
+import pytest
+
+import agent
+from pipeline import extract_json_block
+from tools.http import run_async
+from tools.router import FAST_MODEL, STRONG_MODEL
+
+
+@pytest.fixture
+def deadline(groq, monkeypatch):
+    """Sets the per-run deadline (and turn reserve) in seconds for runs started by the test."""
+    agent.clear_registry()
+
+    def set_deadline(seconds, reserve=None):
+        monkeypatch.setattr(agent, "AGENT_DEADLINE", seconds)
+        if reserve is not None:
+            monkeypatch.setattr(agent, "AGENT_TURN_RESERVE", reserve)
+
+    yield set_deadline
+    agent.clear_registry()
+
+
+def test_reserve_is_capped_at_half_the_deadline():
+    budget = agent.RunBudget(max_turns=4, deadline=4, reserve=5)
+
+    assert budget.reserve == 2
+    assert budget.check(0) is None
+
+
+def test_reserve_is_kept_without_a_deadline():
+    budget = agent.RunBudget(max_turns=4, deadline=0, reserve=5)
+
+    assert budget.reserve == 5
+    assert budget.check(0) is None
+
+
+def test_best_effort_without_tool_results_is_an_explicit_error():
+    budget = agent.RunBudget()
+
+    message = budget.best_effort("deadline reached")
+    data = extract_json_block(message.content)
+
+    assert data == {"error": "Agent stopped before any tool returned data (deadline reached)."}
+    assert "Mock Data" not in message.content
+    assert agent.stopped_early([message]) == "deadline reached"
+
+
+def test_deadline_below_the_reserve_still_runs_the_model(deadline, groq):
+    deadline(4, reserve=5)
+
+    messages = agent.run_agent(agent.get_agent(), agent.agent_messages("Japan"))["messages"]
+
+    assert groq.models
+    assert agent.stopped_early(messages) is None
+    assert extract_json_block(messages[-1].content)["currency"]["code"] == "JPY"
+
+
+def test_run_cut_off_before_any_tool_reports_an_error(deadline, groq):
+    deadline(0.5)
+    groq.model_latency.update({FAST_MODEL: 2.0, STRONG_MODEL: 2.0})
+
+    messages = agent.run_agent(agent.get_agent(), agent.agent_messages("Japan"))["messages"]
+
+    assert agent.stopped_early(messages) == "deadline reached"
+    # No invented provenance (mock source, "#" maps link) when nothing was fetched
+    assert set(extract_json_block(messages[-1].content)) == {"error"}
+
+
+def test_repeated_tool_call_reuses_the_first_result():
+    calls = []
+
+    def fetch(country):
+        calls.append(country)
+        return f'{{"currency": "JPY", "call": {len(calls)}}}'
+
+    budget = agent.RunBudget()
+    first = budget.call("currency_tool", "Japan", fetch)
+    # Same tool and country, even spelled differently, is served from the run's memo
+    again = budget.call("currency_tool", "japan", fetch)
+    other_tool = budget.call("stock_tool", "Japan", fetch)
+
+    assert again == first
+    assert other_tool != first
+    assert calls == ["Japan", "Japan"]
+    assert (budget.tool_calls, budget.memo_hits) == (3, 1)
+
+
+def test_concurrent_duplicate_async_calls_share_one_fetch():
+    calls = []
+
+    async def fetch(country):
+        calls.append(country)
+        await asyncio.sleep(0.05)
+        return '{"currency": "INR"}'
+
+    async def scenario():
+        budget = agent.RunBudget()
+        results = await asyncio.gather(*(budget.acall("currency_tool", name, fetch) for name in ("India", "INDIA", "india")))
+        return budget, results
+
+    budget, results = asyncio.run(scenario())
+
+    assert calls == ["India"]
+    assert len(set(results)) == 1
+    assert budget.memo_hits == 2
+
+
+def test_tools_are_memoized_within_a_run():
+    calls = []
+    token = agent._run_budget.set(agent.RunBudget())
+    try:
+        for _ in range(2):
+            agent._memoized("maps_tool", "Germany", lambda country: calls.append(country) or "https://maps")
+    finally:
+        agent._run_budget.reset(token)
+    agent._memoized("maps_tool", "Germany", lambda country: calls.append(country) or "https://maps")
+
+    # Memoized inside the run; outside a run every call fetches
+    assert calls == ["Germany", "Germany"]
+
+
+def test_dropped_clients_are_closed(groq, monkeypatch):
+    agent.clear_registry()
+    old = agent.get_llm()
+    agent.run_agent(agent.get_agent(), agent.agent_messages("Japan"))
+
+    # A rotated key drops the old client, as does clearing the registry
+    monkeypatch.setenv("GROQ_API_KEY", "rotated-key")
+    new = agent.get_llm()
+    agent.clear_registry()
+    run_async(asyncio.sleep(0.05))
+
+    assert old.http_async_client.is_closed
+    assert new.http_async_client.is_closed
+
+
+def test_unparsable_report_falls_back_to_the_tool_results(groq, monkeypatch):
+    # The forced FinancialReport call comes back with arguments that fail validation
+    monkeypatch.setattr(groq, "_answer", lambda messages: {"currency": "JPY", "stock_indices": "n/a"})
+
+    result = agent.run_structured_agent("Japan")
+
+    assert result["stats"]["parse_failures"] == 1
+    assert result["stats"]["turns"] == 2
+    assert result["stats"]["tool_calls"] == 3
+    data = result["data"]
+    assert data["currency"]["code"] == "JPY"
+    assert set(data["exchange_rates"]) == {"USD", "INR", "GBP", "EUR"}
+    assert data["stock_indices"]
+    assert data["maps_link"].startswith("https://")
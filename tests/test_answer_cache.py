@@ -0,0 +1,45 @@
+import pytest
+
+from tools.answer_cache import AnswerCache, answer_key, country_key
+from tools.sqlite_store import SharedStore
+
+
+@pytest.mark.parametrize("query, key", [
+    ("Japan", "japan"),
+    ("U.S.A.", "usa"),
+    ("GBR", "uk"),
+    ("  south   KOREA ", "south korea"),
+])
+def test_exact_names_share_a_key(query, key):
+    assert country_key(query) == key
+
+
+@pytest.mark.parametrize("query, neighbour", [
+    ("North Korea", "South Korea"),
+    ("Indiana", "India"),
+    ("japna", "Japan"),
+])
+def test_near_misses_never_share_a_key(query, neighbour):
+    assert country_key(query) != country_key(neighbour)
+    assert answer_key("m", query, 1, epoch=0) != answer_key("m", neighbour, 1, epoch=0)
+
+
+def test_near_miss_does_not_read_a_neighbours_answer(tmp_path):
+    cache = AnswerCache(str(tmp_path / "answers.sqlite3"))
+    cache.set(answer_key("m", "South Korea", 1), "KRW / KOSPI", model="m", country="South Korea")
+
+    assert cache.get(answer_key("m", "North Korea", 1)) is None
+    assert cache.get(answer_key("m", "south korea", 1))[0] == "KRW / KOSPI"
+
+
+def test_shared_store_opens_once_and_degrades_to_none(tmp_path):
+    shared = SharedStore(AnswerCache, "Answer cache")
+
+    assert shared.get("") is None
+    first = shared.get(str(tmp_path / "answers.sqlite3"))
+    assert shared.get(str(tmp_path / "answers.sqlite3")) is first
+
+    broken = SharedStore(AnswerCache, "Answer cache")
+    (tmp_path / "file").write_text("")
+    assert broken.get(str(tmp_path / "file" / "answers.sqlite3")) is None
+    assert broken.failed
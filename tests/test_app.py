@@ -0,0 +1,58 @@
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import pipeline
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    monkeypatch.delenv("EXCHANGERATE_API_KEY", raising=False)
+    runs = []
+    stream_pipeline = pipeline.stream_pipeline
+
+    def counting(country):
+        runs.append(country)
+        return stream_pipeline(country)
+
+    monkeypatch.setattr(pipeline, "stream_pipeline", counting)
+    at = AppTest.from_file(APP, default_timeout=30)
+    at.runs = runs
+    at.run()
+    return at
+
+
+def button(at, label):
+    return next(b for b in at.button if b.label == label)
+
+
+def look_up(at, country):
+    at.text_input[0].set_value(country)
+    at.radio[0].set_value("⚡ Direct (fast)")
+    button(at, "Generate Intelligence").click().run()
+    assert not at.exception
+
+
+def test_results_are_redrawn_from_the_session_history(app):
+    look_up(app, "Japan")
+    look_up(app, "india")
+
+    assert list(app.session_state["results"]) == [("direct", "japan"), ("direct", "india")]
+    assert app.session_state["active_result"] == ("direct", "india")
+
+    # A rerun from another widget redraws the last result without fetching again
+    button(app, "Check Secrets").click().run()
+    assert "result for india" in app.caption[0].value
+    assert app.runs == ["Japan", "india"]
+
+    # Picking an older lookup from the history shows it, still from memory
+    button(app, "Japan · ⚡ Direct").click().run()
+    assert app.session_state["active_result"] == ("direct", "japan")
+    assert "result for Japan" in app.caption[0].value
+    assert button(app, "Japan · ⚡ Direct").disabled
+    assert not button(app, "india · ⚡ Direct").disabled
+    assert app.runs == ["Japan", "india"]
@@ -0,0 +1,35 @@
+import json
+import threading
+
+import batch
+
+
+def test_countries_sharing_a_currency_share_one_fx_fetch(monkeypatch):
+    lock = threading.Lock()
+    fx_calls = []
+
+    def get_exchange_rates(country):
+        with lock:
+            fx_calls.append(country)
+        _, code = batch.resolve_currency(country)
+        if code is None:
+            return json.dumps({"error": f"Country '{country}' not found in database."})
+        return json.dumps({"currency": code, "rates": {"USD": len(fx_calls)}, "source": "Mock Data"})
+
+    monkeypatch.setattr(batch, "get_exchange_rates", get_exchange_rates)
+    monkeypatch.setattr(batch, "get_stock_data", lambda country: json.dumps({"indices": []}))
+    monkeypatch.setattr(batch, "get_maps_link", lambda country: f"maps:{country}")
+
+    countries = batch.parse_countries("Germany, France\nJapan, germany, Atlantis, Italy")
+    result = batch.run_batch(countries)
+
+    assert countries == ["Germany", "France", "Japan", "Atlantis", "Italy"]
+    assert sorted(fx_calls) == ["Atlantis", "Germany", "Japan"]
+    assert result["fx_fetches"] == 3
+
+    results = result["results"]
+    assert results["France"]["exchange_rates"] == results["Germany"]["exchange_rates"]
+    assert results["Italy"]["exchange_rates"] == results["Germany"]["exchange_rates"]
+    assert results["France"]["maps_link"] == "maps:France"
+    assert results["Japan"]["currency"]["code"] == "JPY"
+    assert "errors" in results["Atlantis"]
@@ -0,0 +1,185 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from tools.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from tools.quota import QuotaGuard, TokenBucket
+
+
+class Clock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("test", failure_rate=0.5, min_calls=4, window=4, probe_interval=30, clock=clock)
+
+
+def test_opens_once_the_failure_rate_is_reached(breaker):
+    for _ in range(3):
+        breaker.record_failure()
+    # Below min_calls the breaker stays closed, whatever the rate
+    assert breaker.state == CLOSED
+
+    breaker.record_success()
+    breaker.record_failure(RuntimeError("boom"))
+
+    assert breaker.state == OPEN
+    assert breaker.opened == 1
+    assert not breaker.allow()
+    assert "boom" in breaker.describe()
+
+
+def test_stays_closed_below_the_failure_rate(breaker):
+    for outcome in (True, False, False, False, False):
+        breaker.record_failure() if outcome else breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_half_open_admits_a_single_probe_after_the_interval(breaker, clock):
+    for _ in range(4):
+        breaker.record_failure()
+
+    clock.advance(29)
+    assert breaker.state == OPEN
+    assert breaker.retry_in() == pytest.approx(1)
+
+    clock.advance(1)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    # An unused probe slot can be handed back
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_successful_probe_closes_with_a_clean_window(breaker, clock):
+    for _ in range(4):
+        breaker.record_failure()
+    clock.advance(30)
+    assert breaker.allow()
+
+    breaker.record_success()
+
+    assert breaker.state == CLOSED
+    assert breaker.status()["recent_calls"] == 1
+    assert breaker.status()["recent_failures"] == 0
+
+
+def test_failed_probe_reopens_for_another_interval(breaker, clock):
+    for _ in range(4):
+        breaker.record_failure()
+    clock.advance(30)
+    assert breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.state == OPEN
+    assert breaker.opened == 2
+    assert breaker.retry_in() == pytest.approx(30)
+
+
+def test_token_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate=0.5, capacity=2, clock=clock)
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert bucket.seconds_until() == pytest.approx(2)
+
+    clock.advance(2)
+    assert bucket.try_acquire()
+
+    clock.advance(100)
+    assert bucket.seconds_until() == 0
+    assert bucket.tokens == pytest.approx(2)
+
+
+@pytest.fixture
+def wall_clock():
+    # Mid-month, so rolling over is only tested where intended
+    return Clock(datetime(2026, 5, 15, tzinfo=timezone.utc).timestamp())
+
+
+def test_quota_guard_paces_bursts_and_refills(wall_clock):
+    guard = QuotaGuard(30 * 24 * 3600, reserve=0.1, burst=2, clock=wall_clock)  # one request per second
+
+    assert guard.acquire() == (True, None)
+    assert guard.acquire() == (True, None)
+    allowed, reason = guard.acquire()
+    assert not allowed and "rate limited" in reason
+
+    wall_clock.advance(1)
+    assert guard.acquire() == (True, None)
+    assert guard.status()["used"] == 3
+    assert guard.status()["refused"] == 1
+
+
+def test_quota_guard_never_spends_the_reserve(wall_clock):
+    guard = QuotaGuard(100, reserve=0.1, burst=100, clock=wall_clock)
+    assert guard.limit == 90
+
+    granted = sum(guard.acquire()[0] for _ in range(100))
+
+    assert granted == 90
+    allowed, reason = guard.acquire()
+    assert not allowed and "reserve reached" in reason
+
+
+def test_quota_guard_seeds_usage_and_resets_each_month(wall_clock):
+    seen = []
+
+    def used_loader(month_start):
+        seen.append(month_start)
+        return 90 if len(seen) == 1 else 0
+
+    guard = QuotaGuard(100, reserve=0.1, burst=5, used_loader=used_loader, clock=wall_clock)
+    assert not guard.acquire()[0]
+
+    wall_clock.advance(31 * 24 * 3600)
+    assert guard.acquire() == (True, None)
+    assert guard.status()["used"] == 1
+    assert seen == [
+        datetime(2026, 5, 1, tzinfo=timezone.utc).timestamp(),
+        datetime(2026, 6, 1, tzinfo=timezone.utc).timestamp(),
+    ]
+
+
+def test_quota_guard_trusts_provider_remaining_count(wall_clock):
+    guard = QuotaGuard(100, reserve=0.1, burst=5, clock=wall_clock)
+    guard.observe_remaining(5)
+
+    assert guard.status()["used"] == 95
+    assert not guard.acquire()[0]
+
+
+def test_zero_quota_disables_the_guard():
+    guard = QuotaGuard(0)
+    assert all(guard.acquire() == (True, None) for _ in range(1000))
+    assert guard.status()["enabled"] is False
+
+
+def test_quota_guard_rolls_the_month_on_demand(wall_clock):
+    seeded = []
+    guard = QuotaGuard(100, used_loader=lambda month: seeded.append(month) or 7, clock=wall_clock)
+
+    assert guard.needs_roll()
+    guard.roll_month()
+
+    assert not guard.needs_roll()
+    assert guard.acquire() == (True, None)
+    assert guard.status()["used"] == 8
+    assert len(seeded) == 1
+    assert not QuotaGuard(0).needs_roll()
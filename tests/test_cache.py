@@ -0,0 +1,170 @@
+import asyncio
+import threading
+import time
+
+from tools.cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_go_from_fresh_to_stale_to_miss():
+    clock = Clock()
+    cache = TTLCache(ttl=60, stale_ttl=30, clock=clock)
+    cache.set("USD", "rates")
+
+    clock.now += 60
+    assert cache.get("USD") == ("rates", 60, True)
+    clock.now += 30
+    assert cache.get("USD") == ("rates", 90, False)
+    clock.now += 1
+    assert cache.get("USD") is None
+    assert len(cache) == 0
+
+
+def test_ttl_for_sets_the_fresh_period_per_entry():
+    clock = Clock()
+    cache = TTLCache(ttl=60, clock=clock, ttl_for=lambda key, value: 600 if key == "USD" else 60)
+    cache.set("USD", "rates")
+    cache.set("EUR", "rates")
+
+    clock.now += 120
+    assert cache.get("USD")[2] is True
+    assert cache.get("EUR") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(ttl=60, maxsize=2, clock=Clock())
+    cache.set("USD", 1)
+    cache.set("EUR", 2)
+    cache.get("USD")
+    cache.set("GBP", 3)
+
+    assert cache.get("EUR") is None
+    assert cache.get("USD")[0] == 1
+    assert cache.get("GBP")[0] == 3
+
+
+def test_get_or_load_reports_live_cache_and_stale():
+    clock = Clock()
+    cache = TTLCache(ttl=60, stale_ttl=60, clock=clock)
+    refreshed = threading.Event()
+    loads = []
+
+    def loader():
+        loads.append(clock.now)
+        if len(loads) > 1:
+            refreshed.set()
+        return f"rates@{clock.now:.0f}"
+
+    assert cache.get_or_load("USD", loader) == ("rates@1000", "live", 0.0)
+    clock.now += 10
+    assert cache.get_or_load("USD", loader) == ("rates@1000", "cache", 10)
+
+    # Past the TTL the old value is served at once while one refresh runs
+    clock.now += 60
+    assert cache.get_or_load("USD", loader) == ("rates@1000", "stale", 70)
+    assert refreshed.wait(5)
+    for _ in range(100):
+        if not cache._refreshing:
+            break
+        time.sleep(0.01)
+    assert cache.get_or_load("USD", loader) == ("rates@1070", "cache", 0)
+    assert len(loads) == 2
+
+
+def test_failed_background_refresh_keeps_serving_the_stale_value():
+    clock = Clock()
+    cache = TTLCache(ttl=60, stale_ttl=60, clock=clock)
+    cache.set("USD", "rates")
+    clock.now += 90
+    done = threading.Event()
+
+    def loader():
+        done.set()
+        raise RuntimeError("provider down")
+
+    assert cache.get_or_load("USD", loader)[1] == "stale"
+    assert done.wait(5)
+    for _ in range(100):
+        if not cache._refreshing:
+            break
+        time.sleep(0.01)
+    assert cache.get("USD") == ("rates", 90, False)
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_load():
+    cache = TTLCache(ttl=60)
+    calls = []
+
+    async def aloader():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "rates"
+
+    async def scenario():
+        leader = asyncio.ensure_future(cache.aget_or_load("USD", aloader, lambda: "sync"))
+        await asyncio.sleep(0)
+        waiters = [asyncio.ensure_future(cache.aget_or_load("USD", aloader, lambda: "sync")) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        waiters[0].cancel()
+        return await leader, await asyncio.gather(waiters[1], return_exceptions=True), waiters[0]
+
+    lead, (other,), cancelled = asyncio.run(scenario())
+
+    assert lead == ("rates", "live", 0.0)
+    assert other == ("rates", "live", 0.0)
+    assert cancelled.cancelled()
+    assert calls == [1]
+    assert cache.coalesced == 2
+    assert cache.get("USD")[0] == "rates"
+
+
+def test_cancelled_leader_still_completes_the_load_for_waiters():
+    cache = TTLCache(ttl=60)
+    sync_results = []
+
+    async def aloader():
+        await asyncio.sleep(0.1)
+        return "rates"
+
+    async def scenario():
+        leader = asyncio.ensure_future(cache.aget_or_load("USD", aloader, lambda: "sync"))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(cache.aget_or_load("USD", aloader, lambda: "sync"))
+        # A sync caller on another thread joins the same in-flight load
+        thread = threading.Thread(
+            target=lambda: sync_results.append(cache.get_or_load("USD", lambda: "sync")[0])
+        )
+        thread.start()
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        result = await waiter
+        await asyncio.to_thread(thread.join)
+        return result
+
+    assert asyncio.run(scenario()) == ("rates", "live", 0.0)
+    assert sync_results == ["rates"]
+    assert cache.get("USD")[0] == "rates"
+
+
+def test_failed_load_reaches_every_waiter_and_is_not_cached():
+    cache = TTLCache(ttl=60)
+
+    async def aloader():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("provider down")
+
+    async def scenario():
+        calls = [asyncio.ensure_future(cache.aget_or_load("USD", aloader, lambda: "sync")) for _ in range(3)]
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    results = asyncio.run(scenario())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.get("USD") is None
@@ -0,0 +1,40 @@
+import json
+
+from tools.compact import compact_payload, compact_result
+
+
+def test_currency_projection_keeps_the_api_failure_warning():
+    payload = json.dumps({
+        "currency": {"name": "Japanese Yen", "code": "JPY"},
+        "rates": {"USD": 0.0067},
+        "source": "Mock Data",
+        "api_error": "FX provider unavailable",
+        "cache": "miss",
+    })
+
+    compact = json.loads(compact_payload("currency_tool", payload))
+
+    assert compact["api_error"] == "FX provider unavailable"
+    assert "cache" not in compact
+
+
+def test_stock_projection_keeps_the_exchange_and_trims_indices():
+    payload = json.dumps({
+        "exchange": "Tokyo Stock Exchange",
+        "indices": [{"name": "Nikkei 225", "value": 38000.0, "change": "+0.5%", "extra": 1}],
+        "source": "Mock Data",
+    })
+
+    content, artifact = compact_result("stock_tool", payload)
+    compact = json.loads(content)
+
+    assert compact == {
+        "exchange": "Tokyo Stock Exchange",
+        "indices": [{"name": "Nikkei 225", "value": 38000.0, "change": "+0.5%"}],
+    }
+    assert artifact == payload
+
+
+def test_non_json_payloads_pass_through():
+    assert compact_payload("maps_tool", "https://maps.google.com/?q=x") == "https://maps.google.com/?q=x"
+    assert compact_payload("stock_tool", "not json") == "not json"
@@ -0,0 +1,47 @@
+import io
+from contextlib import nullcontext
+
+import pandas as pd
+import pytest
+
+from tools import convert
+from tools.currency import MOCK_RATE_MATRIX
+
+HEADER = "amount,from_ccy,to_ccy,note,rate,converted"
+
+
+def run(text, **kwargs):
+    out = io.StringIO()
+    stats = convert.convert_csv(io.StringIO(text), out, matrix=MOCK_RATE_MATRIX, **kwargs)
+    return stats, out.getvalue().splitlines()
+
+
+def test_header_only_input_still_gets_the_output_header():
+    stats, lines = run("amount,from_ccy,to_ccy,note\n")
+
+    assert stats["rows"] == 0
+    assert lines == [HEADER]
+
+
+def test_header_is_written_once_across_chunks():
+    stats, lines = run("amount,from_ccy,to_ccy,note\n1,USD,EUR,a\n2,EUR,USD,b\n3,XXX,USD,c\n", chunksize=1)
+
+    assert stats["chunks"] == 3
+    assert stats["unconverted"] == 1
+    assert lines[0] == HEADER
+    assert len(lines) == 4
+    assert float(lines[1].split(",")[-1]) == pytest.approx(0.92)
+
+
+def test_header_is_written_when_the_reader_yields_no_chunks(monkeypatch):
+    monkeypatch.setattr(convert.pd, "read_csv", lambda *args, **kwargs: nullcontext(iter(())))
+
+    stats, lines = run("amount,from_ccy,to_ccy\n")
+
+    assert stats["chunks"] == 0
+    assert lines == ["amount,from_ccy,to_ccy,rate,converted"]
+
+
+def test_convert_frame_requires_the_amount_and_currency_columns():
+    with pytest.raises(ValueError, match="to_ccy"):
+        convert.convert_frame(pd.DataFrame({"amount": [1], "from_ccy": ["USD"]}), matrix=MOCK_RATE_MATRIX)
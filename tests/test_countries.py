@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from tools.countries import canonical_key, resolve
+from tools.currency import get_exchange_rates
+
+
+@pytest.mark.parametrize("query, key", [
+    ("Japan", "japan"),
+    ("U.S.A.", "usa"),
+    ("GBR", "uk"),
+    ("new york city", "usa"),
+    ("India stock market", "india"),
+    ("exchange rates of Japan", "japan"),
+    ("japna", "japan"),
+    ("germny", "germany"),
+    ("londn", "uk"),
+    ("new dehli", "india"),
+])
+def test_resolves_names_phrases_and_typos(query, key):
+    assert resolve(query).key == key
+
+
+@pytest.mark.parametrize("query", [
+    # A neighbour's name inside another place is not that neighbour
+    "North Korea",
+    "New South Wales",
+    # A longer word is not a typo of a shorter name
+    "Indiana",
+    # Two countries in one phrase are ambiguous
+    "India vs Japan",
+    "Atlantis",
+    "",
+])
+def test_unsupported_places_are_not_found(query):
+    assert resolve(query) is None
+
+
+def test_unsupported_place_gets_no_neighbours_data():
+    result = json.loads(get_exchange_rates("North Korea"))
+    assert "error" in result
+    assert "KRW" not in json.dumps(result)
+
+
+def test_canonical_key_is_exact_only():
+    assert canonical_key("Bharat") == "india"
+    assert canonical_key("Indiana") == "indiana"
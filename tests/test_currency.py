@@ -0,0 +1,168 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from bench.fake_servers import FakeExchangeRateAPI
+from tools import currency, http
+from tools.breaker import OPEN, CircuitBreaker
+from tools.cache import TTLCache
+from tools.quota import QuotaGuard
+
+
+@pytest.fixture
+def fx(monkeypatch):
+    with FakeExchangeRateAPI() as server:
+        monkeypatch.setenv("EXCHANGERATE_API_KEY", "test-key")
+        monkeypatch.setattr(currency, "EXCHANGERATE_API_URL", server.api_url)
+        monkeypatch.setattr(currency, "fx_breaker", CircuitBreaker("FX provider", min_calls=1, probe_interval=60))
+        monkeypatch.setattr(currency, "fx_quota", QuotaGuard(0))
+        monkeypatch.setattr(http, "MAX_RETRIES", 0)
+        currency._rates_cache.clear()
+        yield server
+        currency._rates_cache.clear()
+    http.close_sessions()
+
+
+def test_sync_and_async_fetches_share_parsing_and_breaker_bookkeeping(fx):
+    matrix, status, _age = currency.get_rate_matrix()
+    assert status == "live"
+    assert matrix.cross_rates("EUR", ("USD",))["USD"] == pytest.approx(1 / 0.92, rel=1e-4)
+
+    rates = asyncio.run(currency._afetch_live_rates("USD", "test-key"))
+    assert rates["JPY"] == pytest.approx(149.3)
+    assert currency.fx_breaker.status()["recent_failures"] == 0
+    assert currency.fx_breaker.status()["recent_calls"] == 2
+
+
+@pytest.mark.parametrize("base", ["EUR", "JPY", "INR", "GBP"])
+def test_cross_rates_match_the_providers_direct_quotes(fx, base):
+    matrix, _status, _age = currency.get_rate_matrix()
+    direct = currency._fetch_live_rates(base, "test-key")
+
+    targets = [code for code in direct if code != base]
+    assert matrix.cross_rates(base, targets) == pytest.approx({code: direct[code] for code in targets}, rel=1e-9)
+
+
+@pytest.mark.parametrize("fetch", [
+    lambda: currency._fetch_live_rates("USD", "test-key"),
+    lambda: asyncio.run(currency._afetch_live_rates("USD", "test-key")),
+])
+def test_provider_error_is_raised_and_trips_the_breaker(fx, fetch):
+    fx.fail_status = 500
+
+    with pytest.raises(RuntimeError, match="unavailable"):
+        fetch()
+    assert currency.fx_breaker.state == OPEN
+
+
+@pytest.mark.parametrize("call", [
+    currency.get_rate_matrix,
+    currency.refresh_rate_matrix,
+    lambda: asyncio.run(currency.aget_rate_matrix()),
+])
+def test_missing_api_key(monkeypatch, call):
+    monkeypatch.delenv("EXCHANGERATE_API_KEY", raising=False)
+    with pytest.raises(RuntimeError, match="EXCHANGERATE_API_KEY not set"):
+        call()
+
+
+def test_tool_falls_back_to_mock_data_without_a_key(monkeypatch):
+    monkeypatch.delenv("EXCHANGERATE_API_KEY", raising=False)
+    result = json.loads(currency.get_exchange_rates("Japan"))
+    assert result["currency"] == "JPY"
+    assert result["source"] == "Mock Data"
+
+
+def test_async_tool_keeps_store_io_off_the_event_loop(fx, monkeypatch):
+    threads = []
+    for name in ("_record_and_build", "rate_changes"):
+        original = getattr(currency, name)
+
+        def recording(*args, _original=original):
+            threads.append(threading.current_thread())
+            return _original(*args)
+
+        monkeypatch.setattr(currency, name, recording)
+
+    async def lookup():
+        return threading.current_thread(), json.loads(await currency.aget_exchange_rates("Japan"))
+
+    loop_thread, result = asyncio.run(lookup())
+
+    assert result["source"] == "Live API"
+    assert len(threads) == 2
+    assert loop_thread not in threads
+
+
+def test_tool_payload_reports_cache_status_and_age(fx, monkeypatch):
+    clock = [1000.0]
+    cache = TTLCache(ttl=60, stale_ttl=60, clock=lambda: clock[0])
+    monkeypatch.setattr(currency, "_rates_cache", cache)
+
+    def lookup():
+        result = json.loads(currency.get_exchange_rates("Japan"))
+        return result["cache"], result["age_seconds"]
+
+    assert lookup() == ("live", 0.0)
+    clock[0] += 12.34
+    assert lookup() == ("cache", 12.3)
+    clock[0] += 60
+    assert lookup() == ("stale", 72.3)
+    for _ in range(100):
+        if not cache._refreshing:
+            break
+        time.sleep(0.01)
+    # One fetch for the miss, one for the background refresh of the stale quote
+    assert currency.fx_breaker.status()["recent_calls"] == 2
+    assert lookup() == ("cache", 0.0)
+
+
+@pytest.fixture
+def refused(fx, snapshot_store):
+    # An open breaker refuses every live fetch, so only the stored quote can be served
+    currency.fx_breaker.record_failure()
+    assert currency.fx_breaker.state == OPEN
+    return snapshot_store
+
+
+def test_recent_stored_quote_is_labelled_with_its_age(refused):
+    refused.record_rates("USD", currency.MOCK_USD_RATES, "Live API", ts=time.time() - 7200)
+
+    result = json.loads(currency.get_exchange_rates("Japan"))
+
+    assert result["source"] == currency.STORED_SOURCE
+    assert result["cache"] == "stored"
+    assert result["age_seconds"] == pytest.approx(7200, abs=5)
+    assert "circuit" in result["api_error"]
+
+
+def test_stored_quote_past_max_age_is_not_served(refused, monkeypatch):
+    monkeypatch.setattr(currency, "FX_STORED_MAX_AGE", 3600)
+    refused.record_rates("USD", currency.MOCK_USD_RATES, "Live API", ts=time.time() - 7200)
+
+    result = json.loads(currency.get_exchange_rates("Japan"))
+
+    assert result["source"].startswith("Mock Data")
+    assert "age_seconds" not in result
+
+
+def test_async_fetch_seeds_the_quota_month_off_the_event_loop(fx, monkeypatch):
+    threads = []
+
+    def used_loader(month_start):
+        threads.append(threading.current_thread())
+        return 0
+
+    monkeypatch.setattr(currency, "fx_quota", QuotaGuard(1000, used_loader=used_loader))
+
+    async def fetch():
+        return threading.current_thread(), await currency._afetch_live_rates("USD", "test-key")
+
+    loop_thread, rates = asyncio.run(fetch())
+
+    assert rates["JPY"] == pytest.approx(149.3)
+    assert len(threads) == 1 and threads[0] is not loop_thread
+    assert currency.fx_quota.status()["used"] == 1
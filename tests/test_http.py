@@ -0,0 +1,126 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from bench.fake_servers import FakeExchangeRateAPI, FakeGroq
+from tools import http
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    # Record backoff waits instead of sleeping through them (in tools.http only)
+    waited = []
+    monkeypatch.setattr(http, "time", SimpleNamespace(sleep=waited.append, time=time.time))
+    return waited
+
+
+@pytest.fixture
+def fx():
+    with FakeExchangeRateAPI() as server:
+        yield server
+    http.close_sessions()
+
+
+def latest_url(server, base="USD"):
+    return f"{server.api_url}/key/latest/{base}"
+
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_retries_transient_status_until_success(fx, sleeps, status):
+    fx.fail_status, fx.fail_times = status, 2
+
+    response = http.request("GET", latest_url(fx), retries=2)
+
+    assert response.status_code == 200
+    assert response.json()["base_code"] == "USD"
+    assert fx.requests == 3
+    assert len(sleeps) == 2
+
+
+def test_does_not_retry_client_errors(fx, sleeps):
+    fx.fail_status = 404
+
+    response = http.request("GET", latest_url(fx), retries=3)
+
+    assert response.status_code == 404
+    assert fx.requests == 1
+    assert sleeps == []
+
+
+def test_honours_retry_after(fx, sleeps):
+    fx.fail_status, fx.fail_times, fx.retry_after = 503, 1, "3"
+
+    response = http.request("GET", latest_url(fx), retries=2)
+
+    assert response.status_code == 200
+    # Full-jitter backoff is at most BACKOFF_BASE here, so the wait is Retry-After
+    assert sleeps == [3.0]
+
+
+def test_retry_after_above_cap_is_returned_without_waiting(fx, sleeps):
+    fx.fail_status, fx.retry_after = 429, str(int(http.MAX_RETRY_AFTER) + 1)
+
+    response = http.request("GET", latest_url(fx), retries=3)
+
+    assert response.status_code == 429
+    assert fx.requests == 1
+    assert sleeps == []
+
+
+def test_retry_after_at_cap_is_waited(fx, sleeps):
+    fx.fail_status, fx.fail_times, fx.retry_after = 429, 1, str(http.MAX_RETRY_AFTER)
+
+    response = http.request("GET", latest_url(fx), retries=1)
+
+    assert response.status_code == 200
+    assert sleeps == [http.MAX_RETRY_AFTER]
+
+
+def test_gives_up_after_retry_budget(fx, sleeps):
+    fx.fail_status = 503
+
+    response = http.request("GET", latest_url(fx), retries=2)
+
+    # The last failed response is returned as-is
+    assert response.status_code == 503
+    assert fx.requests == 3
+    assert len(sleeps) == 2
+
+
+def test_backoff_is_jittered_and_capped(fx, sleeps):
+    fx.fail_status = 500
+
+    http.request("GET", latest_url(fx), retries=6)
+
+    assert len(sleeps) == 6
+    for attempt, delay in enumerate(sleeps):
+        assert 0 <= delay <= min(http.BACKOFF_CAP, http.BACKOFF_BASE * 2 ** attempt)
+
+
+def test_connection_errors_are_retried_then_raised(sleeps):
+    # Nothing listens on the discard port of localhost
+    with pytest.raises(requests.ConnectionError):
+        http.request("GET", "http://127.0.0.1:9/v6/key/latest/USD", retries=2)
+    assert len(sleeps) == 2
+
+
+@pytest.mark.parametrize("send", [
+    lambda url: http.request("POST", url, json={}, retries=3),
+    lambda url: http.run_async(http.arequest("POST", url, json={}, retries=3)),
+])
+def test_non_idempotent_requests_are_not_retried(sleeps, send):
+    with FakeGroq(fail_status=503) as groq:
+        response = send(f"{groq.url}/openai/v1/chat/completions")
+
+    assert response.status_code == 503
+    assert groq.requests == 1
+    assert sleeps == []
+    http.close_sessions()
+
+
+def test_connection_errors_on_post_are_raised_at_once(sleeps):
+    with pytest.raises(requests.ConnectionError):
+        http.request("POST", "http://127.0.0.1:9/openai/v1/chat/completions", retries=2)
+    assert sleeps == []
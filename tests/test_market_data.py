@@ -0,0 +1,82 @@
+import json
+import os
+import time
+
+import pytest
+
+from tools import stocks
+from tools.market_data import FILE_SOURCE, FileProvider, MarketDataProvider, RegistryProvider
+
+
+def write_csv(directory, name, text):
+    path = directory / name
+    path.write_text(text)
+    return path
+
+
+@pytest.fixture
+def provider(tmp_path):
+    provider = FileProvider(str(tmp_path), poll=0.05)
+    yield provider
+    provider.stop()
+
+
+def test_change_values_are_normalised(tmp_path, provider):
+    write_csv(tmp_path, "drop.csv", (
+        "country,index,value,change\n"
+        "Japan,Numeric,1,0.5\n"
+        "Japan,Numeric string,2,\"-1.25\"\n"
+        "Japan,Percent,3,+0.4%\n"
+        "Japan,Text,4,flat\n"
+        "Japan,Blank,5,\n"
+    ))
+    assert provider.refresh()
+
+    changes = {name: change for name, _value, change in provider.quotes("japan").indices}
+
+    assert changes == {
+        "Numeric": "+0.50%",
+        "Numeric string": "-1.25%",
+        "Percent": "+0.40%",
+        "Text": "flat",
+        "Blank": "n/a",
+    }
+
+
+def test_lookups_never_load_files(tmp_path, provider):
+    write_csv(tmp_path, "drop.csv", "country,index,value\nJapan,Nikkei 225,1\n")
+
+    assert provider.quotes("japan") is None
+    assert provider.refresh()
+    assert provider.quotes("japan").source == FILE_SOURCE
+    assert not provider.refresh()
+
+
+def test_poll_thread_swaps_in_changed_files(tmp_path, provider):
+    path = write_csv(tmp_path, "drop.csv", "country,index,value\nJapan,Nikkei 225,100\n")
+    stocks.set_providers([provider.start(), RegistryProvider()])
+    try:
+        deadline = time.monotonic() + 5
+        while provider.version < 1:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert json.loads(stocks.get_stock_data("Japan"))["indices"][0]["value"] == 100
+
+        path.write_text("country,index,value\nJapan,Nikkei 225,200\n")
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+        while provider.version < 2:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+        assert json.loads(stocks.get_stock_data("Japan"))["indices"][0]["value"] == 200
+        assert provider.status()["polling"]
+    finally:
+        stocks.set_providers([RegistryProvider()])
+
+
+def test_providers_must_implement_quotes():
+    class Incomplete(MarketDataProvider):
+        name = "incomplete"
+
+    with pytest.raises(TypeError, match="quotes"):
+        Incomplete()
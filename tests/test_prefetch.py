@@ -0,0 +1,98 @@
+import time
+
+import pytest
+
+from bench.fake_servers import FakeExchangeRateAPI
+from tools import currency, http, prefetch
+from tools.breaker import CircuitBreaker
+from tools.quota import QuotaGuard
+
+
+@pytest.fixture
+def no_jitter(monkeypatch):
+    # uniform(a, b) -> b, so delays are deterministic upper bounds
+    monkeypatch.setattr(prefetch.random, "uniform", lambda low, high: high)
+    monkeypatch.setattr(prefetch, "PREFETCH_JITTER", 0.0)
+
+
+@pytest.fixture
+def fx(monkeypatch):
+    with FakeExchangeRateAPI() as server:
+        monkeypatch.setenv("EXCHANGERATE_API_KEY", "test-key")
+        monkeypatch.setattr(currency, "EXCHANGERATE_API_URL", server.api_url)
+        monkeypatch.setattr(currency, "fx_breaker", CircuitBreaker("FX provider"))
+        monkeypatch.setattr(currency, "fx_quota", QuotaGuard(0))
+        monkeypatch.setattr(http, "MAX_RETRIES", 0)
+        currency._rates_cache.clear()
+        currency.provider_next_update.clear()
+        yield server
+        currency._rates_cache.clear()
+        currency.provider_next_update.clear()
+    http.close_sessions()
+
+
+def test_fx_refresh_is_scheduled_after_the_providers_next_update(no_jitter, monkeypatch):
+    monkeypatch.setitem(currency.provider_next_update, currency.FX_ANCHOR_CURRENCY, time.time() + 86400)
+
+    delay = prefetch.Prefetcher()._fx_delay()
+
+    # Daily, not every FX_CACHE_TTL
+    assert delay == pytest.approx(86400 + prefetch.PROVIDER_SETTLE_DELAY, abs=2)
+
+
+def test_fx_refresh_falls_back_to_the_cache_ttl_without_an_update_time(no_jitter, monkeypatch):
+    monkeypatch.setattr(prefetch, "provider_next_update", {})
+
+    assert prefetch.Prefetcher()._fx_delay() == pytest.approx(currency.FX_CACHE_TTL * prefetch.PREFETCH_LEAD)
+
+
+def test_refreshed_quote_stays_fresh_until_the_next_update(fx):
+    matrix = currency.refresh_rate_matrix()
+
+    ttl = currency._quote_ttl(currency.FX_ANCHOR_CURRENCY, matrix)
+
+    # The fake provider announces its next update a day ahead
+    assert ttl == pytest.approx(86400 + currency.FX_UPDATE_GRACE, abs=5)
+    assert ttl > prefetch.PROVIDER_SETTLE_DELAY + prefetch.PREFETCH_JITTER
+    assert currency.get_rate_matrix()[1] == "cache"
+
+
+def test_failures_back_off_exponentially_and_success_resets(no_jitter, monkeypatch):
+    def failing(api_key):
+        raise RuntimeError("provider down")
+
+    monkeypatch.setattr(prefetch, "refresh_rate_matrix", failing)
+    prefetcher = prefetch.Prefetcher(api_key="test-key")
+
+    delays = []
+    for _ in range(3):
+        prefetcher._fx_cycle()
+        delays.append(prefetcher.next_refresh - time.time())
+
+    assert delays == pytest.approx([2 * prefetch.MIN_INTERVAL, 4 * prefetch.MIN_INTERVAL, 8 * prefetch.MIN_INTERVAL], abs=1)
+    assert (prefetcher.failures, prefetcher.consecutive_failures) == (3, 3)
+    assert prefetcher.last_error == "provider down"
+
+    monkeypatch.setattr(prefetch, "MAX_BACKOFF", 100.0)
+    prefetcher._fx_cycle()
+    assert prefetcher.next_refresh - time.time() == pytest.approx(100, abs=1)
+
+    monkeypatch.setattr(prefetch, "refresh_rate_matrix", lambda api_key: None)
+    prefetcher._fx_cycle()
+    assert prefetcher.consecutive_failures == 0
+    assert prefetcher.last_error is None
+    assert prefetcher.refreshes == 1
+
+
+def test_health_reports_refreshes_and_cache_ages(fx):
+    prefetcher = prefetch.Prefetcher()
+    prefetcher._fx_cycle()
+
+    health = prefetcher.health()
+
+    assert health["running"] is False
+    assert health["refreshes"] == 1 and health["failures"] == 0
+    assert health["last_refresh_age"] == pytest.approx(0, abs=2)
+    assert health["next_refresh_in"] > 86400
+    assert health["currency_age"]["JPY"] == pytest.approx(0, abs=2)
+    assert set(health["index_age"]) >= {"japan", "india"}
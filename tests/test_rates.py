@@ -0,0 +1,51 @@
+import itertools
+import json
+
+import pytest
+
+from tools import currency
+from tools.rates import RateMatrix
+
+
+def test_zero_and_missing_rates_are_dropped():
+    matrix = RateMatrix("USD", {"EUR": 0.92, "XXX": 0, "YYY": None, "JPY": "149.3"})
+
+    assert matrix.currencies == ("EUR", "JPY", "USD")
+    assert "XXX" not in matrix and "YYY" not in matrix
+    assert matrix.rate("XXX", "USD") is None
+    assert matrix.cross_rates("EUR", ("USD", "XXX")) == {"USD": pytest.approx(1 / 0.92), "XXX": None}
+
+
+def test_anchor_is_always_one():
+    matrix = RateMatrix("EUR", {"USD": 1.08, "EUR": 0.5})
+
+    assert matrix.rate("EUR", "EUR") == 1.0
+    assert matrix.rate("EUR", "USD") == pytest.approx(1.08)
+
+
+def test_cross_rates_round_to_significant_digits():
+    matrix = RateMatrix("USD", {"JPY": 149.3, "KRW": 1332.5, "INR": 83.2})
+
+    assert matrix.cross_rates("JPY", ("USD", "KRW", "INR"), digits=4) == {
+        "USD": 0.006698, "KRW": 8.925, "INR": 0.5573
+    }
+    assert matrix.cross_rates("USD", ("KRW",), digits=2) == {"KRW": 1300.0}
+
+
+def test_mock_table_is_consistent_with_its_anchor_quote():
+    mock = currency.MOCK_RATE_MATRIX
+
+    assert mock.cross_rates("USD", currency.MOCK_USD_RATES) == pytest.approx(currency.MOCK_USD_RATES)
+    for a, b, c in itertools.permutations(mock.currencies, 3):
+        assert mock.rate(a, b) * mock.rate(b, a) == pytest.approx(1.0)
+        assert mock.rate(a, b) * mock.rate(b, c) == pytest.approx(mock.rate(a, c))
+
+
+def test_mock_fallback_payload_uses_the_rebuilt_table(monkeypatch):
+    monkeypatch.delenv("EXCHANGERATE_API_KEY", raising=False)
+
+    result = json.loads(currency.get_exchange_rates("Japan"))
+
+    assert result["rates"] == {
+        "USD": 0.0067, "INR": 0.6068, "GBP": 0.005293, "EUR": 0.006164
+    }
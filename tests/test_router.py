@@ -0,0 +1,113 @@
+import pytest
+
+import agent
+from tools import router as router_module
+from tools.router import (
+    FAST_MODEL, ORCHESTRATION, ROUTER_COOLDOWN, ROUTER_PROBE_INTERVAL, ROUTER_SLOW_SECONDS, STRONG_MODEL,
+    ModelRouter, get_router
+)
+
+
+@pytest.fixture
+def fresh_agent(groq, monkeypatch):
+    # A new process-wide router and freshly built clients/graphs bound to it
+    monkeypatch.setattr(router_module, "_routers", {})
+    agent.clear_registry()
+    yield
+    agent.clear_registry()
+
+
+def test_rate_limited_fast_model_fails_over_to_the_large_model(groq, fresh_agent):
+    groq.model_fail_status[FAST_MODEL] = 429
+
+    messages = agent.run_agent(agent.get_agent(), agent.agent_messages("Japan"))["messages"]
+
+    # The 8b orchestration turn was refused; the 70b model made the tool calls and the answer
+    assert groq.models[0] == FAST_MODEL
+    assert set(groq.models[groq.models.index(STRONG_MODEL):]) == {STRONG_MODEL}
+    routing = messages[1].response_metadata["routing"]
+    assert routing["turn"] == ORCHESTRATION
+    assert routing["model"] == STRONG_MODEL
+    assert routing["failover"] is True
+    assert routing["errors"][0].startswith(FAST_MODEL)
+    assert '"code": "JPY"' in messages[-1].content
+
+    status = get_router().status()
+    assert status["failovers"] == 1
+    fast = status["models"][FAST_MODEL]
+    assert fast["rate_limited"] >= 1
+    assert fast["health"].startswith("cooling down")
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+def test_cooling_model_is_routed_around(groq, fresh_agent):
+    groq.model_fail_status[FAST_MODEL] = 429
+    agent.run_agent(agent.get_agent(), agent.agent_messages("India"))
+
+    candidates, reason = get_router().route(ORCHESTRATION)
+
+    assert candidates == [STRONG_MODEL, FAST_MODEL]
+    assert "cooling down" in reason
+
+
+def test_rate_limited_model_recovers_through_a_probe():
+    clock = Clock()
+    router = ModelRouter("fast", "strong", clock=clock)
+    router.record("fast", 0.2, error=RateLimited("rate limit"))
+    clock.now += ROUTER_COOLDOWN
+    router.record("fast", 0.2, error=RateLimited("rate limit"))
+
+    # Error-rate EWMA is above the limit; healthy calls to the other model don't change that
+    for _ in range(100):
+        clock.now += 1
+        candidates, reason = router.route(ORCHESTRATION)
+        if candidates[0] == "fast":
+            break
+        router.record("strong", 0.5)
+    assert "probing fast" in reason
+    # Exactly one probe per interval
+    assert router.route(ORCHESTRATION)[0][0] == "strong"
+
+    router.record("fast", 0.2)
+
+    assert router.route(ORCHESTRATION) == (["fast", "strong"], "orchestration turn")
+    assert router.status()["models"]["fast"]["probes"] == 1
+
+
+def test_slow_model_recovers_through_a_probe():
+    clock = Clock()
+    router = ModelRouter("fast", "strong", clock=clock)
+    router.record("fast", ROUTER_SLOW_SECONDS + 1)
+    assert router.route(ORCHESTRATION)[0][0] == "strong"
+
+    clock.now += ROUTER_PROBE_INTERVAL
+    candidates, reason = router.route(ORCHESTRATION)
+    assert candidates[0] == "fast" and "slow" in reason
+    router.record("fast", 0.5)
+
+    assert router.route(ORCHESTRATION)[0][0] == "fast"
+
+
+def test_failed_probe_puts_the_model_back_into_cooldown():
+    clock = Clock()
+    router = ModelRouter("fast", "strong", clock=clock)
+    router.record("fast", 0.2, error=RateLimited("rate limit"))
+    router.record("fast", 0.2, error=RateLimited("rate limit"))
+    clock.now += 2 * ROUTER_COOLDOWN
+    assert router.route(ORCHESTRATION)[0][0] == "fast"
+
+    router.record("fast", 0.2, error=RateLimited("rate limit"))
+
+    candidates, reason = router.route(ORCHESTRATION)
+    assert candidates[0] == "strong" and "cooling down" in reason
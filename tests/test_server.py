@@ -0,0 +1,141 @@
+import json
+import threading
+import time
+from http.client import HTTPConnection
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+
+import server
+from agent import DEFAULT_MODEL
+from bench.fake_servers import FakeExchangeRateAPI
+from tools import currency, http
+from tools.breaker import CircuitBreaker
+from tools.quota import QuotaGuard
+from tools.router import FAST_MODEL
+
+
+@pytest.fixture
+def api(groq, monkeypatch):
+    # One worker and no backlog, so a single slow agent run saturates the pool
+    monkeypatch.setattr(server, "_pool", server.WorkerPool(1, 0))
+    httpd = server.serve("127.0.0.1", 0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_agent_request_is_shed_with_429_when_the_pool_is_full(api, groq):
+    groq.model_latency.update({FAST_MODEL: 0.5, DEFAULT_MODEL: 0.5})
+    slow = {}
+    first = threading.Thread(
+        target=lambda: slow.update(response=requests.get(f"{api}/intel/Japan?mode=agent&fresh=1", timeout=30))
+    )
+    first.start()
+    wait_for(lambda: server.get_pool().pending == 1)
+
+    response = requests.get(f"{api}/intel/India?mode=agent&fresh=1", timeout=30)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(server.RETRY_AFTER)
+    assert "saturated" in response.json()["error"]
+    first.join()
+    assert slow["response"].status_code == 200
+    assert slow["response"].json()["data"]["currency"]["code"] == "JPY"
+    assert server.get_pool().status()["rejected"] == 1
+
+
+def test_agent_batch_larger_than_the_pool_is_rejected_with_413(api, groq):
+    response = requests.post(f"{api}/batch/intel?mode=agent", json={"countries": ["Japan", "India"]}, timeout=10)
+
+    assert response.status_code == 413
+    assert groq.models == []
+
+
+def test_batch_above_the_batch_limit_is_rejected_with_413(api, monkeypatch):
+    monkeypatch.setattr(server, "SERVER_MAX_BATCH", 2)
+
+    response = requests.get(f"{api}/batch/fx?countries=Japan,India,Germany", timeout=10)
+
+    assert response.status_code == 413
+
+
+def read_ndjson(response):
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/x-ndjson"
+    return [json.loads(line) for line in response.iter_lines() if line]
+
+
+def test_agent_stream_is_ndjson_ending_with_the_answer(api, groq):
+    with requests.get(f"{api}/intel/Japan?mode=agent&stream=1&fresh=1", stream=True, timeout=30) as response:
+        events = read_ndjson(response)
+
+    types = [event["type"] for event in events]
+    assert "tool_start" in types and "tool_end" in types
+    assert types[-1] == "final"
+    assert events[-1]["country"] == "Japan"
+    assert events[-1]["data"]["currency"]["code"] == "JPY"
+
+
+def test_direct_stream_reports_a_failing_fx_provider(api, monkeypatch):
+    with FakeExchangeRateAPI(fail_status=503) as fx:
+        monkeypatch.setenv("EXCHANGERATE_API_KEY", "test-key")
+        monkeypatch.setattr(currency, "EXCHANGERATE_API_URL", fx.api_url)
+        monkeypatch.setattr(currency, "fx_breaker", CircuitBreaker("FX provider"))
+        monkeypatch.setattr(currency, "fx_quota", QuotaGuard(0))
+        monkeypatch.setattr(http, "MAX_RETRIES", 0)
+        currency._rates_cache.clear()
+        with requests.get(f"{api}/intel/Japan?stream=1", stream=True, timeout=30) as response:
+            events = read_ndjson(response)
+        currency._rates_cache.clear()
+
+    sections = {event["type"]: event for event in events}
+    assert set(sections) == {"currency", "stocks", "maps", "final"}
+    assert sections["currency"]["data"]["source"].startswith("Mock Data")
+    assert "api_error" in sections["final"]["data"]
+
+
+@pytest.mark.parametrize("path, countries", [
+    ("/batch/intel?countries=Japan,India&stream=1", ["Japan", "India"]),
+    ("/intel/Japan?stream=1", ["Japan"]),
+])
+def test_direct_streams_need_no_groq_key_or_agent_slot(api, monkeypatch, path, countries):
+    monkeypatch.delenv("GROQ_API_KEY")
+
+    with requests.get(f"{api}{path}", stream=True, timeout=30) as response:
+        events = read_ndjson(response)
+
+    finals = [event for event in events if event["type"] == "final"]
+    assert [event["country"] for event in finals] == countries
+    assert all(event["data"]["currency"]["code"] != "N/A" for event in finals)
+    assert server.get_pool().status()["completed"] == 0
+
+
+def test_direct_batch_without_streaming_needs_no_groq_key(api, monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY")
+
+    response = requests.get(f"{api}/batch/intel?countries=Japan,India", timeout=30)
+
+    assert response.status_code == 200
+
+
+def test_malformed_content_length_is_a_400(api):
+    connection = HTTPConnection(urlsplit(api).netloc, timeout=10)
+    connection.putrequest("POST", "/batch/fx")
+    connection.putheader("Content-Length", "abc")
+    connection.endheaders()
+    response = connection.getresponse()
+
+    assert response.status == 400
+    assert "Content-Length" in json.loads(response.read())["error"]
+    connection.close()
@@ -0,0 +1,39 @@
+import asyncio
+import json
+import threading
+
+from tools import stocks
+from tools.market_data import MOCK_SOURCE
+from tools.store import get_store
+
+
+def test_mock_quotes_are_not_recorded():
+    stocks._payload_cache.clear()
+    store = get_store()
+    version = store.version
+
+    result = json.loads(stocks.get_stock_data("Japan"))
+
+    assert result["source"] == MOCK_SOURCE
+    assert result["indices"]
+    assert store.version == version
+
+
+def test_async_lookup_builds_off_the_event_loop(monkeypatch):
+    stocks._payload_cache.clear()
+    threads = []
+    build = stocks._build_payload
+
+    def recording_build(country_key):
+        threads.append(threading.current_thread())
+        return build(country_key)
+
+    monkeypatch.setattr(stocks, "_build_payload", recording_build)
+
+    async def lookup():
+        return threading.current_thread(), json.loads(await stocks.aget_stock_data("Germany"))
+
+    loop_thread, result = asyncio.run(lookup())
+
+    assert result["exchange"]
+    assert threads and threads[0] is not loop_thread
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+import agent
+from tools import tracing
+
+
+def test_spans_are_noops_outside_a_trace_and_nest_inside_one():
+    assert tracing.span("tool.currency") is tracing.NOOP_SPAN
+
+    with tracing.trace("run", enabled=True, log=False) as run_trace:
+        with pytest.raises(ValueError):
+            with tracing.span("outer"):
+                with tracing.span("inner", country="Japan") as inner:
+                    inner.set(source="Mock Data")
+                raise ValueError("boom")
+
+    inner, outer = sorted(run_trace.records(), key=lambda record: record["name"])
+    assert inner["parent"] == "outer"
+    assert inner["attrs"] == {"country": "Japan", "source": "Mock Data"}
+    assert outer["attrs"]["error"] == "ValueError: boom"
+
+
+def test_agent_run_records_llm_turns_and_tools_in_the_trace_log(groq):
+    agent.clear_registry()
+    with tracing.trace("agent", enabled=True, country="Japan") as run_trace:
+        agent.run_agent(agent.get_agent(), agent.agent_messages("Japan"))
+    agent.clear_registry()
+
+    turns = [record for record in run_trace.records() if record["name"] == "llm.turn"]
+    assert [turn["attrs"]["model"] for turn in turns] == groq.models
+    assert turns[0]["attrs"]["tool_calls"] == 3
+    assert turns[-1]["attrs"]["tool_calls"] == 0
+    assert all(turn["attrs"]["prompt_tokens"] for turn in turns)
+    assert "tool.currency" in {record["name"] for record in run_trace.records()}
+
+    with open(tracing.TRACE_LOG_PATH, encoding="utf-8") as f:
+        logged = json.loads(f.readlines()[-1])
+    assert logged["trace_id"] == run_trace.id
+    assert logged["attrs"] == {"country": "Japan"}
+    assert logged["duration_ms"] == run_trace.duration_ms
+    assert len(logged["spans"]) == len(run_trace.spans)
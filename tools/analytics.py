@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+# Vectorized analytics over snapshot series from tools.store.
+# All functions take a pandas Series indexed by UTC timestamp.
+
+TRADING_DAYS = 252
+
+
+def daily_closes(series: pd.Series):
+    """
+    Last observation of each calendar day (UTC), empty days dropped.
+    """
+    if series.empty:
+        return series
+    return series.resample("1D").last().dropna()
+
+
+def daily_change(series: pd.Series):
+    """
+    Day-over-day percentage change of the daily closes.
+    """
+    return daily_closes(series).pct_change().dropna() * 100
+
+
+def latest_daily_change(series: pd.Series):
+    """
+    Percentage change of the latest value versus the previous day's close,
+    or None when there is less than two days of history.
+    """
+    closes = daily_closes(series)
+    if len(closes) < 2:
+        return None
+    return float((series.iloc[-1] / closes.iloc[-2] - 1) * 100)
+
+
+def moving_average(series: pd.Series, window: int = 7):
+    """
+    Simple moving average of the daily closes over `window` days.
+    """
+    return daily_closes(series).rolling(window, min_periods=1).mean()
+
+
+def rolling_volatility(series: pd.Series, window: int = 20, annualize: bool = True):
+    """
+    Rolling standard deviation of daily log returns, annualized by default (in %).
+    """
+    closes = daily_closes(series)
+    log_returns = np.log(closes).diff()
+    vol = log_returns.rolling(window, min_periods=2).std()
+    if annualize:
+        vol = vol * np.sqrt(TRADING_DAYS)
+    return vol * 100
+
+
+def summary_frame(series: pd.Series, window: int = 7):
+    """
+    Daily close, moving average, day-over-day change and volatility side by side.
+    """
+    return pd.DataFrame({
+        "close": daily_closes(series),
+        f"ma_{window}": moving_average(series, window),
+        "change_pct": daily_change(series),
+        "volatility_pct": rolling_volatility(series, max(window, 2))
+    })
+
+
+def format_change(pct):
+    """
+    Formats a percentage like the tools' change strings ("+1.2%").
+    """
+    return None if pct is None else f"{pct:+.2f}%"
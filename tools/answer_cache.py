@@ -0,0 +1,127 @@
+import hashlib
+import os
+import time
+
+from .countries import canonical_key
+from .sqlite_store import SharedStore, SQLiteStore
+
+# Disk-backed cache of final agent answers, shared by all sessions and processes.
+# Set ANSWER_CACHE_PATH to an empty string to disable it.
+DEFAULT_ANSWER_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "answers.sqlite3"
+)
+ANSWER_CACHE_PATH = os.getenv("ANSWER_CACHE_PATH", DEFAULT_ANSWER_CACHE_PATH)
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+ANSWER_CACHE_MAXSIZE = int(os.getenv("ANSWER_CACHE_MAXSIZE", "256"))
+
+# Answers embed market data, so the key also carries a freshness epoch: once the
+# wall clock crosses into the next window every cached answer misses, even if
+# its TTL has not run out (defaults to the FX cache TTL).
+ANSWER_FRESHNESS_WINDOW = float(os.getenv("ANSWER_FRESHNESS_WINDOW", os.getenv("FX_CACHE_TTL", "3600")))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    country TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS answers_by_access ON answers (accessed);
+"""
+
+
+def country_key(country: str):
+    """
+    Canonical cache key for a country: the registry key for an exact name,
+    alias or ISO code ("U.S.A.", "USA" -> "usa"), else the normalized input.
+    Fuzzy resolution is never used, so a near-miss ("North Korea") can't read
+    or overwrite another country's cached answer.
+    """
+    return canonical_key(country)
+
+
+def freshness_epoch(now: float = None):
+    now = time.time() if now is None else now
+    return int(now // ANSWER_FRESHNESS_WINDOW) if ANSWER_FRESHNESS_WINDOW > 0 else 0
+
+
+def answer_key(model: str, country: str, prompt_version, epoch: int = None):
+    """
+    Builds the cache key from model name, canonical country, prompt version and freshness epoch.
+    """
+    epoch = freshness_epoch() if epoch is None else epoch
+    raw = f"{model}|{country_key(country)}|{prompt_version}|{epoch}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class AnswerCache(SQLiteStore):
+    """
+    SQLite answer cache with TTL expiry and an LRU size cap (by last access).
+    """
+
+    schema = _SCHEMA
+
+    def __init__(self, path: str, ttl: float = ANSWER_CACHE_TTL, maxsize: int = ANSWER_CACHE_MAXSIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        super().__init__(path)
+
+    def get(self, key: str):
+        """
+        Returns (answer, age_seconds) for a live entry, or None. Expired entries are deleted.
+        """
+        now = time.time()
+        row = self._conn().execute("SELECT answer, created FROM answers WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        answer, created = row
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                if now - created > self.ttl:
+                    conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+                    return None
+                conn.execute("UPDATE answers SET accessed = ?, hits = hits + 1 WHERE key = ?", (now, key))
+        return answer, now - created
+
+    def set(self, key: str, answer: str, model: str = "", country: str = ""):
+        """
+        Stores an answer, then drops expired entries and the least recently used beyond maxsize.
+        """
+        now = time.time()
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO answers (key, model, country, answer, created, accessed, hits) "
+                    "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                    (key, model, country, answer, now, now)
+                )
+                conn.execute("DELETE FROM answers WHERE created < ?", (now - self.ttl,))
+                conn.execute(
+                    "DELETE FROM answers WHERE key NOT IN "
+                    "(SELECT key FROM answers ORDER BY accessed DESC LIMIT ?)",
+                    (self.maxsize,)
+                )
+
+    def clear(self):
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.execute("DELETE FROM answers")
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+
+_cache = SharedStore(AnswerCache, "Answer cache")
+
+
+def get_answer_cache():
+    """
+    Returns the process-wide AnswerCache, or None if disabled or unavailable.
+    """
+    return _cache.get(ANSWER_CACHE_PATH)
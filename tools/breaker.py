@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpen(RuntimeError):
+    """
+    Raised instead of calling a dependency while its circuit breaker is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker with closed, open and half-open states.
+
+    Closed: calls pass; outcomes go into a rolling window of the last `window`
+    calls. Once at least `min_calls` are recorded and the failure rate reaches
+    `failure_rate`, the breaker opens. Open: calls are refused immediately
+    (callers fall back) until `probe_interval` seconds have passed. Half-open:
+    a single probe call is let through; success closes the breaker, failure
+    re-opens it for another interval.
+    """
+
+    def __init__(self, name: str, failure_rate: float = 0.5, min_calls: int = 3, window: int = 10,
+                 probe_interval: float = 30.0, clock=time.monotonic):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.probe_interval = probe_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window)  # True = failure
+        self._state = CLOSED
+        self._opened_at = None
+        self._probing = False
+        self.last_error = None
+        self.opened = 0  # times the breaker tripped
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == OPEN and self._clock() - self._opened_at >= self.probe_interval:
+            self._state = HALF_OPEN
+            self._probing = False
+        return self._state
+
+    def _trip(self):
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._probing = False
+        self.opened += 1
+
+    def allow(self) -> bool:
+        """
+        True if a call may proceed. In half-open state only one probe is allowed at a time.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def release(self):
+        """
+        Gives back a half-open probe slot that was allowed but never used.
+        """
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            if self._current_state() == HALF_OPEN:
+                self._state = CLOSED
+                self._outcomes.clear()
+                self._probing = False
+            self._outcomes.append(False)
+
+    def record_failure(self, error: Exception = None):
+        with self._lock:
+            self.last_error = None if error is None else str(error)
+            state = self._current_state()
+            if state == HALF_OPEN:
+                self._trip()
+                return
+            self._outcomes.append(True)
+            if state == CLOSED and len(self._outcomes) >= self.min_calls:
+                if sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+                    self._trip()
+
+    def retry_in(self):
+        """
+        Seconds until the next probe is allowed (0 unless open).
+        """
+        with self._lock:
+            if self._current_state() != OPEN:
+                return 0.0
+            return max(0.0, self.probe_interval - (self._clock() - self._opened_at))
+
+    def describe(self):
+        state = self.state
+        if state == OPEN:
+            return f"{self.name} circuit open after repeated failures ({self.last_error}); next probe in {self.retry_in():.0f}s"
+        return f"{self.name} circuit {state}"
+
+    def status(self):
+        with self._lock:
+            state = self._current_state()
+            failures = sum(self._outcomes)
+            return {
+                "state": state,
+                "recent_calls": len(self._outcomes),
+                "recent_failures": failures,
+                "opened": self.opened,
+                "last_error": self.last_error
+            }
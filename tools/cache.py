@@ -0,0 +1,186 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class TTLCache:
+    """
+    Small thread-safe in-process cache with TTL expiry, LRU eviction and
+    stale-while-revalidate support.
+
+    Entries younger than `ttl` are fresh (or `ttl_for(key, value)`, if given,
+    sets the fresh period per entry when it is stored). Entries older than
+    that but younger than it plus `stale_ttl` are stale: they are still served, and a single
+    background refresh is started to replace them. Anything older is a miss.
+
+    Misses are single-flight: concurrent callers for the same key (sync or
+    async, any thread) share one in-flight load instead of each calling the
+    loader. `coalesced` counts the callers that waited on someone else's load.
+
+    `clock` returns the current time in seconds (injectable for tests).
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 32, stale_ttl: float = 0.0, ttl_for=None, clock=time.time):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.stale_ttl = stale_ttl
+        self.ttl_for = ttl_for
+        self.clock = clock
+        self._data = OrderedDict()  # key -> (value, stored_at, ttl)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._inflight = {}  # key -> Future of the load in progress
+        self.coalesced = 0
+
+    def get(self, key):
+        """
+        Returns (value, age_seconds, is_fresh) or None on a miss.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, stored_at, ttl = entry
+            age = self.clock() - stored_at
+            if age > ttl + self.stale_ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value, age, age <= ttl
+
+    def set(self, key, value, stored_at: float = None):
+        ttl = self.ttl if self.ttl_for is None else self.ttl_for(key, value)
+        with self._lock:
+            self._data[key] = (value, self.clock() if stored_at is None else stored_at, ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def refresh_in_background(self, key, loader) -> bool:
+        """
+        Starts one daemon thread that calls `loader()` and stores its result.
+        Returns False if a refresh for this key is already running.
+        Failures are swallowed so the stale entry keeps being served.
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+
+        def _run():
+            try:
+                self.set(key, loader())
+            except Exception as e:
+                print(f"Background refresh failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=_run, name=f"cache-refresh-{key}", daemon=True).start()
+        return True
+
+    def _claim(self, key):
+        # Returns (future, is_leader). Only the leader runs the loader.
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            return future, True
+
+    def _settle(self, key, future, value=None, error=None):
+        with self._lock:
+            self._inflight.pop(key, None)
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(value)
+
+    def _lead(self, key, future):
+        # Another leader may have filled the key between our miss and our claim
+        hit = self.get(key)
+        if hit is not None and hit[2]:
+            self._settle(key, future, hit[0])
+            return hit[0], hit[1]
+        return None
+
+    def get_or_load(self, key, loader):
+        """
+        Returns (value, status, age_seconds) where status is one of:
+        - "live":  value was just loaded (cache miss)
+        - "cache": fresh cached value
+        - "stale": expired value served while a background refresh runs
+        Exceptions from `loader` propagate on a miss (to every coalesced caller).
+        """
+        hit = self.get(key)
+        if hit is not None:
+            value, age, fresh = hit
+            if fresh:
+                return value, "cache", age
+            self.refresh_in_background(key, loader)
+            return value, "stale", age
+
+        future, leader = self._claim(key)
+        if not leader:
+            return future.result(), "live", 0.0
+        done = self._lead(key, future)
+        if done is not None:
+            return done[0], "cache", done[1]
+        try:
+            value = loader()
+        except BaseException as e:
+            # Includes cancellation, so waiters are never left hanging
+            self._settle(key, future, error=e)
+            raise
+        self.set(key, value)
+        self._settle(key, future, value)
+        return value, "live", 0.0
+
+    async def aget_or_load(self, key, aloader, loader):
+        """
+        Async counterpart of get_or_load(). `aloader` is awaited on a miss;
+        the sync `loader` is used for the background stale refresh.
+        """
+        hit = self.get(key)
+        if hit is not None:
+            value, age, fresh = hit
+            if fresh:
+                return value, "cache", age
+            self.refresh_in_background(key, loader)
+            return value, "stale", age
+
+        future, leader = self._claim(key)
+        if not leader:
+            # Shielded: a cancelled waiter (e.g. a deadline) must not cancel the shared load
+            return await asyncio.shield(asyncio.wrap_future(future)), "live", 0.0
+        done = self._lead(key, future)
+        if done is not None:
+            return done[0], "cache", done[1]
+
+        def finish(task):
+            # Runs when the load ends, even if the leader itself was cancelled meanwhile
+            if task.cancelled():
+                self._settle(key, future, error=asyncio.CancelledError())
+            elif task.exception() is not None:
+                self._settle(key, future, error=task.exception())
+            else:
+                self.set(key, task.result())
+                self._settle(key, future, task.result())
+
+        task = asyncio.ensure_future(aloader())
+        task.add_done_callback(finish)
+        return await asyncio.shield(task), "live", 0.0
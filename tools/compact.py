@@ -0,0 +1,43 @@
+import json
+
+# Model-facing encoding of tool results. The full JSON payload still goes to the
+# UI (as the ToolMessage artifact); the model only sees the fields it needs to
+# answer, serialized without whitespace. Tool results are re-sent on every
+# following ReAct turn, so each byte saved here is saved once per turn.
+# (api_error and exchange are kept so agent-mode answers can carry the API-failure
+# warning and exchange name that direct mode shows.)
+MODEL_FIELDS = {
+    "currency_tool": ("currency", "rates", "source", "api_error", "error"),
+    "stock_tool": ("exchange", "indices", "error"),
+}
+
+# Index records keep only what the answer schema asks for
+INDEX_FIELDS = ("name", "value", "change")
+
+
+def compact_payload(tool_name: str, payload: str):
+    """
+    Returns the compact model-facing text for a tool's JSON payload.
+    Non-JSON payloads (e.g. the maps URL) and unknown tools pass through unchanged.
+    """
+    fields = MODEL_FIELDS.get(tool_name)
+    if fields is None:
+        return payload
+    try:
+        data = json.loads(payload)
+    except (TypeError, json.JSONDecodeError):
+        return payload
+
+    compact = {field: data[field] for field in fields if field in data}
+    if "indices" in compact:
+        compact["indices"] = [
+            {field: idx[field] for field in INDEX_FIELDS if field in idx} for idx in compact["indices"]
+        ]
+    return json.dumps(compact, separators=(",", ":"), ensure_ascii=False)
+
+
+def compact_result(tool_name: str, payload: str):
+    """
+    (content, artifact) pair for tools declared with response_format="content_and_artifact".
+    """
+    return compact_payload(tool_name, payload), payload
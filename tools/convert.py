@@ -0,0 +1,127 @@
+import os
+import time
+from contextlib import ExitStack
+
+import numpy as np
+import pandas as pd
+
+from .currency import MOCK_RATE_MATRIX, STORED_SOURCE, get_rate_matrix
+from .tracing import span
+
+# Bulk (ledger) conversion: amounts in any supported currency converted to any
+# other with one lookup into the cached RateMatrix per row, vectorized in NumPy.
+# Currency codes are factorized first, so per-row string work is a hash lookup
+# and only the distinct codes are validated.
+
+# Expected CSV columns (override per call)
+AMOUNT_COLUMN = "amount"
+FROM_COLUMN = "from_ccy"
+TO_COLUMN = "to_ccy"
+
+# Rows per CSV chunk; memory stays bounded by one chunk regardless of file size
+CONVERT_CHUNK_ROWS = int(os.getenv("CONVERT_CHUNK_ROWS", "200000"))
+
+
+def conversion_matrix(api_key: str = None):
+    """
+    Returns (RateMatrix, source) for bulk conversion: the cached live anchor
+    quote if available, otherwise the mock quote.
+    """
+    api_key = api_key or os.getenv("EXCHANGERATE_API_KEY")
+    if api_key:
+        try:
+            matrix, cache_status, age = get_rate_matrix(api_key)
+            if cache_status == "stored":
+                return matrix, f"{STORED_SOURCE} ({age / 3600:.1f} h old)"
+            return matrix, f"Live API ({cache_status})"
+        except Exception as e:
+            print(f"API Error: {e}")
+    return MOCK_RATE_MATRIX, "Mock Data"
+
+
+def _code_indices(codes, matrix):
+    # Matrix row/column per element (-1 if unknown), normalizing only the distinct codes
+    labels, uniques = pd.factorize(pd.Series(codes, copy=False), use_na_sentinel=True)
+    lookup = np.array(
+        [matrix.index.get(str(code).strip().upper(), -1) for code in uniques] + [-1],
+        dtype=np.int64
+    )
+    # factorize marks missing values with -1, which picks the trailing -1 above
+    return lookup[labels]
+
+
+def convert_arrays(amounts, from_ccy, to_ccy, matrix=None):
+    """
+    Converts amounts[i] from from_ccy[i] to to_ccy[i]. Accepts lists, NumPy
+    arrays or pandas Series. Returns (converted, rates) float64 arrays; rows with
+    an unknown currency or a non-numeric amount are NaN.
+    """
+    if matrix is None:
+        matrix, _source = conversion_matrix()
+    amounts = pd.to_numeric(pd.Series(amounts, copy=False), errors="coerce").to_numpy(dtype=np.float64)
+    i = _code_indices(from_ccy, matrix)
+    j = _code_indices(to_ccy, matrix)
+    if not (len(amounts) == len(i) == len(j)):
+        raise ValueError("amounts, from_ccy and to_ccy must have the same length")
+
+    valid = (i >= 0) & (j >= 0)
+    rates = np.full(len(amounts), np.nan)
+    rates[valid] = matrix.matrix[i[valid], j[valid]]
+    return amounts * rates, rates
+
+
+def convert_frame(df, amount_col: str = AMOUNT_COLUMN, from_col: str = FROM_COLUMN,
+                  to_col: str = TO_COLUMN, matrix=None):
+    """
+    Returns a copy of df with "rate" and "converted" columns added.
+    """
+    missing = [col for col in (amount_col, from_col, to_col) if col not in df.columns]
+    if missing:
+        raise ValueError(f"missing column(s): {', '.join(missing)}")
+    converted, rates = convert_arrays(df[amount_col], df[from_col], df[to_col], matrix)
+    out = df.copy()
+    out["rate"] = rates
+    out["converted"] = converted
+    return out
+
+
+def convert_csv(source, destination, amount_col: str = AMOUNT_COLUMN, from_col: str = FROM_COLUMN,
+                to_col: str = TO_COLUMN, chunksize: int = CONVERT_CHUNK_ROWS, matrix=None):
+    """
+    Streams a CSV (path or file object) through convert_frame() chunk by chunk
+    and writes the result to destination (path or file object). One rate matrix
+    is used for the whole file. Returns run statistics.
+    """
+    source_label = "caller"
+    if matrix is None:
+        matrix, source_label = conversion_matrix()
+
+    rows = unconverted = chunks = 0
+    start = time.perf_counter()
+    with span("convert.csv", chunksize=chunksize) as convert_span, ExitStack() as stack:
+        if isinstance(destination, (str, os.PathLike)):
+            destination = stack.enter_context(open(destination, "w", newline=""))
+        reader = stack.enter_context(
+            pd.read_csv(source, chunksize=chunksize, dtype={from_col: str, to_col: str})
+        )
+        for chunk in reader:
+            out = convert_frame(chunk, amount_col, from_col, to_col, matrix)
+            out.to_csv(destination, header=chunks == 0, index=False)
+            rows += len(out)
+            unconverted += int(out["converted"].isna().sum())
+            chunks += 1
+        if chunks == 0:
+            # Header-only input that the reader yields no chunk for: the output still gets a header
+            empty = pd.DataFrame(columns=[amount_col, from_col, to_col])
+            convert_frame(empty, amount_col, from_col, to_col, matrix).to_csv(destination, index=False)
+        convert_span.set(rows=rows, chunks=chunks)
+
+    seconds = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "unconverted": unconverted,
+        "chunks": chunks,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(rows / seconds) if seconds else None,
+        "rate_source": source_label
+    }
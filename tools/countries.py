@@ -0,0 +1,242 @@
+import re
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+
+class Country:
+    """
+    Immutable record for one supported country. Uses __slots__ so the
+    registry stays compact and attribute access is fast.
+    """
+
+    __slots__ = ("key", "name", "iso2", "iso3", "currency", "exchange", "indices", "hq_query", "aliases")
+
+    def __init__(self, key, name, iso2, iso3, currency, exchange, indices, hq_query, aliases=()):
+        values = {
+            "key": key, "name": name, "iso2": iso2, "iso3": iso3, "currency": currency,
+            "exchange": exchange, "indices": tuple(indices), "hq_query": hq_query,
+            "aliases": tuple(aliases)
+        }
+        for field, value in values.items():
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, field, value):
+        raise AttributeError("Country records are immutable")
+
+    def __repr__(self):
+        return f"Country({self.key!r}, {self.currency})"
+
+
+# Mock market data: (index name, value, change)
+_COUNTRIES = (
+    Country(
+        "japan", "Japan", "JP", "JPN", "JPY",
+        "Tokyo Stock Exchange (TSE)",
+        [("Nikkei 225", 38915.00, "+1.2%"), ("TOPIX", 2650.50, "+0.8%")],
+        "Tokyo Stock Exchange",
+        ["tokyo", "osaka", "nippon"]
+    ),
+    Country(
+        "india", "India", "IN", "IND", "INR",
+        "Bombay Stock Exchange (BSE) / National Stock Exchange (NSE)",
+        [("NIFTY 50", 24500.00, "-0.5%"), ("SENSEX", 81000.00, "-0.4%")],
+        "Bombay Stock Exchange",
+        ["delhi", "new delhi", "mumbai", "bombay", "bangalore", "bengaluru", "chennai", "kolkata", "bharat"]
+    ),
+    Country(
+        "usa", "United States", "US", "USA", "USD",
+        "New York Stock Exchange (NYSE) / NASDAQ",
+        [("S&P 500", 5400.00, "+0.3%"), ("Dow Jones", 39000.00, "+0.1%"), ("NASDAQ", 17000.00, "+0.5%")],
+        "New York Stock Exchange",
+        ["us", "united states", "united states of america", "america", "nyc", "new york",
+         "new york city", "washington", "chicago", "wall street"]
+    ),
+    Country(
+        "south korea", "South Korea", "KR", "KOR", "KRW",
+        "Korea Exchange (KRX)",
+        [("KOSPI", 2700.00, "+0.9%"), ("KOSDAQ", 850.00, "+1.1%")],
+        "Korea Exchange Seoul",
+        ["korea", "republic of korea", "seoul", "busan"]
+    ),
+    Country(
+        "china", "China", "CN", "CHN", "CNY",
+        "Shanghai Stock Exchange (SSE)",
+        [("Shanghai Composite", 3050.00, "-0.2%"), ("Shenzhen Component", 9500.00, "-0.3%")],
+        "Shanghai Stock Exchange",
+        ["prc", "people's republic of china", "beijing", "shanghai", "shenzhen"]
+    ),
+    Country(
+        "uk", "United Kingdom", "GB", "GBR", "GBP",
+        "London Stock Exchange (LSE)",
+        [("FTSE 100", 8200.00, "+0.4%"), ("FTSE 250", 20100.00, "+0.6%")],
+        "London Stock Exchange",
+        ["united kingdom", "great britain", "britain", "england", "london", "scotland", "wales"]
+    ),
+    Country(
+        "germany", "Germany", "DE", "DEU", "EUR",
+        "Frankfurt Stock Exchange (FWB)",
+        [("DAX", 18500.00, "+0.5%"), ("MDAX", 26000.00, "+0.3%")],
+        "Frankfurt Stock Exchange",
+        ["deutschland", "berlin", "frankfurt", "munich"]
+    ),
+    Country(
+        "france", "France", "FR", "FRA", "EUR",
+        "Euronext Paris",
+        [("CAC 40", 7600.00, "+0.2%")],
+        "Euronext Paris",
+        ["paris", "lyon"]
+    ),
+    Country(
+        "italy", "Italy", "IT", "ITA", "EUR",
+        "Borsa Italiana",
+        [("FTSE MIB", 33500.00, "+0.4%")],
+        "Borsa Italiana Milan",
+        ["italia", "rome", "milan"]
+    ),
+    Country(
+        "spain", "Spain", "ES", "ESP", "EUR",
+        "Bolsa de Madrid (BME)",
+        [("IBEX 35", 11000.00, "+0.1%")],
+        "Bolsa de Madrid",
+        ["espana", "españa", "madrid", "barcelona"]
+    ),
+)
+
+COUNTRIES = {country.key: country for country in _COUNTRIES}
+
+# Minimum similarity for a typo-tolerant match (difflib ratio, 0..1)
+FUZZY_THRESHOLD = 0.8
+# Typos tolerated per word of a fuzzy match: one edit (insertion, deletion,
+# substitution or swap of neighbours) per this many letters, none under 4 letters
+TYPO_LETTERS_PER_EDIT = 4
+
+# Words that may surround a country name in a phrase ("india stock market",
+# "exchange rates of japan"). Any other leftover word could be part of a
+# different place ("north korea", "new south wales"), so the phrase is not
+# resolved to the name inside it.
+_FILLER_WORDS = frozenset({
+    "a", "an", "the", "of", "in", "for", "on", "about", "and", "me", "show", "give",
+    "stock", "stocks", "market", "markets", "exchange", "exchanges", "index", "indices", "indexes",
+    "share", "shares", "equity", "equities", "currency", "currencies", "rate", "rates", "fx", "forex",
+    "economy", "finance", "financial", "data", "info", "intelligence", "overview", "report",
+    "today", "latest", "current"
+})
+
+
+def normalize(text: str):
+    """
+    Lowercases, drops dots (U.S.A. -> usa) and collapses whitespace.
+    """
+    text = text.lower().replace(".", "")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _trigrams(text: str):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _build_indexes():
+    exact = {}
+    for country in _COUNTRIES:
+        names = (country.key, country.name, country.iso2, country.iso3) + country.aliases
+        for name in names:
+            exact.setdefault(normalize(name), country)
+
+    # Inverted trigram index: trigram -> aliases containing it
+    trigram_index = {}
+    for alias in exact:
+        for gram in _trigrams(alias):
+            trigram_index.setdefault(gram, set()).add(alias)
+
+    return exact, {gram: frozenset(aliases) for gram, aliases in trigram_index.items()}
+
+
+# Built once at import; read-only afterwards
+_EXACT, _TRIGRAM_INDEX = _build_indexes()
+
+
+def _fuzzy_match(query: str):
+    # Candidate aliases share at least one trigram; rank by shared trigram
+    # count, then confirm the best few with an edit-similarity ratio.
+    counts = {}
+    for gram in _trigrams(query):
+        for alias in _TRIGRAM_INDEX.get(gram, ()):
+            counts[alias] = counts.get(alias, 0) + 1
+
+    candidates = sorted(counts, key=counts.get, reverse=True)[:5]
+    best, best_score = None, FUZZY_THRESHOLD
+    for alias in candidates:
+        score = SequenceMatcher(None, query, alias).ratio()
+        if score >= best_score and _is_typo_of(query, alias):
+            best, best_score = alias, score
+    return _EXACT[best] if best else None
+
+
+def _edit_distance(a: str, b: str):
+    # Levenshtein distance that also counts a swap of neighbouring letters as one edit
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+    return current[-1]
+
+
+def _is_typo_of(query: str, alias: str):
+    # The whole query must be the alias with a few typos: same words, each
+    # within its edit allowance ("japna" -> japan, but not "indiana" -> india)
+    words, alias_words = query.split(" "), alias.split(" ")
+    if len(words) != len(alias_words):
+        return False
+    return all(
+        _edit_distance(word, alias_word) <= (len(alias_word) // TYPO_LETTERS_PER_EDIT if len(alias_word) >= 4 else 0)
+        for word, alias_word in zip(words, alias_words)
+    )
+
+
+@lru_cache(maxsize=1024)
+def _resolve_normalized(query: str):
+    # 1. Exact name, alias, city or ISO code
+    country = _EXACT.get(query)
+    if country:
+        return country
+
+    # 2. A known name inside a longer phrase ("india stock market"), as long as
+    # every other word is filler. Short aliases (ISO-2 codes) are skipped here
+    # so words like "in" don't match.
+    tokens = query.split(" ")
+    for size in range(len(tokens) - 1, 0, -1):
+        for start in range(len(tokens) - size + 1):
+            span = " ".join(tokens[start:start + size])
+            if len(span) >= 3 and span in _EXACT:
+                leftover = tokens[:start] + tokens[start + size:]
+                if all(word in _FILLER_WORDS for word in leftover):
+                    return _EXACT[span]
+
+    # 3. Typo tolerance ("japna", "germny", "londn")
+    if len(query) >= 4:
+        return _fuzzy_match(query)
+    return None
+
+
+def canonical_key(name: str):
+    """
+    Registry key for an exact name, alias or ISO code, else the normalized name.
+    No fuzzy matching, so bulk-loaded data never attaches to the wrong country.
+    """
+    country = _EXACT.get(normalize(name))
+    return country.key if country is not None else normalize(name)
+
+
+def resolve(name: str):
+    """
+    Resolves a country name, city, synonym or ISO code to its Country record.
+    Case-, punctuation- and typo-tolerant. Returns None if nothing matches.
+    """
+    if not name:
+        return None
+    return _resolve_normalized(normalize(name))
@@ -1,122 +1,405 @@
+import asyncio
 import json
 import os
-import requests
+import time
+from contextlib import contextmanager
+from functools import lru_cache
 
-def get_exchange_rates(country_name: str):
+from .breaker import CLOSED, CircuitBreaker, CircuitOpen
+from .cache import TTLCache
+from .countries import normalize, resolve
+from .http import get_json, aget_json
+from .quota import QuotaExceeded, QuotaGuard
+from .rates import RateMatrix
+from .store import get_store
+from .analytics import latest_daily_change, format_change, summary_frame
+from .tracing import span
+
+# One /latest/{anchor} response carries every rate we need, so all supported
+# countries are served from a single anchor quote.
+FX_ANCHOR_CURRENCY = os.getenv("FX_ANCHOR_CURRENCY", "USD")
+
+# Overridable so a local stub server can stand in for the real provider.
+EXCHANGERATE_API_URL = os.getenv("EXCHANGERATE_API_URL", "https://v6.exchangerate-api.com/v6")
+
+# Target output currencies shown for every country.
+TARGET_CURRENCIES = ("USD", "INR", "GBP", "EUR")
+
+# Display names for the supported base currencies.
+CURRENCY_NAMES = {
+    "USD": "US Dollar", "INR": "Indian Rupee", "GBP": "British Pound", "EUR": "Euro",
+    "JPY": "Japanese Yen", "KRW": "South Korean Won", "CNY": "Chinese Yuan"
+}
+
+# In-process cache of live rate matrices, keyed by base (anchor) currency.
+# ExchangeRate-API refreshes its free-tier data roughly once a day, so an
+# hour-long TTL plus a day of stale-while-revalidate is plenty.
+FX_CACHE_TTL = float(os.getenv("FX_CACHE_TTL", "3600"))
+FX_CACHE_STALE_TTL = float(os.getenv("FX_CACHE_STALE_TTL", "86400"))
+FX_CACHE_MAXSIZE = int(os.getenv("FX_CACHE_MAXSIZE", "32"))
+# Oldest persisted quote served when a live fetch is refused; older ones fall back to mock data
+FX_STORED_MAX_AGE = float(os.getenv("FX_STORED_MAX_AGE", str(FX_CACHE_TTL + FX_CACHE_STALE_TTL)))
+STORED_SOURCE = "Stored quote"
+
+# The provider publishes a new quote once a day and announces when
+# (time_next_update_unix): a quote stays fresh until then plus this grace
+# period, instead of being refetched every FX_CACHE_TTL.
+FX_UPDATE_GRACE = float(os.getenv("FX_UPDATE_GRACE", "120"))
+
+
+def _quote_ttl(anchor: str, _matrix):
+    next_update = provider_next_update.get(anchor)
+    remaining = None if next_update is None else next_update - time.time()
+    return remaining + FX_UPDATE_GRACE if remaining and remaining > 0 else FX_CACHE_TTL
+
+
+_rates_cache = TTLCache(
+    ttl=FX_CACHE_TTL, maxsize=FX_CACHE_MAXSIZE, stale_ttl=FX_CACHE_STALE_TTL, ttl_for=_quote_ttl
+)
+
+# Monthly request quota of the ExchangeRate-API plan (free tier: 1500; 0 disables
+# the guard). Live fetches are paced across the month and stop once only the
+# reserve is left, so the app falls back to cached/mock data before the
+# provider starts rejecting the key.
+FX_MONTHLY_QUOTA = int(os.getenv("FX_MONTHLY_QUOTA", "1500"))
+FX_QUOTA_RESERVE = float(os.getenv("FX_QUOTA_RESERVE", "0.1"))
+FX_QUOTA_BURST = int(os.getenv("FX_QUOTA_BURST", "5"))
+
+# Circuit breaker around the live provider. When enough recent fetches fail
+# (timeouts, invalid key, outages), live calls are skipped for a probe interval
+# and callers get the stored quote or mock data at once instead of each waiting
+# out the HTTP timeout.
+FX_BREAKER_FAILURE_RATE = float(os.getenv("FX_BREAKER_FAILURE_RATE", "0.5"))
+FX_BREAKER_MIN_CALLS = int(os.getenv("FX_BREAKER_MIN_CALLS", "3"))
+FX_BREAKER_WINDOW = int(os.getenv("FX_BREAKER_WINDOW", "10"))
+FX_BREAKER_PROBE_INTERVAL = float(os.getenv("FX_BREAKER_PROBE_INTERVAL", "30"))
+
+
+# Provider's announced next data update (unix time) per base, from the last response
+provider_next_update = {}
+
+
+def _persisted_fetch_count(month_start: float):
+    # Each successful live fetch is one anchor snapshot in the local history
+    store = get_store()
+    return store.count_snapshots(FX_ANCHOR_CURRENCY, "Live API", month_start) if store is not None else 0
+
+
+fx_quota = QuotaGuard(FX_MONTHLY_QUOTA, FX_QUOTA_RESERVE, FX_QUOTA_BURST, used_loader=_persisted_fetch_count)
+fx_breaker = CircuitBreaker(
+    "FX provider", FX_BREAKER_FAILURE_RATE, FX_BREAKER_MIN_CALLS, FX_BREAKER_WINDOW, FX_BREAKER_PROBE_INTERVAL
+)
+
+# Live fetches refused locally; callers degrade to the stored quote or mock data
+_UNAVAILABLE = (QuotaExceeded, CircuitOpen)
+
+
+def _latest_url(base_currency: str, api_key: str):
+    # User is using https://www.exchangerate-api.com/ (v6)
+    # URL format: https://v6.exchangerate-api.com/v6/YOUR-API-KEY/latest/USD
+    return f"{EXCHANGERATE_API_URL}/{api_key}/latest/{base_currency}"
+
+
+def _admit():
+    if not fx_breaker.allow():
+        raise CircuitOpen(fx_breaker.describe())
+    allowed, reason = fx_quota.acquire()
+    if not allowed:
+        fx_breaker.release()
+        raise QuotaExceeded(f"FX quota guard: {reason}")
+
+
+def _conversion_rates(data: dict):
+    # Some plans/endpoints report the remaining monthly requests
+    fx_quota.observe_remaining(data.get("requests_remaining"))
+    if data.get("error-type") == "quota-reached":
+        fx_quota.observe_remaining(0)
+    if data.get("time_next_update_unix"):
+        provider_next_update[data.get("base_code")] = float(data["time_next_update_unix"])
+    if data.get("result") != "success":
+        raise RuntimeError(f"API returned '{data.get('result')}': {data.get('error-type', 'Unknown error')}")
+    return data["conversion_rates"]
+
+
+@contextmanager
+def _live_fetch(base_currency: str, **attrs):
+    # Admission, tracing and breaker bookkeeping around one live fetch, for both transports
+    _admit()
+    try:
+        with span("fx.fetch", base=base_currency, **attrs):
+            yield
+    except Exception as e:
+        fx_breaker.record_failure(e)
+        raise
+    except BaseException:
+        # Cancelled mid-flight: not a provider failure, but free a half-open probe slot
+        fx_breaker.release()
+        raise
+    fx_breaker.record_success()
+
+
+def _fetch_live_rates(base_currency: str, api_key: str):
     """
-    Returns the official currency and exchange rates for a given country.
-    Target output currencies: USD, INR, GBP, EUR.
-    Uses EXCHANGERATE_API_KEY if available, otherwise Mock Data.
+    Fetches the full conversion_rates table for base_currency from ExchangeRate-API (v6).
+    Raises RuntimeError if the API does not report success.
     """
-    country_name = country_name.lower().strip()
-    
-    # 0. Canonical Aliases (City/Synonym -> Country Code/Key)
-    aliases = {
-        "london": "uk", "great britain": "uk", "england": "uk", "britain": "uk",
-        "united kingdom": "uk",
-        "nyc": "usa", "new york": "usa", "united states": "usa", "us": "usa", "america": "usa",
-        "tokyo": "japan", "delhi": "india", "mumbai": "india", "bangalore": "india",
-        "beijing": "china", "shanghai": "china", "seoul": "south korea",
-        "paris": "france", "berlin": "germany", "rome": "italy", "madrid": "spain"
-    }
-    country_name = aliases.get(country_name, country_name)
-    
-    # 1. Map Country to Currency Code
-    country_currency_map = {
-        "japan": "JPY", "india": "INR", "us": "USD", "usa": "USD", "united states": "USD",
-        "south korea": "KRW", "china": "CNY", "uk": "GBP", "united kingdom": "GBP",
-        "germany": "EUR", "france": "EUR", "italy": "EUR", "spain": "EUR"
-    }
-    
-    base_currency = country_currency_map.get(country_name)
-    
-    # 2. Try Live API if Key exists
-    api_key = os.getenv("EXCHANGERATE_API_KEY")
-    if api_key and base_currency:
+    with _live_fetch(base_currency):
+        return _conversion_rates(get_json(_latest_url(base_currency, api_key)))
+
+
+async def _afetch_live_rates(base_currency: str, api_key: str):
+    """
+    Async counterpart of _fetch_live_rates().
+    """
+    if fx_quota.needs_roll():
+        # The month's first quota check counts stored snapshots (SQLite): run it off the loop
+        await asyncio.to_thread(fx_quota.roll_month)
+    with _live_fetch(base_currency, mode="async"):
+        return _conversion_rates(await aget_json(_latest_url(base_currency, api_key)))
+
+
+def _record_and_build(anchor: str, rates: dict):
+    # Every live anchor quote is appended to the local snapshot history
+    store = get_store()
+    if store is not None:
         try:
-            # User is using https://www.exchangerate-api.com/ (v6)
-            # URL format: https://v6.exchangerate-api.com/v6/YOUR-API-KEY/latest/USD
-            url = f"https://v6.exchangerate-api.com/v6/{api_key}/latest/{base_currency}"
-            
-            response = requests.get(url, timeout=5)
-            data = response.json()
-            
-            if data.get("result") == "success":
-                rates = data["conversion_rates"]
-                
-                # Direct rates since we asked for the base currency
-                cross_rates = {
-                    "USD": rates.get("USD"),
-                    "INR": rates.get("INR"),
-                    "GBP": rates.get("GBP"),
-                    "EUR": rates.get("EUR")
-                }
-                
-                return json.dumps({
-                    "currency": base_currency,
-                    "rates": cross_rates,
-                    "source": "Live API"
-                })
-            else:
-                api_error = f"API returned '{data.get('result')}': {data.get('error-type', 'Unknown error')}"
+            store.record_rates(anchor, rates, "Live API")
         except Exception as e:
-            print(f"API Error: {e}")
-            # Capture the error to return it
-            api_error = str(e)
-            
-    # 3. Mock Data Fallback
-    # Added core Eurozone for fallback coverage
-    eur_rates = {"USD": 1.08, "INR": 90.50, "GBP": 0.85, "EUR": 1.0}
-    
-    data = {
-        "japan": {
-            "currency": "JPY",
-            "rates": {"USD": 0.0067, "INR": 0.56, "GBP": 0.0053, "EUR": 0.0062}
-        },
-        "india": {
-            "currency": "INR",
-            "rates": {"USD": 0.011, "INR": 1.0, "GBP": 0.0095, "EUR": 0.011}
-        },
-        "us": {
-            "currency": "USD",
-            "rates": {"USD": 1.0, "INR": 90.56, "GBP": 0.79, "EUR": 0.92}
-        },
-        "usa": {
-            "currency": "USD",
-            "rates": {"USD": 1.0, "INR": 90.56, "GBP": 0.79, "EUR": 0.92}
-        },
-        "united states": {
-            "currency": "USD",
-            "rates": {"USD": 1.0, "INR": 90.56, "GBP": 0.79, "EUR": 0.92}
-        },
-        "south korea": {
-            "currency": "KRW",
-            "rates": {"USD": 0.00075, "INR": 0.062, "GBP": 0.00059, "EUR": 0.00069}
-        },
-        "china": {
-            "currency": "CNY",
-            "rates": {"USD": 0.14, "INR": 11.5, "GBP": 0.11, "EUR": 0.13}
-        },
-        "uk": {
-            "currency": "GBP",
-            "rates": {"USD": 1.26, "INR": 105.4, "GBP": 1.0, "EUR": 1.17}
-        },
-        "united kingdom": {
-            "currency": "GBP",
-            "rates": {"USD": 1.26, "INR": 105.4, "GBP": 1.0, "EUR": 1.17}
-        },
-        "germany": {"currency": "EUR", "rates": eur_rates},
-        "france": {"currency": "EUR", "rates": eur_rates},
-        "italy": {"currency": "EUR", "rates": eur_rates},
-        "spain": {"currency": "EUR", "rates": eur_rates}
+            print(f"Snapshot write failed: {e}")
+    return RateMatrix(anchor, rates)
+
+
+def _require_api_key(api_key: str = None):
+    api_key = api_key or os.getenv("EXCHANGERATE_API_KEY")
+    if not api_key:
+        raise RuntimeError("EXCHANGERATE_API_KEY not set")
+    return api_key
+
+
+def _stored_matrix(anchor: str, error: Exception):
+    # Quota guard or circuit breaker refused a fetch: degrade to the newest persisted
+    # live quote, unless it is older than FX_STORED_MAX_AGE
+    store = get_store()
+    latest = store.latest_rates(anchor, "Live API") if store is not None else None
+    if latest is None:
+        raise error
+    ts, rates = latest
+    age = max(0.0, time.time() - ts)
+    if age > FX_STORED_MAX_AGE:
+        raise error
+    return RateMatrix(anchor, rates), "stored", age
+
+
+def get_rate_matrix(api_key: str = None):
+    """
+    Returns (RateMatrix, cache_status, age_seconds) for the live anchor quote.
+    cache_status is "live", "cache", "stale" or "stored" (persisted quote, at most
+    FX_STORED_MAX_AGE old, served because the quota guard or circuit breaker
+    refused a fetch). Raises if the live fetch fails.
+    """
+    api_key = _require_api_key(api_key)
+    anchor = FX_ANCHOR_CURRENCY
+    try:
+        return _rates_cache.get_or_load(
+            anchor, lambda: _record_and_build(anchor, _fetch_live_rates(anchor, api_key))
+        )
+    except _UNAVAILABLE as e:
+        return _stored_matrix(anchor, e)
+
+
+def refresh_rate_matrix(api_key: str = None):
+    """
+    Fetches the anchor quote now and replaces the cached matrix, even if it is
+    still fresh (used by the background prefetcher). Raises if the fetch fails.
+    """
+    api_key = _require_api_key(api_key)
+    anchor = FX_ANCHOR_CURRENCY
+    matrix = _record_and_build(anchor, _fetch_live_rates(anchor, api_key))
+    _rates_cache.set(anchor, matrix)
+    return matrix
+
+
+def rate_matrix_age():
+    """
+    Returns (age_seconds, currencies) of the cached live anchor quote, or (None, ()) if not cached.
+    """
+    hit = _rates_cache.get(FX_ANCHOR_CURRENCY)
+    if hit is None:
+        return None, ()
+    matrix, age, _fresh = hit
+    return age, matrix.currencies
+
+
+async def aget_rate_matrix(api_key: str = None):
+    """
+    Async counterpart of get_rate_matrix(); shares the same cache.
+    """
+    api_key = _require_api_key(api_key)
+    anchor = FX_ANCHOR_CURRENCY
+
+    async def aload():
+        rates = await _afetch_live_rates(anchor, api_key)
+        # Snapshot writes are blocking SQLite I/O: keep them off the shared event loop
+        return await asyncio.to_thread(_record_and_build, anchor, rates)
+
+    try:
+        return await _rates_cache.aget_or_load(
+            anchor, aload, lambda: _record_and_build(anchor, _fetch_live_rates(anchor, api_key))
+        )
+    except _UNAVAILABLE as e:
+        return await asyncio.to_thread(_stored_matrix, anchor, e)
+
+
+# Mock anchor quote (units per 1 USD) used when the live API is unavailable.
+MOCK_USD_RATES = {
+    "USD": 1.0, "INR": 90.56, "GBP": 0.79, "EUR": 0.92,
+    "JPY": 149.25, "KRW": 1333.0, "CNY": 7.14
+}
+MOCK_RATE_MATRIX = RateMatrix("USD", MOCK_USD_RATES)
+
+
+def resolve_currency(country_name: str):
+    """
+    Resolves a country/city name via the shared registry and returns
+    (country_key, currency_code or None).
+    """
+    country = resolve(country_name)
+    if country is None:
+        return normalize(country_name), None
+    return country.key, country.currency
+
+
+@lru_cache(maxsize=256)
+def _rate_changes(base_currency: str, store_version: int):
+    # Memoized per store version, so reads only happen after new snapshots land
+    store = get_store()
+    changes = {}
+    for target in TARGET_CURRENCIES:
+        if target == base_currency:
+            continue
+        pct = latest_daily_change(store.fx_series(FX_ANCHOR_CURRENCY, base_currency, target))
+        if pct is not None:
+            changes[target] = format_change(pct)
+    return changes
+
+
+def rate_changes(base_currency: str):
+    """
+    Day-over-day change of each target rate, computed from the local snapshot history.
+    """
+    store = get_store()
+    if store is None:
+        return {}
+    try:
+        return dict(_rate_changes(base_currency, store.version))
+    except Exception as e:
+        print(f"Snapshot read failed: {e}")
+        return {}
+
+
+def rate_history(base_currency: str, quote: str = "USD", window: int = 7, start: float = None):
+    """
+    Daily closes, moving average, change and volatility for base/quote from
+    the local snapshot history (empty DataFrame if there is none).
+    """
+    store = get_store()
+    if store is None:
+        return summary_frame(_empty_series(), window)
+    return summary_frame(store.fx_series(FX_ANCHOR_CURRENCY, base_currency, quote, start=start), window)
+
+
+def _empty_series():
+    import pandas as pd
+    return pd.Series([], index=pd.DatetimeIndex([], tz="UTC"), dtype="float64")
+
+
+def _refusal_reason():
+    # Why a live fetch was skipped: an open/half-open breaker, else the quota guard
+    if fx_breaker.state != CLOSED:
+        return fx_breaker.describe()
+    return f"FX quota guard: {fx_quota.last_refusal}"
+
+
+def _live_result(base_currency: str, matrix, cache_status: str, age: float, changes: dict):
+    # Cross rates derived from the anchor quote, no per-base request
+    result = {
+        "currency": base_currency,
+        "rates": matrix.cross_rates(base_currency, TARGET_CURRENCIES, digits=6),
+        "source": STORED_SOURCE if cache_status == "stored" else "Live API",
+        "cache": cache_status,
+        "age_seconds": round(age, 1)
     }
-    
-    if country_name in data:
-        result = data[country_name]
-        result["source"] = "Mock Data"
-        result["debug_info"] = "API failed or key missing"
-        if 'api_error' in locals():
-             result["api_error"] = api_error
+    if cache_status == "stored":
+        result["api_error"] = _refusal_reason()
+    if changes:
+        result["changes"] = changes
+    return json.dumps(result)
+
+
+def _fallback_result(country_name: str, base_currency: str, api_error: str = None):
+    # 3. Mock Data Fallback (derived from the mock anchor quote)
+    if base_currency in MOCK_RATE_MATRIX:
+        circuit = fx_breaker.state
+        result = {
+            "currency": base_currency,
+            "rates": MOCK_RATE_MATRIX.cross_rates(base_currency, TARGET_CURRENCIES, digits=4),
+            "source": "Mock Data" if circuit == CLOSED else f"Mock Data (circuit {circuit})",
+            "debug_info": "API failed or key missing"
+        }
+        if api_error is not None:
+            result["api_error"] = api_error
         return json.dumps(result)
     else:
         return json.dumps({"error": f"Country '{country_name}' not found in database.", "api_status": "failed"})
+
+
+def get_exchange_rates(country_name: str):
+    """
+    Returns the official currency and exchange rates for a given country.
+    Target output currencies: USD, INR, GBP, EUR.
+    Uses EXCHANGERATE_API_KEY if available, otherwise Mock Data.
+    """
+    with span("tool.currency", country=country_name) as tool_span:
+        country_name, base_currency = resolve_currency(country_name)
+        api_error = None
+        
+        # 2. Try Live API if Key exists
+        api_key = os.getenv("EXCHANGERATE_API_KEY")
+        if api_key and base_currency:
+            try:
+                matrix, cache_status, age = get_rate_matrix(api_key)
+                source = STORED_SOURCE if cache_status == "stored" else "Live API"
+                tool_span.set(base=base_currency, source=source, cache=cache_status)
+                return _live_result(base_currency, matrix, cache_status, age, rate_changes(base_currency))
+            except Exception as e:
+                print(f"API Error: {e}")
+                # Capture the error to return it
+                api_error = str(e)
+
+        tool_span.set(base=base_currency, source="Mock Data", api_error=api_error, circuit=fx_breaker.state)
+        return _fallback_result(country_name, base_currency, api_error)
+
+
+async def aget_exchange_rates(country_name: str):
+    """
+    Async variant of get_exchange_rates() backed by the pooled async HTTP client.
+    """
+    with span("tool.currency", country=country_name, mode="async") as tool_span:
+        country_name, base_currency = resolve_currency(country_name)
+        api_error = None
+
+        api_key = os.getenv("EXCHANGERATE_API_KEY")
+        if api_key and base_currency:
+            try:
+                matrix, cache_status, age = await aget_rate_matrix(api_key)
+                source = STORED_SOURCE if cache_status == "stored" else "Live API"
+                tool_span.set(base=base_currency, source=source, cache=cache_status)
+                # History reads (SQLite + pandas) run in a worker thread
+                changes = await asyncio.to_thread(rate_changes, base_currency)
+                return _live_result(base_currency, matrix, cache_status, age, changes)
+            except Exception as e:
+                print(f"API Error: {e}")
+                api_error = str(e)
+
+        tool_span.set(base=base_currency, source="Mock Data", api_error=api_error, circuit=fx_breaker.state)
+        return _fallback_result(country_name, base_currency, api_error)
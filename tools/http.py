@@ -0,0 +1,250 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import os
+import random
+import threading
+import time
+import weakref
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+# Shared outbound HTTP layer for the tools package.
+# One pooled keep-alive session per scheme+host, so repeated market-data calls
+# reuse TCP/TLS connections instead of opening a new one per request.
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "5"))
+POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+
+BACKOFF_BASE = 0.25
+BACKOFF_CAP = 4.0
+# Retry-After values above this are not worth blocking a dashboard render for.
+MAX_RETRY_AFTER = 10.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Only these are retried: resending a POST/PATCH could apply it twice
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"})
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+# Async clients are bound to the event loop that created them: loop -> {origin: client}
+_async_clients = weakref.WeakKeyDictionary()
+
+_background_loop = None
+_background_loop_lock = threading.Lock()
+
+
+def _origin(url: str):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_session(url: str):
+    """
+    Returns the shared requests.Session for the URL's scheme+host, creating it once.
+    """
+    origin = _origin(url)
+    with _sessions_lock:
+        session = _sessions.get(origin)
+        if session is None:
+            session = requests.Session()
+            # Retries are handled in request() so we can honor Retry-After with jitter
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+            session.mount(origin + "/", adapter)
+            _sessions[origin] = session
+        return session
+
+
+def close_sessions():
+    """
+    Closes and forgets every pooled session.
+    """
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def backoff_delay(attempt: int):
+    """
+    Full-jitter exponential backoff: uniform(0, min(cap, base * 2**attempt)).
+    """
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+def retry_after_seconds(response):
+    """
+    Parses a Retry-After header (delta-seconds or HTTP date). Returns None if absent/invalid.
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_budget(method: str, retries: int = None):
+    if method.upper() not in IDEMPOTENT_METHODS:
+        return 0
+    return MAX_RETRIES if retries is None else retries
+
+
+def request(method: str, url: str, timeout=None, retries: int = None, **kwargs):
+    """
+    Sends a request through the pooled session for the URL's host.
+
+    timeout is a (connect, read) tuple and defaults to HTTP_CONNECT_TIMEOUT /
+    HTTP_READ_TIMEOUT. Connection errors, timeouts and 429/5xx responses are
+    retried up to `retries` times with jittered exponential backoff, waiting
+    at least Retry-After when the server sends one. Non-idempotent methods
+    (POST, PATCH) are sent once. The last response is returned as-is (no
+    raise_for_status); the last exception is re-raised.
+    """
+    timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+    retries = _retry_budget(method, retries)
+    session = get_session(url)
+
+    for attempt in range(retries + 1):
+        last_attempt = attempt == retries
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if last_attempt:
+                raise
+            time.sleep(backoff_delay(attempt))
+            continue
+
+        if response.status_code not in RETRY_STATUSES or last_attempt:
+            return response
+
+        delay = backoff_delay(attempt)
+        retry_after = retry_after_seconds(response)
+        if retry_after is not None:
+            if retry_after > MAX_RETRY_AFTER:
+                return response
+            delay = max(delay, retry_after)
+        response.close()
+        time.sleep(delay)
+
+
+def get_json(url: str, **kwargs):
+    """
+    GETs url via request() and decodes the JSON body.
+    """
+    return request("GET", url, **kwargs).json()
+
+
+def get_async_client(url: str):
+    """
+    Returns the pooled httpx.AsyncClient for the URL's host on the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.setdefault(loop, {})
+    origin = _origin(url)
+    client = clients.get(origin)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            base_url=origin,
+            limits=httpx.Limits(max_connections=POOL_MAXSIZE, max_keepalive_connections=POOL_MAXSIZE)
+        )
+        clients[origin] = client
+    return client
+
+
+async def arequest(method: str, url: str, timeout=None, retries: int = None, **kwargs):
+    """
+    Async counterpart of request(): same pooling, timeouts and retry/backoff rules.
+    """
+    connect, read = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+    retries = _retry_budget(method, retries)
+    client = get_async_client(url)
+    httpx_timeout = httpx.Timeout(read, connect=connect)
+
+    for attempt in range(retries + 1):
+        last_attempt = attempt == retries
+        try:
+            response = await client.request(method, url, timeout=httpx_timeout, **kwargs)
+        except httpx.TransportError:
+            if last_attempt:
+                raise
+            await asyncio.sleep(backoff_delay(attempt))
+            continue
+
+        if response.status_code not in RETRY_STATUSES or last_attempt:
+            return response
+
+        delay = backoff_delay(attempt)
+        retry_after = retry_after_seconds(response)
+        if retry_after is not None:
+            if retry_after > MAX_RETRY_AFTER:
+                return response
+            delay = max(delay, retry_after)
+        await asyncio.sleep(delay)
+
+
+async def aget_json(url: str, **kwargs):
+    """
+    Async GET via arequest() that decodes the JSON body.
+    """
+    response = await arequest("GET", url, **kwargs)
+    return response.json()
+
+
+def _get_background_loop():
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None or _background_loop.is_closed():
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_background_loop.run_forever, name="tools-event-loop", daemon=True
+            ).start()
+        return _background_loop
+
+
+def submit_async(coro):
+    """
+    Schedules a coroutine on the shared background event loop and returns a
+    concurrent.futures.Future without blocking. The caller's contextvars
+    (e.g. the active trace) are carried over to the task.
+    """
+    loop = _get_background_loop()
+    context = contextvars.copy_context()
+    future = concurrent.futures.Future()
+
+    def _on_done(task):
+        if task.cancelled():
+            future.cancel()
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
+
+    def _start():
+        if future.set_running_or_notify_cancel():
+            task = context.run(loop.create_task, coro)
+            task.add_done_callback(_on_done)
+        else:
+            coro.close()
+
+    loop.call_soon_threadsafe(_start)
+    return future
+
+
+def run_async(coro, timeout: float = None):
+    """
+    Runs a coroutine on the shared background event loop and blocks for its result.
+    Using one long-lived loop keeps pooled async clients alive between calls,
+    which asyncio.run() (a new loop per call) would throw away.
+    """
+    return submit_async(coro).result(timeout)
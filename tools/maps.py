@@ -1,20 +1,28 @@
+from urllib.parse import quote_plus
+
+from .countries import COUNTRIES, resolve
+from .tracing import span
+
+MAPS_SEARCH_URL = "https://www.google.com/maps/search/?api=1&query="
+
+# Precomputed once from the shared country registry
+_HQ_LINKS = {key: MAPS_SEARCH_URL + quote_plus(country.hq_query) for key, country in COUNTRIES.items()}
+
 def get_maps_link(country_name: str):
     """
     Returns a Google Maps link for the main Stock Exchange HQ of the country.
     """
-    country_name = country_name.lower().strip()
-    
-    # Mock Data Source
-    data = {
-        "japan": "https://www.google.com/maps/search/?api=1&query=Tokyo+Stock+Exchange",
-        "india": "https://www.google.com/maps/search/?api=1&query=Bombay+Stock+Exchange",
-        "us": "https://www.google.com/maps/search/?api=1&query=New+York+Stock+Exchange",
-        "usa": "https://www.google.com/maps/search/?api=1&query=New+York+Stock+Exchange",
-        "united states": "https://www.google.com/maps/search/?api=1&query=New+York+Stock+Exchange",
-        "south korea": "https://www.google.com/maps/search/?api=1&query=Korea+Exchange+Seoul",
-        "china": "https://www.google.com/maps/search/?api=1&query=Shanghai+Stock+Exchange",
-        "uk": "https://www.google.com/maps/search/?api=1&query=London+Stock+Exchange",
-        "united kingdom": "https://www.google.com/maps/search/?api=1&query=London+Stock+Exchange"
-    }
-    
-    return data.get(country_name, "https://www.google.com/maps")
+    with span("tool.maps", country=country_name) as tool_span:
+        country = resolve(country_name)
+        
+        if country is None:
+            tool_span.set(error="not found")
+            return "https://www.google.com/maps"
+        return _HQ_LINKS[country.key]
+
+
+async def aget_maps_link(country_name: str):
+    """
+    Async variant of get_maps_link(). The data is a local lookup, so no I/O is awaited.
+    """
+    return get_maps_link(country_name)
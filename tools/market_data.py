@@ -0,0 +1,272 @@
+import abc
+import os
+import threading
+import time
+
+from .analytics import format_change
+from .countries import COUNTRIES, canonical_key
+from .tracing import span
+
+# Market-data providers behind get_stock_data(). Each provider answers
+# quotes(country_key) with a MarketQuotes record or None; the first provider
+# that knows a country wins, so local data files override the built-in registry.
+
+MOCK_SOURCE = "Mock Data"
+FILE_SOURCE = "Market Data File"
+
+# Directory of nightly index drops (*.csv / *.parquet); unset disables the file provider
+MARKET_DATA_DIR = os.getenv("MARKET_DATA_DIR", "")
+# Seconds between checks of the directory for changed files (on a background thread)
+MARKET_DATA_POLL = float(os.getenv("MARKET_DATA_POLL", "5"))
+
+# Columns in the data files; exchange and change are optional
+COUNTRY_COLUMN = "country"
+INDEX_COLUMN = "index"
+VALUE_COLUMN = "value"
+CHANGE_COLUMN = "change"
+EXCHANGE_COLUMN = "exchange"
+
+
+class MarketQuotes:
+    """
+    Index quotes for one country: exchange name, [(index name, value, change)] and source label.
+    """
+
+    __slots__ = ("exchange", "indices", "source")
+
+    def __init__(self, exchange, indices, source):
+        self.exchange = exchange
+        self.indices = tuple(indices)
+        self.source = source
+
+
+def _change_text(change):
+    # Numbers and numeric strings ("0.5", "-1.2%") are percentages and get the
+    # tools' "+0.50%" format; other text passes through, blanks become "n/a"
+    if isinstance(change, str):
+        text = change.strip()
+        try:
+            return format_change(float(text.rstrip("%")))
+        except ValueError:
+            return text or "n/a"
+    if isinstance(change, (int, float)) and not isinstance(change, bool) and change == change:
+        return format_change(float(change))
+    return "n/a"
+
+
+class MarketDataProvider(abc.ABC):
+    """
+    Interface for index quote sources.
+    """
+
+    name = "provider"
+    version = 0  # bumped whenever new data is swapped in
+
+    @abc.abstractmethod
+    def quotes(self, country_key: str):
+        """
+        Returns MarketQuotes for a registry key (or normalized name), or None if unknown.
+        """
+
+    def countries(self):
+        """
+        Country keys this provider can answer for.
+        """
+        return ()
+
+    def status(self):
+        return {"provider": self.name}
+
+
+class RegistryProvider(MarketDataProvider):
+    """
+    The static mock quotes from the shared country registry.
+    """
+
+    name = "registry"
+
+    def quotes(self, country_key: str):
+        country = COUNTRIES.get(country_key)
+        if country is None:
+            return None
+        return MarketQuotes(country.exchange, country.indices, MOCK_SOURCE)
+
+    def countries(self):
+        return COUNTRIES.keys()
+
+
+class FileProvider(MarketDataProvider):
+    """
+    Index quotes bulk-loaded from the CSV and Parquet files in a directory.
+
+    Rows are (country, index, value[, change][, exchange]); later files (by
+    name) override earlier ones for the same country and index. Files are read
+    once into an in-memory {country_key: MarketQuotes} index, so lookups are
+    O(1) dict hits. After start(), a daemon thread re-scans the directory every
+    `poll` seconds; if any file was added, removed or modified, the whole index
+    is rebuilt off to the side and swapped in atomically, so lookups never read
+    files. Until the first load finishes, lookups find nothing. Parquet files
+    are memory-mapped and only the needed columns are read.
+    """
+
+    name = "file"
+
+    def __init__(self, directory: str, poll: float = MARKET_DATA_POLL):
+        self.directory = directory
+        self.poll = poll
+        self._lock = threading.Lock()
+        self._index = {}
+        self._signature = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.loaded_at = None
+        self.reloads = 0
+        self.rows = 0
+        self.errors = {}
+
+    def _files(self):
+        try:
+            names = sorted(os.listdir(self.directory))
+        except OSError:
+            return []
+        return [
+            os.path.join(self.directory, name) for name in names
+            if name.lower().endswith((".csv", ".parquet", ".pq"))
+        ]
+
+    def _scan(self):
+        # (path, mtime, size) per data file; any difference triggers a reload
+        signature = []
+        for path in self._files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    @staticmethod
+    def _read(path):
+        import pandas as pd
+
+        if path.lower().endswith(".csv"):
+            return pd.read_csv(path)
+        import pyarrow.parquet as pq
+        # Only read the columns we index; memory_map avoids copying the file into a buffer first
+        schema = pq.read_schema(path, memory_map=True)
+        wanted = (COUNTRY_COLUMN, INDEX_COLUMN, VALUE_COLUMN, CHANGE_COLUMN, EXCHANGE_COLUMN)
+        columns = [name for name in wanted if name in schema.names]
+        return pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+    def _build(self, signature):
+        index, errors, rows = {}, {}, 0
+        keys = {}  # country spelling -> key, so each distinct name is normalized once
+        for path, _mtime, _size in signature:
+            try:
+                frame = self._read(path)
+            except Exception as e:
+                errors[os.path.basename(path)] = str(e)
+                continue
+            missing = [c for c in (COUNTRY_COLUMN, INDEX_COLUMN, VALUE_COLUMN) if c not in frame.columns]
+            if missing:
+                errors[os.path.basename(path)] = f"missing column(s): {', '.join(missing)}"
+                continue
+            n = len(frame)
+            countries = frame[COUNTRY_COLUMN].tolist()
+            names = frame[INDEX_COLUMN].tolist()
+            values = frame[VALUE_COLUMN].tolist()
+            changes = frame[CHANGE_COLUMN].tolist() if CHANGE_COLUMN in frame.columns else [None] * n
+            exchanges = frame[EXCHANGE_COLUMN].tolist() if EXCHANGE_COLUMN in frame.columns else [None] * n
+            for country, name, value, change, exchange in zip(countries, names, values, changes, exchanges):
+                if not isinstance(country, str) or value != value:  # blank country or NaN value
+                    continue
+                key = keys.get(country)
+                if key is None:
+                    key = keys[country] = canonical_key(country)
+                entry = index.setdefault(key, {"exchange": None, "indices": {}})
+                entry["indices"][str(name)] = (str(name), float(value), _change_text(change))
+                if isinstance(exchange, str):
+                    entry["exchange"] = exchange
+                rows += 1
+
+        quotes = {}
+        for key, entry in index.items():
+            exchange = entry["exchange"]
+            if exchange is None:
+                # Fall back to the registry's exchange name for known countries
+                country = COUNTRIES.get(key)
+                exchange = country.exchange if country is not None else "N/A"
+            quotes[key] = MarketQuotes(exchange, entry["indices"].values(), FILE_SOURCE)
+        return quotes, errors, rows
+
+    def start(self):
+        """
+        Starts the poll thread; it loads the directory right away, then every `poll` seconds.
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._watch, name="market-data-poll", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Market data reload failed: {e}")
+            self._stop.wait(self.poll)
+
+    def refresh(self) -> bool:
+        """
+        Re-scans the directory and, if any file changed, rebuilds and swaps in the index.
+        True if it reloaded. Called by the poll thread (or directly, e.g. in tests).
+        """
+        with self._lock:
+            signature = self._scan()
+            if signature == self._signature:
+                return False
+            with span("market_data.reload", files=len(signature)) as reload_span:
+                quotes, errors, rows = self._build(signature)
+                reload_span.set(countries=len(quotes), rows=rows, errors=len(errors))
+            self._index, self.errors, self.rows = quotes, errors, rows
+            self._signature = signature
+            self.loaded_at = time.time()
+            self.reloads += 1
+            self.version += 1
+            for name, error in errors.items():
+                print(f"Market data file {name} skipped: {error}")
+            return True
+
+    def quotes(self, country_key: str):
+        return self._index.get(country_key)
+
+    def countries(self):
+        return self._index.keys()
+
+    def status(self):
+        return {
+            "provider": self.name,
+            "directory": self.directory,
+            "files": len(self._signature or ()),
+            "countries": len(self._index),
+            "rows": self.rows,
+            "reloads": self.reloads,
+            "loaded_at": self.loaded_at,
+            "polling": self._thread is not None and self._thread.is_alive(),
+            "errors": self.errors
+        }
+
+
+def default_providers():
+    """
+    File provider (if MARKET_DATA_DIR is set) in front of the built-in registry.
+    """
+    providers = []
+    if MARKET_DATA_DIR:
+        providers.append(FileProvider(MARKET_DATA_DIR).start())
+    providers.append(RegistryProvider())
+    return providers
@@ -0,0 +1,157 @@
+import os
+import random
+import threading
+import time
+
+from .countries import COUNTRIES
+from .currency import (
+    FX_ANCHOR_CURRENCY, FX_CACHE_TTL, provider_next_update, rate_matrix_age, refresh_rate_matrix
+)
+from .stocks import STOCKS_CACHE_TTL, market_keys, refresh_stock_data, stock_cache_age
+
+# Optional background refresher that keeps every supported currency and index
+# payload in memory, so tool calls are cache hits instead of on-demand fetches.
+# One anchor quote covers all currencies, so a cycle is a single FX request.
+# Enabled by FX_PREFETCH=1 (see startup.py; app.py starts it from the warm-up thread).
+
+# Refresh this fraction of the way through a cache entry's TTL
+PREFETCH_LEAD = float(os.getenv("PREFETCH_LEAD", "0.9"))
+# Random delay added to every scheduled refresh, so processes do not synchronize
+PREFETCH_JITTER = float(os.getenv("PREFETCH_JITTER", "30"))
+# The provider publishes at time_next_update_unix; wait a little past it (the
+# cached quote stays fresh for FX_UPDATE_GRACE past it, which covers this plus jitter)
+PROVIDER_SETTLE_DELAY = 60.0
+MIN_INTERVAL = 30.0
+MAX_BACKOFF = float(os.getenv("PREFETCH_MAX_BACKOFF", "600"))
+
+
+class Prefetcher:
+    """
+    Daemon thread that refreshes the FX anchor quote and all index payloads.
+
+    Index payloads are local and rebuilt at PREFETCH_LEAD of their cache TTL.
+    The next FX refresh is just after the provider's announced next update
+    (about once a day), or PREFETCH_LEAD of the FX cache TTL when no update
+    time is known, plus jitter. FX failures back off
+    exponentially (full jitter, capped at MAX_BACKOFF) while the cache keeps
+    serving the last good quote.
+    """
+
+    def __init__(self, api_key: str = None):
+        self.api_key = api_key
+        self.refreshes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_refresh = None
+        self.last_error = None
+        self.next_refresh = None  # next FX refresh (unix time)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="fx-prefetch", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def running(self):
+        return self._thread.is_alive() and not self._stop.is_set()
+
+    def _api_key(self):
+        return self.api_key or os.getenv("EXCHANGERATE_API_KEY")
+
+    def refresh_indices(self):
+        for key in market_keys():
+            refresh_stock_data(key)
+
+    def refresh_fx(self):
+        refresh_rate_matrix(self._api_key())
+        self.refreshes += 1
+        self.consecutive_failures = 0
+        self.last_refresh = time.time()
+        self.last_error = None
+
+    def _fx_delay(self):
+        # Next provider update if announced (daily), else PREFETCH_LEAD of the cache TTL
+        next_update = provider_next_update.get(FX_ANCHOR_CURRENCY)
+        now = time.time()
+        if next_update and next_update > now:
+            delay = next_update - now + PROVIDER_SETTLE_DELAY
+        else:
+            delay = FX_CACHE_TTL * PREFETCH_LEAD
+        return max(MIN_INTERVAL, delay) + random.uniform(0, PREFETCH_JITTER)
+
+    def _fx_cycle(self):
+        try:
+            self.refresh_fx()
+            delay = self._fx_delay()
+        except Exception as e:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = str(e)
+            # Full-jitter exponential backoff between MIN_INTERVAL and MAX_BACKOFF
+            ceiling = min(MAX_BACKOFF, MIN_INTERVAL * 2 ** self.consecutive_failures)
+            delay = random.uniform(MIN_INTERVAL, max(MIN_INTERVAL, ceiling))
+        self.next_refresh = time.time() + delay
+
+    def _run(self):
+        index_interval = max(MIN_INTERVAL, STOCKS_CACHE_TTL * PREFETCH_LEAD)
+        while not self._stop.is_set():
+            try:
+                self.refresh_indices()
+            except Exception as e:
+                self.last_error = f"indices: {e}"
+            if self._api_key() and (self.next_refresh is None or time.time() >= self.next_refresh):
+                self._fx_cycle()
+            wake = time.time() + index_interval
+            if self.next_refresh is not None:
+                wake = min(wake, self.next_refresh)
+            self._stop.wait(max(0.0, wake - time.time()))
+
+    def health(self):
+        """
+        Health metrics: refresh counters, last error, and last-refresh age per
+        supported currency and per country's index payload (None = not cached).
+        """
+        fx_age, cached_codes = rate_matrix_age()
+        currencies = sorted({country.currency for country in COUNTRIES.values()})
+        index_ages = {key: stock_cache_age(key) for key in market_keys()}
+        now = time.time()
+        return {
+            "running": self.running,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "last_refresh_age": None if self.last_refresh is None else round(now - self.last_refresh, 1),
+            "next_refresh_in": None if self.next_refresh is None else round(self.next_refresh - now, 1),
+            "currency_age": {
+                code: round(fx_age, 1) if fx_age is not None and code in cached_codes else None
+                for code in currencies
+            },
+            "index_age": {key: None if age is None else round(age, 1) for key, age in index_ages.items()}
+        }
+
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+
+def start_prefetcher():
+    """
+    Starts the process-wide prefetcher once and returns it (callers check FX_PREFETCH).
+    """
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = Prefetcher().start()
+        return _prefetcher
+
+
+def prefetch_health():
+    """
+    Health of the running prefetcher, or None if it was never started.
+    """
+    return None if _prefetcher is None else _prefetcher.health()
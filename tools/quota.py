@@ -0,0 +1,152 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+
+class QuotaExceeded(RuntimeError):
+    """
+    Raised instead of calling a metered API when the quota guard refuses the request.
+    """
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `capacity` tokens, refilled continuously at `rate` per second.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def seconds_until(self, tokens: float = 1.0):
+        self._refill()
+        missing = tokens - self.tokens
+        return 0.0 if missing <= 0 else missing / self.rate
+
+
+def _month_start(now: float):
+    moment = datetime.fromtimestamp(now, timezone.utc)
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0).timestamp()
+
+
+class QuotaGuard:
+    """
+    Admission control for an API with a monthly request quota.
+
+    A token bucket paces requests so the quota lasts the month (bursts of up to
+    `burst`), and a hard reserve (`reserve` fraction of the quota) is never
+    spent: once usage reaches quota * (1 - reserve), every request is refused so
+    callers degrade to cached or mock data *before* the provider starts failing.
+
+    Usage is counted locally per UTC calendar month. `used_loader(month_start)`
+    can seed the count (e.g. from persisted history) and observe_remaining()
+    accepts a provider-reported remaining count when one is available.
+    A quota of 0 disables the guard.
+    """
+
+    def __init__(self, monthly_quota: int, reserve: float = 0.1, burst: int = 5,
+                 used_loader=None, clock=time.time):
+        self.monthly_quota = monthly_quota
+        self.reserve = reserve
+        self.used_loader = used_loader
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._month = None
+        self.used = 0
+        self.refused = 0
+        self.last_refusal = None
+        seconds_per_month = 30 * 24 * 3600
+        self.bucket = TokenBucket(monthly_quota / seconds_per_month, burst, clock) if monthly_quota else None
+
+    @property
+    def enabled(self):
+        return self.monthly_quota > 0
+
+    @property
+    def limit(self):
+        # Requests we allow ourselves this month; the rest is the reserve
+        return int(self.monthly_quota * (1 - self.reserve))
+
+    def _roll_month(self):
+        month = _month_start(self._clock())
+        if month != self._month:
+            self._month = month
+            self.used = 0
+            if self.used_loader is not None:
+                try:
+                    self.used = int(self.used_loader(month))
+                except Exception as e:
+                    print(f"Quota usage seed failed: {e}")
+
+    def needs_roll(self) -> bool:
+        """
+        True if the next check starts a new month (and so runs used_loader).
+        """
+        return self.enabled and _month_start(self._clock()) != self._month
+
+    def roll_month(self):
+        """
+        Moves usage into the current month now, seeding it from used_loader if
+        needed. acquire() does this itself; async callers can run it in a
+        thread first so the seed query never blocks an event loop.
+        """
+        if self.enabled:
+            with self._lock:
+                self._roll_month()
+
+    def acquire(self):
+        """
+        Reserves one request. Returns (allowed, reason); reason is None when allowed.
+        """
+        if not self.enabled:
+            return True, None
+        with self._lock:
+            self._roll_month()
+            if self.used >= self.limit:
+                reason = f"monthly quota reserve reached ({self.used}/{self.monthly_quota} used)"
+            elif not self.bucket.try_acquire():
+                reason = f"rate limited, next request allowed in {self.bucket.seconds_until():.0f}s"
+            else:
+                self.used += 1
+                return True, None
+            self.refused += 1
+            self.last_refusal = reason
+            return False, reason
+
+    def observe_remaining(self, remaining: int):
+        """
+        Syncs local usage with a provider-reported remaining request count.
+        """
+        if not self.enabled or remaining is None:
+            return
+        with self._lock:
+            self._roll_month()
+            self.used = max(self.used, self.monthly_quota - int(remaining))
+
+    def status(self):
+        with self._lock:
+            if self.enabled:
+                self._roll_month()
+            return {
+                "enabled": self.enabled,
+                "monthly_quota": self.monthly_quota,
+                "used": self.used,
+                "limit": self.limit if self.enabled else None,
+                "refused": self.refused,
+                "last_refusal": self.last_refusal
+            }
@@ -0,0 +1,53 @@
+import numpy as np
+
+
+class RateMatrix:
+    """
+    Currency x currency conversion matrix derived from a single anchor quote.
+
+    Built from one `/latest/{anchor}` response (units of each currency per
+    1 unit of the anchor), so any pair can be answered by division without
+    another API call. `matrix[i, j]` is the number of units of currency j
+    for 1 unit of currency i.
+    """
+
+    def __init__(self, anchor: str, anchor_rates: dict):
+        rates = {code: float(value) for code, value in anchor_rates.items() if value}
+        rates[anchor] = 1.0
+
+        self.anchor = anchor
+        self.currencies = tuple(sorted(rates))
+        self.index = {code: i for i, code in enumerate(self.currencies)}
+
+        per_anchor = np.array([rates[code] for code in self.currencies], dtype=np.float64)
+        self.per_anchor = per_anchor
+        self.matrix = per_anchor[np.newaxis, :] / per_anchor[:, np.newaxis]
+
+    def __contains__(self, code):
+        return code in self.index
+
+    def __len__(self):
+        return len(self.currencies)
+
+    def rate(self, from_code: str, to_code: str):
+        """
+        Returns units of to_code per 1 unit of from_code, or None if either is unknown.
+        """
+        i = self.index.get(from_code)
+        j = self.index.get(to_code)
+        if i is None or j is None:
+            return None
+        return float(self.matrix[i, j])
+
+    def cross_rates(self, base: str, targets, digits: int = None):
+        """
+        Returns {target: rate} for 1 unit of base. Unknown targets map to None.
+        If digits is given, rates are rounded to that many significant digits.
+        """
+        rates = {}
+        for target in targets:
+            value = self.rate(base, target)
+            if value is not None and digits:
+                value = float(f"{value:.{digits}g}")
+            rates[target] = value
+        return rates
@@ -0,0 +1,182 @@
+import os
+import threading
+import time
+
+# Latency-aware routing between a small fast model and the large model.
+# Orchestration turns (deciding which tools to call) go to the fast model;
+# synthesis turns (writing the answer from tool results) go to the large one.
+# Every call's latency and outcome feed per-model EWMAs, and a model that is
+# erroring, rate-limited or slow is routed around until it recovers.
+FAST_MODEL = os.getenv("FAST_MODEL", "llama-3.1-8b-instant")
+STRONG_MODEL = "llama-3.3-70b-versatile"  # agent.DEFAULT_MODEL
+
+ORCHESTRATION = "orchestration"
+SYNTHESIS = "synthesis"
+
+ROUTER_EWMA_ALPHA = float(os.getenv("ROUTER_EWMA_ALPHA", "0.3"))
+# A model whose latency EWMA exceeds this (seconds) is treated as slow
+ROUTER_SLOW_SECONDS = float(os.getenv("ROUTER_SLOW_SECONDS", "8"))
+# A model whose error-rate EWMA exceeds this is treated as failing
+ROUTER_MAX_ERROR_RATE = float(os.getenv("ROUTER_MAX_ERROR_RATE", "0.5"))
+# Seconds a model is skipped after an error (doubles per consecutive error)
+ROUTER_COOLDOWN = float(os.getenv("ROUTER_COOLDOWN", "15"))
+ROUTER_MAX_COOLDOWN = 300.0
+# A model avoided for its averages (not a cooldown) gets one probe call this
+# often, so its stats can recover once it stops being preferred
+ROUTER_PROBE_INTERVAL = float(os.getenv("ROUTER_PROBE_INTERVAL", "15"))
+
+
+def is_rate_limit(error: Exception):
+    """
+    True for provider rate-limit errors (HTTP 429), whatever client raised them.
+    """
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or "rate limit" in str(error).lower()
+
+
+class ModelStats:
+    """
+    EWMA latency and error rate for one model, plus an error cooldown.
+    """
+
+    def __init__(self, model: str, clock=time.monotonic):
+        self.model = model
+        self._clock = clock
+        self.calls = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.latency = None  # EWMA seconds, successful calls only
+        self.error_rate = 0.0  # EWMA of 0/1 outcomes
+        self.consecutive_errors = 0
+        self.cooldown_until = 0.0
+        self.last_call = None  # clock time of the last call, or of the last probe handed out
+        self.probes = 0
+        self.last_error = None
+
+    def record(self, latency: float, error: Exception = None, alpha: float = ROUTER_EWMA_ALPHA):
+        self.calls += 1
+        self.last_call = self._clock()
+        self.error_rate += alpha * ((error is not None) - self.error_rate)
+        if error is None:
+            self.latency = latency if self.latency is None else self.latency + alpha * (latency - self.latency)
+            self.consecutive_errors = 0
+            return
+        self.errors += 1
+        self.rate_limited += is_rate_limit(error)
+        self.consecutive_errors += 1
+        self.last_error = str(error)[:200]
+        cooldown = min(ROUTER_MAX_COOLDOWN, ROUTER_COOLDOWN * 2 ** (self.consecutive_errors - 1))
+        self.cooldown_until = self._clock() + cooldown
+
+    def health(self):
+        """
+        None if healthy, else why the model should be avoided.
+        """
+        now = self._clock()
+        if now < self.cooldown_until:
+            return f"cooling down after error ({self.cooldown_until - now:.0f}s left)"
+        if self.error_rate > ROUTER_MAX_ERROR_RATE:
+            return f"error rate {self.error_rate:.2f}"
+        if self.latency is not None and self.latency > ROUTER_SLOW_SECONDS:
+            return f"slow ({self.latency:.1f}s avg)"
+        return None
+
+    def take_probe(self):
+        """
+        True (and starts a new interval) if an avoided model is due a probe call.
+        Never during a cooldown.
+        """
+        now = self._clock()
+        if now < self.cooldown_until:
+            return False
+        if self.last_call is not None and now - self.last_call < ROUTER_PROBE_INTERVAL:
+            return False
+        self.last_call = now
+        self.probes += 1
+        return True
+
+    def status(self):
+        return {
+            "calls": self.calls,
+            "probes": self.probes,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "latency_ms": None if self.latency is None else round(self.latency * 1000, 1),
+            "error_rate": round(self.error_rate, 3),
+            "health": self.health() or "ok",
+            "last_error": self.last_error
+        }
+
+
+class ModelRouter:
+    """
+    Picks the model order for a turn and learns from the outcomes.
+
+    route(kind) returns (candidates, reason): the preferred model for the turn
+    kind first, unless it is unhealthy, in which case healthy models come first
+    and unhealthy ones are kept only as a last resort. An unhealthy preferred
+    model is put first again for one probe call every ROUTER_PROBE_INTERVAL
+    seconds after its cooldown, so its averages can recover.
+    """
+
+    def __init__(self, fast: str = FAST_MODEL, strong: str = STRONG_MODEL, clock=time.monotonic):
+        self.fast = fast
+        self.strong = strong
+        self._lock = threading.Lock()
+        self._stats = {model: ModelStats(model, clock) for model in (fast, strong)}
+        self.decisions = {ORCHESTRATION: 0, SYNTHESIS: 0}
+        self.failovers = 0
+
+    @property
+    def models(self):
+        return tuple(self._stats)
+
+    def preference(self, kind: str):
+        if kind == ORCHESTRATION:
+            return [self.fast, self.strong]
+        return [self.strong, self.fast]
+
+    def route(self, kind: str):
+        with self._lock:
+            self.decisions[kind] = self.decisions.get(kind, 0) + 1
+            preferred = self.preference(kind)
+            health = {model: self._stats[model].health() for model in preferred}
+            healthy = [model for model in preferred if health[model] is None]
+            candidates = healthy + [model for model in preferred if health[model] is not None]
+            if candidates[0] != preferred[0] and self._stats[preferred[0]].take_probe():
+                return preferred, f"{kind} turn; probing {preferred[0]} ({health[preferred[0]]})"
+            if candidates[0] == preferred[0]:
+                reason = f"{kind} turn"
+            else:
+                reason = f"{kind} turn; {preferred[0]} avoided: {health[preferred[0]]}"
+            return candidates, reason
+
+    def record(self, model: str, latency: float, error: Exception = None, failover: bool = False):
+        with self._lock:
+            self._stats[model].record(latency, error)
+            self.failovers += failover
+
+    def status(self):
+        with self._lock:
+            return {
+                "fast": self.fast,
+                "strong": self.strong,
+                "decisions": dict(self.decisions),
+                "failovers": self.failovers,
+                "models": {model: stats.status() for model, stats in self._stats.items()}
+            }
+
+
+_routers = {}
+_routers_lock = threading.Lock()
+
+
+def get_router(fast: str = FAST_MODEL, strong: str = STRONG_MODEL):
+    """
+    Process-wide router for a (fast, strong) pair, so stats survive across runs and sessions.
+    """
+    with _routers_lock:
+        router = _routers.get((fast, strong))
+        if router is None:
+            router = _routers[(fast, strong)] = ModelRouter(fast, strong)
+        return router
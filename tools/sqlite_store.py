@@ -0,0 +1,60 @@
+import os
+import sqlite3
+import threading
+
+
+class SQLiteStore:
+    """
+    Base for the local SQLite files (snapshot history, answer cache).
+    One connection per thread in WAL mode; writes are serialized with a lock.
+    Subclasses set `schema`, which is applied when the file is opened.
+    """
+
+    schema = ""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._write_lock:
+            self._conn().executescript(self.schema)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+class SharedStore:
+    """
+    Process-wide instance of a SQLiteStore subclass, opened on first use.
+    get() returns None if the path is empty (disabled) or the file could not be opened.
+    """
+
+    def __init__(self, factory, label: str):
+        self.factory = factory
+        self.label = label
+        self.instance = None
+        self.failed = False
+        self._lock = threading.Lock()
+
+    def get(self, path: str):
+        if not path or self.failed:
+            return None
+        with self._lock:
+            if self.instance is None:
+                try:
+                    self.instance = self.factory(path)
+                except (sqlite3.Error, OSError) as e:
+                    print(f"{self.label} unavailable: {e}")
+                    self.failed = True
+                    return None
+            return self.instance
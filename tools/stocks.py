@@ -1,82 +1,156 @@
+import asyncio
 import json
+import os
+
+from .cache import TTLCache
+from .countries import canonical_key, resolve
+from .market_data import MOCK_SOURCE, default_providers
+from .store import get_store
+from .analytics import latest_daily_change, format_change
+from .tracing import span
+
+# Assembled payloads per country. Identical index values are not re-recorded
+# within SNAPSHOT_MIN_INTERVAL anyway, so the same window is a safe default.
+STOCKS_CACHE_TTL = float(os.getenv("STOCKS_CACHE_TTL", os.getenv("SNAPSHOT_MIN_INTERVAL", "300")))
+
+_payload_cache = TTLCache(ttl=STOCKS_CACHE_TTL, maxsize=int(os.getenv("STOCKS_CACHE_MAXSIZE", "256")))
+
+# Providers in priority order (see market_data.py)
+_providers = default_providers()
+
+
+def get_providers():
+    return list(_providers)
+
+
+def set_providers(providers):
+    """
+    Replaces the market-data providers (first match wins) and drops cached payloads.
+    """
+    global _providers
+    _providers = list(providers)
+    _payload_cache.clear()
+
+
+_provider_versions = ()
+
+
+def _check_providers():
+    # Providers reload on their own threads; one that swapped in new data
+    # invalidates every assembled payload. No file I/O happens here.
+    global _provider_versions
+    versions = tuple(provider.version for provider in _providers)
+    if versions != _provider_versions:
+        _provider_versions = versions
+        _payload_cache.clear()
+
+
+def _quotes(country_key: str):
+    for provider in _providers:
+        quotes = provider.quotes(country_key)
+        if quotes is not None:
+            return quotes
+    return None
+
+
+def market_key(country_name: str):
+    """
+    Key under which the providers know a country: an exact name/alias match,
+    else the registry's typo-tolerant resolution. None if no provider has it.
+    """
+    if not country_name:
+        return None
+    key = canonical_key(country_name)
+    if _quotes(key) is not None:
+        return key
+    country = resolve(country_name)
+    if country is not None and _quotes(country.key) is not None:
+        return country.key
+    return None
+
+
+def market_keys():
+    """
+    Every country key some provider can answer for, registry countries first.
+    """
+    keys = {}
+    for provider in reversed(_providers):
+        keys.update(dict.fromkeys(provider.countries()))
+    return list(keys)
+
+
+def _with_local_changes(country_key: str, indices, source: str):
+    """
+    Appends the snapshot to the local history and, where there is real
+    (non-mock) history, replaces each change string with a locally computed
+    day-over-day delta. Mock quotes are static, so they are not recorded.
+    """
+    store = get_store()
+    if store is None or source == MOCK_SOURCE:
+        return indices
+    try:
+        store.record_indices(country_key, indices, source)
+        for idx in indices:
+            series = store.index_series(country_key, idx["name"], exclude_source=MOCK_SOURCE)
+            pct = latest_daily_change(series)
+            if pct is not None:
+                idx["change"] = format_change(pct)
+    except Exception as e:
+        print(f"Snapshot store error: {e}")
+    return indices
+
+def _build_payload(country_key: str):
+    quotes = _quotes(country_key)
+    indices = [
+        {"name": name, "value": value, "change": change}
+        for name, value, change in quotes.indices
+    ]
+    return json.dumps({
+        "exchange": quotes.exchange,
+        "indices": _with_local_changes(country_key, indices, quotes.source),
+        "source": quotes.source
+    })
+
+
+def refresh_stock_data(country_key: str):
+    """
+    Rebuilds and caches the payload for a provider country key (used by the prefetcher).
+    """
+    _check_providers()
+    payload = _build_payload(country_key)
+    _payload_cache.set(country_key, payload)
+    return payload
+
+
+def stock_cache_age(country_key: str):
+    """
+    Age in seconds of the cached payload for a country, or None if not cached.
+    """
+    hit = _payload_cache.get(country_key)
+    return None if hit is None else hit[1]
+
 
 def get_stock_data(country_name: str):
     """
     Returns major stock indices and their current values for a given country.
     """
-    country_name = country_name.lower().strip()
-    
-    # Mock Data Source
-    data = {
-        "japan": {
-            "exchange": "Tokyo Stock Exchange (TSE)",
-            "indices": [
-                {"name": "Nikkei 225", "value": 38915.00, "change": "+1.2%"},
-                {"name": "TOPIX", "value": 2650.50, "change": "+0.8%"}
-            ]
-        },
-        "india": {
-            "exchange": "Bombay Stock Exchange (BSE) / National Stock Exchange (NSE)",
-            "indices": [
-                {"name": "NIFTY 50", "value": 24500.00, "change": "-0.5%"},
-                {"name": "SENSEX", "value": 81000.00, "change": "-0.4%"}
-            ]
-        },
-        "us": {
-            "exchange": "New York Stock Exchange (NYSE) / NASDAQ",
-            "indices": [
-                {"name": "S&P 500", "value": 5400.00, "change": "+0.3%"},
-                {"name": "Dow Jones", "value": 39000.00, "change": "+0.1%"},
-                {"name": "NASDAQ", "value": 17000.00, "change": "+0.5%"}
-            ]
-        },
-        "usa": {
-            "exchange": "New York Stock Exchange (NYSE) / NASDAQ",
-            "indices": [
-                {"name": "S&P 500", "value": 5400.00, "change": "+0.3%"},
-                {"name": "Dow Jones", "value": 39000.00, "change": "+0.1%"},
-                {"name": "NASDAQ", "value": 17000.00, "change": "+0.5%"}
-            ]
-        },
-        "united states": {
-            "exchange": "New York Stock Exchange (NYSE) / NASDAQ",
-            "indices": [
-                {"name": "S&P 500", "value": 5400.00, "change": "+0.3%"},
-                {"name": "Dow Jones", "value": 39000.00, "change": "+0.1%"},
-                {"name": "NASDAQ", "value": 17000.00, "change": "+0.5%"}
-            ]
-        },
-        "south korea": {
-            "exchange": "Korea Exchange (KRX)",
-            "indices": [
-                {"name": "KOSPI", "value": 2700.00, "change": "+0.9%"},
-                {"name": "KOSDAQ", "value": 850.00, "change": "+1.1%"}
-            ]
-        },
-        "china": {
-            "exchange": "Shanghai Stock Exchange (SSE)",
-            "indices": [
-                {"name": "Shanghai Composite", "value": 3050.00, "change": "-0.2%"},
-                {"name": "Shenzhen Component", "value": 9500.00, "change": "-0.3%"}
-            ]
-        },
-        "uk": {
-            "exchange": "London Stock Exchange (LSE)",
-            "indices": [
-                {"name": "FTSE 100", "value": 8200.00, "change": "+0.4%"},
-                {"name": "FTSE 250", "value": 20100.00, "change": "+0.6%"}
-            ]
-        },
-        "united kingdom": {
-            "exchange": "London Stock Exchange (LSE)",
-            "indices": [
-                {"name": "FTSE 100", "value": 8200.00, "change": "+0.4%"},
-                {"name": "FTSE 250", "value": 20100.00, "change": "+0.6%"}
-            ]
-        }
-    }
-    
-    if country_name in data:
-        return json.dumps(data[country_name])
-    else:
-        return json.dumps({"error": "Country not found in mock database."})
+    with span("tool.stocks", country=country_name) as tool_span:
+        _check_providers()
+        key = market_key(country_name)
+
+        if key is not None:
+            payload, status, _age = _payload_cache.get_or_load(key, lambda: _build_payload(key))
+            tool_span.set(cache=status)
+            return payload
+        else:
+            tool_span.set(error="not found")
+            return json.dumps({"error": "Country not found in market data."})
+
+
+async def aget_stock_data(country_name: str):
+    """
+    Async variant of get_stock_data(). Building a payload reads and writes the
+    snapshot store (SQLite, pandas), so it runs in a worker thread rather than
+    on the shared event loop.
+    """
+    return await asyncio.to_thread(get_stock_data, country_name)
@@ -0,0 +1,183 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from .sqlite_store import SharedStore, SQLiteStore
+
+# Append-only local history of exchange-rate and index snapshots.
+# Set FINANCE_STORE_PATH to an empty string to disable persistence.
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "snapshots.sqlite3")
+FINANCE_STORE_PATH = os.getenv("FINANCE_STORE_PATH", DEFAULT_STORE_PATH)
+
+# Identical index values are not re-recorded more often than this (seconds)
+SNAPSHOT_MIN_INTERVAL = float(os.getenv("SNAPSHOT_MIN_INTERVAL", "300"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fx_snapshots (
+    ts REAL NOT NULL,
+    base TEXT NOT NULL,
+    quote TEXT NOT NULL,
+    rate REAL NOT NULL,
+    source TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fx_by_pair ON fx_snapshots (base, quote, ts);
+CREATE TABLE IF NOT EXISTS index_snapshots (
+    ts REAL NOT NULL,
+    country TEXT NOT NULL,
+    index_name TEXT NOT NULL,
+    value REAL NOT NULL,
+    source TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS index_by_name ON index_snapshots (country, index_name, ts);
+"""
+
+
+class SnapshotStore(SQLiteStore):
+    """
+    SQLite-backed append-only store with range-scan queries returning pandas objects.
+    """
+
+    schema = _SCHEMA
+
+    def __init__(self, path: str):
+        self._last_index_write = {}  # (country, index_name) -> (ts, value)
+        self.version = 0  # bumped on every write, lets callers memoize reads
+        super().__init__(path)
+
+    # --- Writes ---
+
+    def record_rates(self, base: str, rates: dict, source: str, ts: float = None):
+        """
+        Appends one snapshot of a full rate table (units of each quote per 1 base).
+        """
+        ts = time.time() if ts is None else ts
+        rows = [(ts, base, quote, float(rate), source) for quote, rate in rates.items() if rate]
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.executemany("INSERT INTO fx_snapshots VALUES (?, ?, ?, ?, ?)", rows)
+            self.version += 1
+
+    def record_indices(self, country: str, indices, source: str, ts: float = None):
+        """
+        Appends index values for a country. Unchanged values seen within
+        SNAPSHOT_MIN_INTERVAL are skipped to keep the history compact.
+        """
+        ts = time.time() if ts is None else ts
+        rows = []
+        with self._write_lock:
+            for idx in indices:
+                key = (country, idx["name"])
+                last = self._last_index_write.get(key)
+                if last and last[1] == idx["value"] and ts - last[0] < SNAPSHOT_MIN_INTERVAL:
+                    continue
+                rows.append((ts, country, idx["name"], float(idx["value"]), source))
+                self._last_index_write[key] = (ts, idx["value"])
+            if rows:
+                conn = self._conn()
+                with conn:
+                    conn.executemany("INSERT INTO index_snapshots VALUES (?, ?, ?, ?, ?)", rows)
+                self.version += 1
+
+    def count_snapshots(self, base: str, source: str, since: float):
+        """
+        Number of rate-table snapshots for `base` from `source` since a timestamp
+        (one per successful fetch, so this doubles as a persisted request counter).
+        """
+        return self._conn().execute(
+            "SELECT COUNT(DISTINCT ts) FROM fx_snapshots WHERE base = ? AND source = ? AND ts >= ?",
+            (base, source, since)
+        ).fetchone()[0]
+
+    def latest_rates(self, base: str, source: str = None):
+        """
+        Returns (ts, {quote: rate}) for the most recent rate table of `base`, or None.
+        """
+        clause, params = ("", [base]) if source is None else (" AND source = ?", [base, source])
+        row = self._conn().execute(
+            f"SELECT MAX(ts) FROM fx_snapshots WHERE base = ?{clause}", params
+        ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        rows = self._conn().execute(
+            "SELECT quote, rate FROM fx_snapshots WHERE base = ? AND ts = ?", (base, row[0])
+        ).fetchall()
+        return row[0], dict(rows)
+
+    # --- Range scans ---
+
+    @staticmethod
+    def _range_clause(start, end):
+        clause, params = "", []
+        if start is not None:
+            clause += " AND a.ts >= ?"
+            params.append(start)
+        if end is not None:
+            clause += " AND a.ts <= ?"
+            params.append(end)
+        return clause, params
+
+    def fx_arrays(self, anchor: str, base: str, quote: str, start: float = None, end: float = None,
+                  exclude_source: str = None):
+        """
+        Returns (timestamps, rates) NumPy arrays for units of quote per 1 base,
+        derived from anchor-based snapshots by division.
+        """
+        clause, params = self._range_clause(start, end)
+        if exclude_source:
+            clause += " AND a.source != ?"
+            params.append(exclude_source)
+        rows = self._conn().execute(
+            "SELECT a.ts, b.rate / a.rate FROM fx_snapshots a "
+            "JOIN fx_snapshots b ON b.ts = a.ts AND b.base = a.base "
+            f"WHERE a.base = ? AND a.quote = ? AND b.quote = ?{clause} ORDER BY a.ts",
+            [anchor, base, quote] + params
+        ).fetchall()
+        array = np.asarray(rows, dtype=np.float64).reshape(-1, 2)
+        return array[:, 0], array[:, 1]
+
+    def index_arrays(self, country: str, index_name: str, start: float = None, end: float = None,
+                     exclude_source: str = None):
+        """
+        Returns (timestamps, values) NumPy arrays for one index.
+        """
+        clause, params = self._range_clause(start, end)
+        if exclude_source:
+            clause += " AND a.source != ?"
+            params.append(exclude_source)
+        rows = self._conn().execute(
+            "SELECT a.ts, a.value FROM index_snapshots a "
+            f"WHERE a.country = ? AND a.index_name = ?{clause} ORDER BY a.ts",
+            [country, index_name] + params
+        ).fetchall()
+        array = np.asarray(rows, dtype=np.float64).reshape(-1, 2)
+        return array[:, 0], array[:, 1]
+
+    def fx_series(self, anchor: str, base: str, quote: str, start: float = None, end: float = None, **kwargs):
+        """
+        Same as fx_arrays() but as a pandas Series indexed by UTC timestamp.
+        """
+        return _to_series(*self.fx_arrays(anchor, base, quote, start, end, **kwargs), name=f"{base}/{quote}")
+
+    def index_series(self, country: str, index_name: str, start: float = None, end: float = None, **kwargs):
+        """
+        Same as index_arrays() but as a pandas Series indexed by UTC timestamp.
+        """
+        return _to_series(*self.index_arrays(country, index_name, start, end, **kwargs), name=index_name)
+
+
+def _to_series(ts, values, name):
+    index = pd.to_datetime(ts, unit="s", utc=True)
+    return pd.Series(values, index=index, name=name)
+
+
+_store = SharedStore(SnapshotStore, "Snapshot store")
+
+
+def get_store():
+    """
+    Returns the process-wide SnapshotStore, or None if persistence is disabled or unavailable.
+    """
+    return _store.get(FINANCE_STORE_PATH)
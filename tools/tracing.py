@@ -0,0 +1,196 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+# Lightweight span/timer instrumentation.
+# Spans are only recorded inside an active trace (see trace()); otherwise
+# span() returns a shared no-op object, so disabled tracing costs one
+# ContextVar lookup per call site.
+FINANCE_TRACE = os.getenv("FINANCE_TRACE", "0") == "1"
+TRACE_LOG_PATH = os.getenv(
+    "FINANCE_TRACE_LOG",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs", "trace.jsonl")
+)
+TRACE_LOG_MAX_BYTES = int(os.getenv("FINANCE_TRACE_LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+TRACE_LOG_BACKUPS = int(os.getenv("FINANCE_TRACE_LOG_BACKUPS", "3"))
+
+_current_trace = contextvars.ContextVar("finance_trace", default=None)
+_current_span = contextvars.ContextVar("finance_span", default=None)
+
+_logger = None
+_logger_lock = threading.Lock()
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """
+    One timed operation inside a trace. Use as a context manager; attach
+    attributes with set(). Exceptions are recorded as an `error` attribute.
+    """
+
+    __slots__ = ("trace", "name", "attrs", "parent", "start", "end", "_token")
+
+    def __init__(self, trace, name, attrs, parent=None):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+        self.parent = parent
+        self.start = None
+        self.end = None
+        self._token = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter()
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.attrs["error"] = f"{exc_type.__name__}: {exc}"
+        self.trace.add(self)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    @property
+    def duration_ms(self):
+        return (self.end - self.start) * 1000
+
+    def to_record(self, origin: float):
+        return {
+            "name": self.name,
+            "parent": self.parent.name if self.parent else None,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration_ms, 3),
+            "attrs": self.attrs
+        }
+
+
+class Trace:
+    """
+    Collects the spans of one run (thread-safe). Created by trace().
+    """
+
+    def __init__(self, name: str, attrs: dict):
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attrs = attrs
+        self.started_at = time.time()
+        self.origin = time.perf_counter()
+        self.duration_ms = None
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def add_span(self, name: str, start: float, end: float, **attrs):
+        """
+        Records a span measured elsewhere (perf_counter start/end), e.g. from callbacks.
+        """
+        span = Span(self, name, attrs)
+        span.start, span.end = start, end
+        self.add(span)
+
+    def records(self):
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        return [span.to_record(self.origin) for span in spans]
+
+    def to_dict(self):
+        return {
+            "trace_id": self.id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "attrs": self.attrs,
+            "spans": self.records()
+        }
+
+
+def span(name: str, **attrs):
+    """
+    Returns a span context manager bound to the current trace, or a no-op
+    if no trace is active.
+    """
+    current = _current_trace.get()
+    if current is None:
+        return NOOP_SPAN
+    return Span(current, name, attrs, _current_span.get())
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def _get_logger():
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            os.makedirs(os.path.dirname(TRACE_LOG_PATH) or ".", exist_ok=True)
+            handler = RotatingFileHandler(
+                TRACE_LOG_PATH, maxBytes=TRACE_LOG_MAX_BYTES, backupCount=TRACE_LOG_BACKUPS, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            _logger = logging.getLogger("finance_agent.trace")
+            _logger.setLevel(logging.INFO)
+            _logger.propagate = False
+            _logger.addHandler(handler)
+        return _logger
+
+
+def write_jsonl(trace_obj: Trace):
+    """
+    Appends the trace as one JSON line to the rotating trace log.
+    """
+    try:
+        _get_logger().info(json.dumps(trace_obj.to_dict(), default=str))
+    except OSError as e:
+        print(f"Trace log write failed: {e}")
+
+
+@contextmanager
+def trace(name: str, enabled: bool = None, log: bool = True, **attrs):
+    """
+    Starts a trace for the enclosed block and yields it (or None when disabled).
+    `enabled` defaults to FINANCE_TRACE. On exit the trace is appended to the
+    JSONL log unless log=False.
+    """
+    if not (FINANCE_TRACE if enabled is None else enabled):
+        yield None
+        return
+
+    trace_obj = Trace(name, attrs)
+    token = _current_trace.set(trace_obj)
+    try:
+        yield trace_obj
+    finally:
+        trace_obj.duration_ms = round((time.perf_counter() - trace_obj.origin) * 1000, 3)
+        _current_trace.reset(token)
+        if log:
+            write_jsonl(trace_obj)
@@ -6,25 +6,29 @@ import sys
 sys.path.append(os.getcwd())
 
 # No try-except for import to let it crash and show traceback
-from finance_agent.agent import initialize_agent
+try:
+    from agent import get_agent, run_agent
+except ImportError:
+    from finance_agent.agent import get_agent, run_agent
 
 load_dotenv()
 
-if not os.getenv("GOOGLE_API_KEY"):
-    print("Error: GOOGLE_API_KEY not found.")
+if not os.getenv("GROQ_API_KEY"):
+    print("Error: GROQ_API_KEY not found.")
     sys.exit(1)
 
 print("Initializing Agent...")
 try:
-    agent_executor = initialize_agent()
+    agent_executor = get_agent()
     print("Agent Initialized.")
     
     input_text = "Give me financial details for India."
     print(f"Running query: {input_text}")
     
-    response = agent_executor.invoke({"input": input_text})
+    # LangGraph agents return the conversation state; the last message is the answer
+    response = run_agent(agent_executor, [("user", input_text)])
     print("\n--- Agent Response ---")
-    print(response["output"])
+    print(response["messages"][-1].content)
     print("\n--- End Response ---")
     print("Verification Successful.")
 except Exception as e: